@@ -0,0 +1,37 @@
+"""
+Memory of the combined capital gain frame with object strings against
+categorical columns.
+
+Run from the capital_gain_calculator folder:
+
+    python -m benchmarks.bench_categorical_memory
+"""
+
+import os
+import tempfile
+
+from benchmarks.synthetic import write_capital_gain_csvs
+from scripts.csv_processor import CSVProcessor
+
+CATEGORICAL_COLUMNS = [
+    "Security Name (Security Code)",
+    "Asset Type",
+    "Status",
+    "Data From",
+    "31 July 2024",
+]
+
+
+def megabytes(df) -> float:
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'files x rows':>14} {'object':>10} {'categorical':>12}")
+        for files, rows in ((10, 10_000), (30, 10_000), (10, 100_000)):
+            paths = write_capital_gain_csvs(os.path.join(tmp, f"{files}x{rows}"), files, rows)
+            df = CSVProcessor().combine_csvs(paths)
+
+            as_objects = df.astype({col: object for col in CATEGORICAL_COLUMNS})
+            print(f"{files:>5} x {rows:<6} {megabytes(as_objects):>8.1f}MB {megabytes(df):>10.1f}MB")
@@ -0,0 +1,61 @@
+"""
+Benchmark of the schema based AIS CSV reader against the previous read path.
+
+Run from the capital_gain_calculator folder:
+
+    python -m benchmarks.bench_csv_read
+"""
+
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_capital_gain_csv
+from scripts.schema import get_schema, has_pyarrow
+
+
+def read_legacy(file_path: str, headers: list) -> pd.DataFrame:
+    """
+    The read path used before the schema registry: parse every column as
+    inferred objects, narrow to the headers, then strip commas with a regex.
+    """
+    df = pd.read_csv(file_path, skiprows=1)
+    df = df[headers]
+    for col in ("Cost of Acquisition", "Sales Consideration - Reported by Source"):
+        df[col] = pd.to_numeric(df[col].replace({r",": ""}, regex=True), errors="coerce")
+    return df
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """
+    Returns the best wall time of `repeat` runs of `func`, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    schema = get_schema("capital_gain")
+    headers = list(schema.columns)
+    engines = ["c", "pyarrow"] if has_pyarrow() else ["c"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>10} {'legacy':>10} " + " ".join(f"{e:>10}" for e in engines))
+        for rows in (10_000, 100_000, 500_000):
+            file_path = write_capital_gain_csv(os.path.join(tmp, f"{rows}.csv"), rows)
+
+            legacy = best_of(lambda: read_legacy(file_path, headers))
+            timings = [
+                best_of(lambda: schema.read_csv(file_path, engine=engine))
+                for engine in engines
+            ]
+            print(
+                f"{rows:>10} {legacy:>9.3f}s "
+                + " ".join(f"{t:>9.3f}s" for t in timings)
+            )
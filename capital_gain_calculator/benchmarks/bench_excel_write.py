@@ -0,0 +1,70 @@
+"""
+Time and peak memory of writing the Capital Gain workbook, with the whole
+frame in memory against streaming chunks into a constant_memory workbook.
+
+Run from the capital_gain_calculator folder:
+
+    python -m benchmarks.bench_excel_write [rows ...]
+
+Peak memory is what Python allocated (tracemalloc), pandas and xlsxwriter
+included. The in memory mode at 1M rows needs a few GB.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import write_capital_gain_csvs
+from scripts.csv_processor import CSVProcessor
+from scripts.excel_processor import ExcelProcessor
+
+FILES = 4
+# Rows per streamed chunk, the streaming peak grows with this, not with the rows
+CHUNKSIZE = 20_000
+
+
+def in_memory(paths, output_path):
+    processor = CSVProcessor(fixed_point=True)
+    df = processor.combine_csvs(paths)
+    ExcelProcessor(df=df, fixed_point=True).Make_Excel(output_path)
+
+
+def streaming(paths, output_path):
+    processor = CSVProcessor(fixed_point=True)
+    totals = processor.aggregate_csvs(paths, CHUNKSIZE)
+    ExcelProcessor(
+        totals=totals,
+        data_chunks=lambda: processor.stream_csvs(paths, CHUNKSIZE),
+        constant_memory=True,
+    ).Make_Excel(output_path)
+
+
+def measure(func, paths, output_path):
+    """
+    Returns the wall time (seconds) and peak traced memory (MB) of one run.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(paths, output_path)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1024 / 1024
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>10} {'in memory':>22} {'constant_memory':>22}")
+        for rows in sizes:
+            paths = write_capital_gain_csvs(os.path.join(tmp, str(rows)), FILES, rows // FILES)
+            output_path = os.path.join(tmp, f"{rows}.xlsx")
+
+            results = [measure(func, paths, output_path) for func in (in_memory, streaming)]
+            print(f"{rows:>10} " + " ".join(f"{seconds:>9.1f}s {peak:>8.1f}MB" for seconds, peak in results))
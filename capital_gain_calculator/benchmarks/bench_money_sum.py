@@ -0,0 +1,47 @@
+"""
+Vectorized sums of rupee amounts as float64 against exact int64 paise.
+
+Run from the capital_gain_calculator folder:
+
+    python -m benchmarks.bench_money_sum
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.money import to_paise
+
+
+def best_of(func, repeat: int = 5):
+    """
+    Returns the result and best wall time (seconds) of `repeat` runs of `func`.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    print(f"{'rows':>10} {'float64':>10} {'Int64':>10} {'int64':>10} {'float error (paise)':>20}")
+    for rows in (100_000, 1_000_000, 10_000_000):
+        # Two decimal amounts like the AIS ones, up to 50 lakh rupees
+        rupees = pd.Series(rng.integers(100, 5_000_000_00, rows) / 100)
+        paise = to_paise(rupees)
+        plain = paise.to_numpy(dtype="int64")
+
+        float_sum, float_time = best_of(lambda: rupees.sum())
+        paise_sum, paise_time = best_of(lambda: paise.sum())
+        _, int_time = best_of(lambda: plain.sum())
+
+        error = abs(round(float_sum * 100) - int(paise_sum))
+        print(
+            f"{rows:>10} {float_time * 1000:>8.2f}ms {paise_time * 1000:>8.2f}ms "
+            f"{int_time * 1000:>8.2f}ms {error:>20}"
+        )
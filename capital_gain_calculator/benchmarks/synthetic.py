@@ -0,0 +1,87 @@
+import datetime as dt
+import os
+import random
+from typing import List
+
+# Full column layout of the AIS capital gain download, only some of them are
+# read by CSVProcessor
+CAPITAL_GAIN_COLUMNS = [
+    "Sr. No.",
+    "Information Code",
+    "Information Description",
+    "Information Source",
+    "Security Name (Security Code)",
+    "Security Class",
+    "Date of Sale/Transfer",
+    "Asset Type",
+    "Quantity",
+    "Sales Consideration - Reported by Source",
+    "Sales Consideration - Modified",
+    "Cost of Acquisition",
+    "Holding Period",
+    "Status",
+]
+
+
+def _amount(value: float) -> str:
+    """
+    Formats an amount the way the AIS portal does, quoted with separators.
+    """
+    return f'"{value:,.2f}"'
+
+
+def write_capital_gain_csv(file_path: str, rows: int, seed: int = 0) -> str:
+    """
+    Writes a synthetic AIS capital gain CSV with the given number of trades.
+
+    Args:
+        file_path: Path of the CSV file to write
+        rows: Number of trade rows
+        seed: Seed for the random generator, the same seed gives the same file
+
+    Returns:
+        str: The path of the written file
+    """
+    rng = random.Random(seed)
+    start = dt.date(2024, 4, 1)
+
+    with open(file_path, "w", newline="") as f:
+        f.write("Capital Gain Information\n")
+        f.write(",".join(CAPITAL_GAIN_COLUMNS) + "\n")
+        for i in range(rows):
+            sale = rng.uniform(1_000, 5_00_000)
+            cost = sale * rng.uniform(0.7, 1.2)
+            date = start + dt.timedelta(days=rng.randint(0, 364))
+            row = [
+                str(i + 1),
+                "SFT-17",
+                "Sale of securities",
+                '"BROKER LTD (AAAAA1234A)"',
+                f'"SECURITY {rng.randint(1, 200)} (INE{rng.randint(100, 999)})"',
+                "Equity",
+                date.strftime("%d-%b-%Y"),
+                "Short term" if rng.random() < 0.6 else "Long term",
+                str(rng.randint(1, 500)),
+                _amount(sale),
+                "",
+                _amount(cost),
+                str(rng.randint(1, 900)),
+                "Active" if rng.random() < 0.9 else "Inactive",
+            ]
+            f.write(",".join(row) + "\n")
+
+    return file_path
+
+
+def write_capital_gain_csvs(folder: str, files: int, rows: int) -> List[str]:
+    """
+    Writes `files` synthetic AIS capital gain CSVs of `rows` trades each.
+
+    Returns:
+        List[str]: Paths of the written files
+    """
+    os.makedirs(folder, exist_ok=True)
+    return [
+        write_capital_gain_csv(os.path.join(folder, f"ais_{i}.csv"), rows, seed=i)
+        for i in range(files)
+    ]
@@ -1,4 +1,5 @@
 import flet as ft
+import multiprocessing
 from routes.router import Router
 
 def main(page: ft.Page):
@@ -6,4 +7,6 @@ def main(page: ft.Page):
     router.setup_main_route()
 
 if __name__ == "__main__":
+    # Needed by the process pool of CSVProcessor in the frozen Windows build
+    multiprocessing.freeze_support()
     ft.app(target=main)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from scripts.periods import PeriodBucketer
+
+SHORT_TERM = "Short term"
+LONG_TERM = "Long term"
+TERMS = [SHORT_TERM, LONG_TERM]
+
+FVC = "Sales Consideration - Reported by Source"
+COA = "Cost of Acquisition"
+
+
+@dataclass
+class CapitalGainTotals:
+    """
+    FVC, COA and gain totals per (term, period), all the dashboard needs.
+
+    Every asset type other than "Short term" is counted as long term, and
+    rows without a sale date belong to no period, like the dashboard always
+    did. Each amount column is summed per (term, period) in one pass over
+    the frame, and the totals can be fed chunk by chunk, so the memory used
+    does not depend on the number of rows.
+
+    Attributes:
+        periods: Bucketer of the financial year rate change cutoffs
+        fvc: Full Value of Consideration per (term, period label)
+        coa: Cost of Acquisition per (term, period label)
+        rows: Number of rows added so far
+        paise: True if the amounts are exact integer paise (fixed point mode)
+    """
+
+    periods: PeriodBucketer
+    fvc: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    coa: Dict[Tuple[str, str], float] = field(default_factory=dict)
+    rows: int = 0
+    paise: bool = False
+
+    def __post_init__(self):
+        # Integer zero, so the paise totals stay exact Python ints
+        for key in self.keys():
+            self.fvc.setdefault(key, 0)
+            self.coa.setdefault(key, 0)
+
+    @classmethod
+    def for_financial_year(cls, financial_year: str, paise: bool = False) -> "CapitalGainTotals":
+        """
+        Returns empty totals for the rate change periods of a financial year.
+        """
+        return cls(PeriodBucketer.for_financial_year(financial_year), paise=paise)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, financial_year: str, paise: bool = False) -> "CapitalGainTotals":
+        """
+        Returns the totals of a whole frame, as returned by `CSVProcessor.combine_csvs`.
+        """
+        totals = cls.for_financial_year(financial_year, paise=paise)
+        totals.add(df)
+        return totals
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """
+        Returns every (term, period label) pair in dashboard order.
+        """
+        return [(term, label) for term in TERMS for label in self.periods.labels]
+
+    def add(self, df: pd.DataFrame) -> None:
+        """
+        Adds the FVC and COA of the rows of `df` to the running totals.
+
+        Args:
+            df: Cleaned capital gain rows, as produced by CSVProcessor
+        """
+        # One integer key per row, term * periods + period, -1 without a period
+        labels = self.periods.labels
+        long_term = (df["Asset Type"] != SHORT_TERM).to_numpy(dtype=bool)
+        period = self.periods.assign(df["Date of Sale/Transfer"]).cat.codes.to_numpy()
+        key = np.where(period >= 0, long_term * len(labels) + period, -1)
+        has_period = key >= 0
+
+        # Every (term, period) cell is summed in one pass, no sorting or copies of
+        # the frame: a weighted bincount for rupees, an int64 np.add.at for paise,
+        # so integer paise stay exact and never go through float64
+        cells = len(TERMS) * len(labels)
+        sums = {}
+        for col in (FVC, COA):
+            if self.paise:
+                amounts = df[col].to_numpy(dtype="int64", na_value=0)
+                sums[col] = np.zeros(cells, dtype="int64")
+                np.add.at(sums[col], key[has_period], amounts[has_period])
+            else:
+                amounts = df[col].to_numpy(dtype="float64", na_value=0.0)
+                sums[col] = np.bincount(key[has_period], weights=amounts[has_period], minlength=cells)
+
+        for term_code, term_key in enumerate(TERMS):
+            for period_code, label in enumerate(labels):
+                fvc = sums[FVC][term_code * len(labels) + period_code]
+                coa = sums[COA][term_code * len(labels) + period_code]
+                if self.paise:
+                    fvc, coa = int(fvc), int(coa)
+                self.fvc[(term_key, label)] += fvc
+                self.coa[(term_key, label)] += coa
+
+        self.rows += len(df)
+
+    def gain(self, term: str, label: str) -> float:
+        """
+        Returns the capital gain (FVC - COA, negative for a loss) of a term and period.
+        """
+        return self.fvc[(term, label)] - self.coa[(term, label)]
+
+    def term_fvc(self, term: str) -> float:
+        """
+        Returns the FVC of a term over all the periods.
+        """
+        return sum(self.fvc[(term, label)] for label in self.periods.labels)
+
+    def term_coa(self, term: str) -> float:
+        """
+        Returns the COA of a term over all the periods.
+        """
+        return sum(self.coa[(term, label)] for label in self.periods.labels)
+
+    def term_gain(self, term: str) -> float:
+        """
+        Returns the capital gain of a term over all the periods.
+        """
+        return self.term_fvc(term) - self.term_coa(term)
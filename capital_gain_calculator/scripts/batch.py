@@ -0,0 +1,185 @@
+import argparse
+import contextlib
+import glob
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from scripts.csv_processor import CSVProcessor
+from scripts.excel_processor import ExcelProcessor
+from scripts.aggregation import CapitalGainTotals
+from scripts.cache import ParseCache, default_cache_dir
+from scripts.tax import gains_frame, get_tax_table
+
+APP_NAME = "CGC"
+SUMMARY_FILE = "run_summary.csv"
+SUMMARY_COLUMNS = ["Client", "Files", "Rows", "Duplicates", "Total Tax", "Seconds", "Status", "Error", "Output"]
+
+
+def find_clients(root: str) -> Dict[str, List[str]]:
+    """
+    Returns the AIS CSV files of every client folder directly under `root`.
+
+    Args:
+        root: Folder with one subfolder of CSV files per client
+
+    Returns:
+        Dict[str, List[str]]: Sorted CSV paths per client (folder) name,
+        folders without CSV files are left out
+    """
+    clients = {}
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name.lower()):
+        if entry.is_dir():
+            files = sorted(glob.glob(os.path.join(entry.path, "*.csv")))
+            if files:
+                clients[entry.name] = files
+    return clients
+
+
+def process_client(client: str, file_paths: List[str], output_dir: str, financial_year: str = "2024-25", cache_dir: Optional[str] = None, verify: bool = False) -> dict:
+    """
+    Builds the Capital Gain dashboard of one client.
+
+    This is the unit of work of the process pool, so it only takes and
+    returns picklable values. The progress printed by the processors is
+    captured, the last line of it is reported when the client fails.
+
+    Args:
+        client: Client name, used in the output file name
+        file_paths: AIS CSV files of the client
+        output_dir: Folder the dashboard is written to
+        financial_year: Financial year of the rates and periods
+        cache_dir: Parse cache folder, None disables the cache
+        verify: Re-read the dashboard and check its formula results
+
+    Returns:
+        dict: One row of the run summary
+    """
+    start = time.perf_counter()
+    output_path = os.path.join(output_dir, f"{client} - Capital Gain.xlsx")
+    result = dict.fromkeys(SUMMARY_COLUMNS)
+    result.update({"Client": client, "Files": len(file_paths), "Rows": 0, "Duplicates": 0, "Status": "Failed", "Error": "", "Output": ""})
+
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            cache = ParseCache(cache_dir) if cache_dir else None
+            csv_processor = CSVProcessor(cache=cache, fixed_point=True)
+            df = csv_processor.combine_csvs(file_paths)
+            if df.empty:
+                raise ValueError("No rows read from the CSV files")
+
+            totals = CapitalGainTotals.from_frame(df, financial_year, paise=True)
+            created = ExcelProcessor(df=df, financial_year=financial_year, totals=totals, constant_memory=True, verify=verify).Make_Excel(output_path)
+            if not created:
+                raise RuntimeError("Excel file was not created")
+
+        taxes = get_tax_table(financial_year).compute(gains_frame({client: totals}))
+        result.update({
+            "Rows": len(df),
+            "Duplicates": len(csv_processor.duplicates),
+            "Total Tax": float(taxes.loc[client, "Total Tax"]),
+            "Status": "OK",
+            "Output": output_path,
+        })
+    except Exception as e:
+        # The processors print their errors instead of raising them
+        printed = [line for line in log.getvalue().splitlines() if line.startswith("Error")]
+        result["Error"] = printed[-1] if printed else str(e)
+
+    result["Seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def run_batch(root: str, output_dir: Optional[str] = None, workers: int = 0, financial_year: str = "2024-25", cache_dir: Optional[str] = None, verify: bool = False) -> pd.DataFrame:
+    """
+    Builds the dashboards of every client folder under `root`, several clients at a time.
+
+    Each client is processed in its own worker process, the CSV files of a
+    client are read serially in that process. Falls back to processing the
+    clients one after another if the process pool cannot be used.
+
+    Args:
+        root: Folder with one subfolder of AIS CSV files per client
+        output_dir: Folder for the dashboards and the run summary, `root` by default
+        workers: Number of worker processes, 0 uses one per CPU
+        financial_year: Financial year of the rates and periods
+        cache_dir: Parse cache folder, None disables the cache
+        verify: Re-read every dashboard and check its formula results
+
+    Returns:
+        pd.DataFrame: The run summary, one row per client, also written to
+        run_summary.csv in `output_dir`
+    """
+    start = time.perf_counter()
+    output_dir = output_dir or root
+    os.makedirs(output_dir, exist_ok=True)
+
+    clients = find_clients(root)
+    print(f"Found {len(clients)} client folders in {root}")
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(clients)))
+
+    args = [(client, files, output_dir, financial_year, cache_dir, verify) for client, files in clients.items()]
+    results = None
+    if workers > 1:
+        try:
+            results = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(process_client, *arg) for arg in args]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    print(f"[{len(results)}/{len(args)}] {results[-1]['Client']}: {results[-1]['Status']}")
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Parallel processing unavailable ({e}), falling back to serial...")
+            results = None
+
+    if results is None:
+        results = []
+        for arg in args:
+            results.append(process_client(*arg))
+            print(f"[{len(results)}/{len(args)}] {results[-1]['Client']}: {results[-1]['Status']}")
+
+    summary = pd.DataFrame(results, columns=SUMMARY_COLUMNS).sort_values("Client").reset_index(drop=True)
+    summary.to_csv(os.path.join(output_dir, SUMMARY_FILE), index=False)
+
+    failed = summary[summary["Status"] != "OK"]
+    print(f"Processed {len(summary)} clients in {time.perf_counter() - start:.1f}s, {len(failed)} failed, {summary['Rows'].sum()} rows")
+    for row in failed.itertuples(index=False):
+        print(f"  {row.Client}: {row.Error}")
+    print(f"Summary written to {os.path.join(output_dir, SUMMARY_FILE)}")
+
+    return summary
+
+
+if __name__ == "__main__":
+    # python -m scripts.batch <root> [--output DIR] [--workers N] [--financial-year FY] [--no-cache] [--verify]
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(
+        description="Build the Capital Gain dashboard of every client folder, without the GUI."
+    )
+    parser.add_argument("root", help="Folder with one subfolder of AIS CSV files per client")
+    parser.add_argument("--output", help="Folder for the dashboards and run_summary.csv (default: root)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes, 0 for one per CPU (default: 0)")
+    parser.add_argument("--financial-year", default="2024-25", help="Financial year of the tax rates (default: 2024-25)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the parse cache")
+    parser.add_argument("--verify", action="store_true", help="Re-read every dashboard and check its formula results")
+    args = parser.parse_args()
+
+    run_batch(
+        args.root,
+        output_dir=args.output,
+        workers=args.workers,
+        financial_year=args.financial_year,
+        cache_dir=None if args.no_cache else default_cache_dir(APP_NAME),
+        verify=args.verify,
+    )
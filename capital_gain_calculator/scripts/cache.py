@@ -0,0 +1,164 @@
+import hashlib
+import os
+from typing import Optional
+
+import pandas as pd
+
+from scripts.schema import AISSchema, has_pyarrow
+
+
+def default_cache_dir(app_name: str) -> str:
+    """
+    Returns the per user cache folder of an app, %LOCALAPPDATA% on Windows.
+
+    Args:
+        app_name: Name of the app, like "CGC" or "CryptoAIS"
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ITR-Kit", app_name, "parse_cache")
+
+
+class ParseCache:
+    """
+    On-disk cache of cleaned AIS CSV frames, keyed by file content.
+
+    The key is the SHA-256 of the file bytes plus the schema name and
+    version, so a renamed or moved download still hits and a change in the
+    parsing rules (bump `AISSchema.version`) misses. Frames are stored as
+    Feather files when pyarrow is installed, pickles otherwise. When the
+    cache grows past `max_bytes` the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Folder holding the cached frames, created on first store
+            max_bytes: Size limit of the cache folder
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = ".feather" if has_pyarrow() else ".pkl"
+
+    def key(self, file_path: str, schema: AISSchema, variant: str = "") -> str:
+        """
+        Returns the cache key of a CSV file read with `schema`.
+
+        Args:
+            file_path: Path to the CSV file
+            schema: Schema the file is read with
+            variant: Tells apart frames of the same file cleaned differently,
+                like "paise" for fixed point amounts
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        variant = f"-{variant}" if variant else ""
+        return f"{schema.name}-v{schema.version}{variant}-{digest.hexdigest()}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Returns the cached frame of `key`, or None on a miss. A corrupt entry
+        is removed and counts as a miss.
+        """
+        path = self._path(key)
+        try:
+            df = pd.read_feather(path) if self.extension == ".feather" else pd.read_pickle(path)
+        except OSError:
+            # Missing entry, or one another process holds, a plain miss
+            return None
+        except Exception:
+            # An entry cut short or corrupt, unpickling it can raise about
+            # anything. Remove it, the file is parsed and stored again
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # Mark the entry as recently used for the eviction order
+        os.utime(path)
+        return df
+
+    def store(self, key: str, df: pd.DataFrame) -> None:
+        """
+        Stores the frame of `key` and evicts old entries if the cache is too big.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+
+        # Write to a temporary file first, parallel workers may read the entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df = df.reset_index(drop=True)
+        if self.extension == ".feather":
+            df.to_feather(tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def entries(self) -> list:
+        """
+        Returns (last use, size, path) of every cache entry, oldest first.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self) -> int:
+        """
+        Returns the total size of the cache entries in bytes.
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries until the cache fits in `max_bytes`.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """
+        Removes every cache entry.
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+
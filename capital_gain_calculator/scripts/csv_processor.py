@@ -1,23 +1,135 @@
+import numpy as np
 import pandas as pd
 import os
-from typing import List
+from typing import Iterator, List, Optional
 import glob
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from scripts.schema import concat_frames, get_schema
+from scripts.periods import ITR_DUE_DATE, PeriodBucketer
+from scripts.aggregation import CapitalGainTotals
+from scripts.cache import ParseCache
+from scripts.money import to_paise
+from scripts.metadata import scan_csv
+from scripts.dedup import DuplicateFilter
+
+# Columns holding rupee amounts, stored as paise in fixed point mode
+MONEY_COLUMNS = [
+    "Sales Consideration - Reported by Source",
+    "Cost of Acquisition",
+    "Sell - Cost",
+]
 
 class CSVProcessor:
-    def __init__(self):
-        self.headers =[
-                "Security Name (Security Code)",
-                "Date of Sale/Transfer",
-                "Asset Type",
-                "Quantity",
-                "Sales Consideration - Reported by Source",
-                "Cost of Acquisition",
-                "Status"
-                
-            ]
+    def __init__(self, engine: str = "c", cache: Optional[ParseCache] = None, fixed_point: bool = False):
+        """
+        Args:
+            engine: CSV parser used for the AIS files, "c" or "pyarrow".
+                "pyarrow" falls back to "c" when pyarrow is not installed.
+            cache: Cache of cleaned frames, unchanged files are loaded from it
+                instead of being parsed again. None disables caching.
+            fixed_point: Store the MONEY_COLUMNS as exact Int64 paise instead
+                of float64 rupees, see `scripts.money`
+        """
+        self.schema = get_schema("capital_gain")
+        self.headers = list(self.schema.columns)
+        # Columns of the cleaned DataFrame, the headers plus the derived columns
+        self.columns = self.headers + ["Data From", "Sell - Cost", "31 July 2024"]
+        self.engine = engine
+        self.cache = cache
+        self.fixed_point = fixed_point
+        self.due_date_periods = PeriodBucketer(
+            [ITR_DUE_DATE], labels=["Before 31 July 2024", "After 31 July 2024"]
+        )
+        # Rows dropped as duplicates of an earlier file by the last combine_csvs call
+        self.duplicates = pd.DataFrame()
 
     
-    def combine_csvs(self, file_paths: List[str], output_path = "./") -> pd.DataFrame:
+    def _clean(self, df: pd.DataFrame, file_path: str) -> pd.DataFrame:
+        """
+        Adds the derived columns to rows read from `file_path` and keeps the active trades.
+
+        Args:
+            df: Rows read with the capital gain schema, a whole file or a chunk of it
+            file_path: Path of the CSV file the rows come from
+
+        Returns:
+            pd.DataFrame: Cleaned DataFrame of the rows
+        """
+        if self.fixed_point:
+            # Exact paise from here on, converted back to rupees only when written to Excel
+            for col in self.schema.amount_columns:
+                df[col] = to_paise(df[col])
+
+        # Add source file column to track origin
+        df['Data From'] = pd.Categorical.from_codes(np.zeros(len(df), dtype=int), categories=[os.path.basename(file_path)])
+        df['Sell - Cost'] = df['Sales Consideration - Reported by Source'] - df['Cost of Acquisition']
+        
+        # Convert the 'Date of Sale/Transfer' column to datetime if not already
+        date_format = self.schema.date_formats['Date of Sale/Transfer'][0]
+        df['Date of Sale/Transfer'] = pd.to_datetime(df['Date of Sale/Transfer'],format=date_format, errors='coerce', dayfirst=True)
+        
+        # Filter for short-term assets and active status
+        # Creating additional column for 31 July 2024
+        # df = df[df['Asset Type'] == "Short term"]
+        df = df[df['Status'] == "Active"]
+        df['31 July 2024'] = self.due_date_periods.assign(df['Date of Sale/Transfer'])
+
+        # Clean up any empty rows
+        df = df.dropna(how='all')
+
+        return df
+
+    def _read_csv(self, file_path: str) -> pd.DataFrame:
+        """
+        Reads a single AIS CSV file and returns the cleaned DataFrame.
+        Skips the first row and uses the second row as headers.
+
+        This is the per-file unit of work used by `combine_csvs`, both in the
+        serial loop and in the worker processes of the parallel mode.
+
+        Args:
+            file_path: Path to the CSV file to read
+
+        Returns:
+            pd.DataFrame: Cleaned DataFrame of the file
+        """
+        if self.cache is not None:
+            key = self.cache.key(file_path, self.schema, variant='paise' if self.fixed_point else '')
+            df = self.cache.load(key)
+            if df is not None:
+                # The key is the file content, the same download may come under another name
+                df['Data From'] = df['Data From'].cat.rename_categories([os.path.basename(file_path)])
+                return df
+
+        # Read only the schema columns, skip the first row and use the second row as header.
+        # The amounts come back as float64 with the thousands separators already removed
+        df = self.schema.read_csv(file_path, engine=self.engine)
+        df = self._clean(df, file_path)
+
+        if self.cache is not None:
+            self.cache.store(key, df)
+
+        return df
+
+    def _read_csvs_parallel(self, file_paths: List[str], workers: int) -> List[pd.DataFrame]:
+        """
+        Reads the CSV files in a process pool.
+
+        `Executor.map` yields results in the order of `file_paths`, so the
+        frames are merged in the same order as the serial loop.
+
+        Args:
+            file_paths: List of existing CSV file paths
+            workers: Number of worker processes
+
+        Returns:
+            List[pd.DataFrame]: Cleaned DataFrames, one per file, in input order
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._read_csv, file_paths))
+
+    def combine_csvs(self, file_paths: List[str], output_path = "./", workers: int = 1, deduplicate: bool = True) -> pd.DataFrame:
         """
         Combines multiple CSV files into a single CSV file.
         Skips the first row and uses the second row as headers.
@@ -25,56 +137,58 @@ class CSVProcessor:
         Args:
             file_paths: List of paths to CSV files to combine
             output_path: Path where the combined CSV should be saved
+            workers: Number of processes used to parse the files. 1 parses the
+                files one after another, 0 uses one process per CPU. Falls back
+                to the serial path if the process pool cannot be used.
+            deduplicate: Drop rows already read from an earlier file, see
+                `DuplicateFilter`. The kept rows name every file they were
+                found in under 'Data From' and the dropped rows are kept in
+                `self.duplicates`.
             
         Returns:
             pd.DataFrame: Combined DataFrame if successful, empty DataFrame otherwise
         """
         try:
-            combined_data = []
-            
+            existing_paths = []
+
             for i, file_path in enumerate(file_paths):
                 if not os.path.exists(file_path):
                     print(f"Warning: File {file_path} does not exist, skipping...")
                     continue
-                
-                # Read the CSV file, skip the first row and use the second row as header
-                df = pd.read_csv(file_path,skiprows=1)
-                
-                # Set the column names to match the headers from the first file
-                df = df[self.headers]
-                
-                
-                # Convert columns to numeric, removing commas and handling errors
-                df['Cost of Acquisition'] = pd.to_numeric(df['Cost of Acquisition'].replace({r',': ''}, regex=True))
-                df['Sales Consideration - Reported by Source'] = pd.to_numeric(df['Sales Consideration - Reported by Source'].replace({r',': ''}, regex=True), errors='coerce')
-
-                # Add source file column to track origin
-                df['Data From'] = os.path.basename(file_path)
-                df['Sell - Cost'] = df['Sales Consideration - Reported by Source'] - df['Cost of Acquisition']
-                
-                # Convert the 'Date of Sale/Transfer' column to datetime if not already
-                df['Date of Sale/Transfer'] = pd.to_datetime(df['Date of Sale/Transfer'],format="%d-%b-%Y", errors='coerce', dayfirst=True)
-                
-                # Filter for short-term assets and active status
-                # Creating additional column for 31 July 2024
-                # df = df[df['Asset Type'] == "Short term"]
-                df = df[df['Status'] == "Active"]
-                df['31 July 2024'] = df['Date of Sale/Transfer'].apply(
-                    lambda x: "Before 31 July 2024" if x < pd.to_datetime("2024-07-31") else "After 31 July 2024"
-                )
-
-                # Clean up any empty rows
-                df = df.dropna(how='all')
-                
-                combined_data.append(df)
+                existing_paths.append(file_path)
+
+            if workers == 0:
+                workers = os.cpu_count() or 1
+            workers = min(workers, len(existing_paths))
+
+            combined_data = None
+            if workers > 1:
+                try:
+                    combined_data = self._read_csvs_parallel(existing_paths, workers)
+                except (OSError, BrokenProcessPool) as e:
+                    print(f"Parallel ingestion unavailable ({e}), falling back to serial...")
+
+            if combined_data is None:
+                combined_data = [self._read_csv(file_path) for file_path in existing_paths]
+
+            for file_path, df in zip(existing_paths, combined_data):
                 print(f"Processed {os.path.basename(file_path)}: {len(df)} data rows")
             
             if not combined_data:
                 print("No valid CSV files found to combine")
                 return pd.DataFrame()  # Return an empty DataFrame
 
-            # Combine all dataframes
-            combined_df = pd.concat(combined_data, ignore_index=True)
+            if deduplicate:
+                duplicate_filter = DuplicateFilter()
+                kept, dropped = zip(*(duplicate_filter.filter(df, file_path) for file_path, df in zip(existing_paths, combined_data)))
+                combined_data = list(kept)
+                self.duplicates = concat_frames(list(dropped))
+                duplicate_filter.print_report()
+
+            # Combine all dataframes, the categorical columns share one category dictionary
+            combined_df = concat_frames(combined_data)
+            if deduplicate:
+                combined_df['Data From'] = duplicate_filter.merge_sources(combined_df)
             print(combined_df)
             
             # Clean up the combined data
@@ -86,6 +200,7 @@ class CSVProcessor:
             # print(f"Successfully combined {len(file_paths)} files into {output_path}")
             print(f"Total data rows: {len(combined_df)}")
             print(f"Total columns: {len(combined_df.columns)}")
+            print(f"Memory usage: {combined_df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB")
             
             return combined_df
             
@@ -93,30 +208,84 @@ class CSVProcessor:
             print(f"Error combining CSV files: {str(e)}")
             return pd.DataFrame()
 
+    def stream_csvs(self, file_paths: List[str], chunksize: int = 100_000, deduplicate: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        Reads the CSV files one chunk at a time, in the order of `file_paths`.
+
+        The chunks hold the same rows and columns as the DataFrame returned by
+        `combine_csvs`, but at most `chunksize` rows are in memory at once.
+        Duplicates are dropped like in `combine_csvs`, but as earlier chunks
+        are already handed out, 'Data From' keeps the file of each row.
+
+        Args:
+            file_paths: List of paths to CSV files to read
+            chunksize: Number of rows read from a file at a time
+            deduplicate: Drop rows already read from an earlier file
+
+        Yields:
+            pd.DataFrame: The next cleaned chunk
+        """
+        duplicate_filter = DuplicateFilter() if deduplicate else None
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                print(f"Warning: File {file_path} does not exist, skipping...")
+                continue
+
+            rows = 0
+            for chunk in self.schema.iter_csv(file_path, chunksize):
+                chunk = self._clean(chunk, file_path)
+                if duplicate_filter is not None:
+                    chunk, _ = duplicate_filter.filter(chunk, file_path)
+                rows += len(chunk)
+                yield chunk
+            print(f"Processed {os.path.basename(file_path)}: {rows} data rows")
+
+        if duplicate_filter is not None:
+            duplicate_filter.print_report()
+
+    def aggregate_csvs(self, file_paths: List[str], chunksize: int = 100_000, financial_year: str = "2024-25", deduplicate: bool = True) -> CapitalGainTotals:
+        """
+        Streams the CSV files and keeps only the FVC and COA totals per term and period.
+
+        This is the bounded memory alternative to `combine_csvs` for very
+        large downloads. The totals are what `ExcelProcessor` needs for the
+        dashboard sheet, the raw data sheet can be written with a second
+        pass over `stream_csvs`.
+
+        Args:
+            file_paths: List of paths to CSV files to read
+            chunksize: Number of rows read from a file at a time
+            financial_year: Financial year of the rate change periods
+            deduplicate: Leave out rows already read from an earlier file
+
+        Returns:
+            CapitalGainTotals: Totals of all the active trades
+        """
+        totals = CapitalGainTotals.for_financial_year(financial_year, paise=self.fixed_point)
+        for chunk in self.stream_csvs(file_paths, chunksize, deduplicate):
+            totals.add(chunk)
+
+        print(f"Total data rows: {totals.rows}")
+        return totals
+
     def get_csv_info(self, file_path: str) -> dict:
         """
         Get basic information about a CSV file, skipping the first row and using the second row as headers.
+        Only the header lines are read, the rows are counted without parsing them.
         
         Args:
             file_path: Path to the CSV file
             
         Returns:
-            dict: Dictionary containing file information
+            dict: Dictionary containing file information, the row count, column names,
+            detected AIS layout ("capital_gain", "crypto" or None), encoding and file size
         """
         try:
-            df = pd.read_csv(file_path, header=None, skiprows=[0], names=self.headers)
-            df = df.dropna(how='all')
-            return {
-                'rows': len(df),
-                'columns': len(df.columns),
-                'column_names': list(df.columns),
-                'file_size': os.path.getsize(file_path)
-            }
+            return scan_csv(file_path, skiprows=self.schema.skiprows)
         except Exception as e:
             return {'error': str(e)}
 
 
-
 if __name__ == "__main__":
     test = CSVProcessor()
 
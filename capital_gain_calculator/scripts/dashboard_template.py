@@ -0,0 +1,259 @@
+import functools
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+import openpyxl
+from openpyxl.cell.rich_text import CellRichText
+from openpyxl.cell.text import InlineFont
+from xlsxwriter.worksheet import Worksheet
+
+from scripts.formats import FormatRegistry
+from scripts.sheet_plan import SheetPlan
+
+# Layout of the Capital Gains dashboard, a template swap changes the dashboard
+DASHBOARD_TEMPLATE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Dashboards", "Dashboard_template.xlsx"
+)
+
+# A cell holding only "{name arg arg...}" is filled from the field `name`
+PLACEHOLDER = re.compile(r"\{(\w+)((?: [^\s{}]+)*)\}")
+
+_HORIZONTAL = {"center": "center", "left": "left", "right": "right", "fill": "fill", "justify": "justify", "centerContinuous": "center_across"}
+_VERTICAL = {"center": "vcenter", "top": "top", "bottom": "bottom", "justify": "vjustify"}
+_BORDERS = {
+    "thin": 1, "medium": 2, "dashed": 3, "dotted": 4, "thick": 5, "double": 6, "hair": 7,
+    "mediumDashed": 8, "dashDot": 9, "mediumDashDot": 10, "dashDotDot": 11, "mediumDashDotDot": 12, "slantDashDot": 13,
+}
+
+# Properties set by `_font_properties`, a rich text run replaces all of them
+_FONT_PROPERTIES = ("font_name", "font_size", "bold", "italic", "underline", "font_strikeout", "font_color", "font_script")
+
+# A template style, the sorted items of its xlsxwriter format properties
+Style = Tuple[Tuple[str, Any], ...]
+
+
+def _rgb(color) -> Optional[str]:
+    """
+    Returns an openpyxl color as "#RRGGBB", None for theme and indexed colors.
+    """
+    if color is None or color.type != "rgb" or not isinstance(color.rgb, str):
+        return None
+    return "#" + color.rgb[-6:].upper()
+
+
+def _font_properties(font) -> dict:
+    """
+    Returns the xlsxwriter format properties of an openpyxl cell or rich text font.
+    Properties matching xlsxwriter's default Calibri 11 are left out.
+    """
+    properties = {}
+    name = font.rFont if isinstance(font, InlineFont) else font.name
+    if isinstance(name, str) and name != "Calibri":
+        properties["font_name"] = name
+    if font.sz and float(font.sz) != 11:
+        size = float(font.sz)
+        properties["font_size"] = int(size) if size.is_integer() else size
+    if font.b:
+        properties["bold"] = True
+    if font.i:
+        properties["italic"] = True
+    if font.u:
+        properties["underline"] = 2 if font.u == "double" else 1
+    if font.strike:
+        properties["font_strikeout"] = True
+    if _rgb(font.color):
+        properties["font_color"] = _rgb(font.color)
+    if font.vertAlign in ("superscript", "subscript"):
+        properties["font_script"] = 1 if font.vertAlign == "superscript" else 2
+    return properties
+
+
+def _cell_properties(cell) -> dict:
+    """
+    Returns the xlsxwriter format properties of the style of an openpyxl cell.
+    """
+    properties = {}
+    alignment = cell.alignment
+    if alignment.horizontal in _HORIZONTAL:
+        properties["align"] = _HORIZONTAL[alignment.horizontal]
+    if alignment.vertical in _VERTICAL:
+        properties["valign"] = _VERTICAL[alignment.vertical]
+    if alignment.wrap_text:
+        properties["text_wrap"] = True
+
+    properties.update(_font_properties(cell.font))
+
+    if cell.fill.fill_type == "solid" and _rgb(cell.fill.fgColor):
+        properties["bg_color"] = _rgb(cell.fill.fgColor)
+
+    for side in ("left", "right", "top", "bottom"):
+        border = getattr(cell.border, side)
+        if border is not None and border.style in _BORDERS:
+            properties[side] = _BORDERS[border.style]
+            if _rgb(border.color):
+                properties[f"{side}_color"] = _rgb(border.color)
+
+    if cell.number_format and cell.number_format != "General":
+        properties["num_format"] = cell.number_format
+    return properties
+
+
+def _style(properties: dict) -> Style:
+    return tuple(sorted(properties.items()))
+
+
+@dataclass(frozen=True)
+class TemplateCell:
+    """
+    One non-empty cell of a compiled template.
+
+    Attributes:
+        row: Row number, from 0
+        col: Column number, from 0
+        style: Format properties of the cell
+        value: Text, number or formula of the cell, None for rich text and placeholders
+        runs: (style, text) pairs of a rich text cell
+        field: Name and arguments of a placeholder cell
+    """
+
+    row: int
+    col: int
+    style: Style
+    value: Any = None
+    runs: Optional[Tuple[Tuple[Style, str], ...]] = None
+    field: Optional[Tuple[str, Tuple[str, ...]]] = None
+
+
+@dataclass(frozen=True)
+class DashboardTemplate:
+    """
+    The layout of a dashboard, compiled from a designer's .xlsx template.
+
+    The first sheet of the template is read once: its merged ranges, the
+    values and styles of its cells, and its placeholder cells. Rendering
+    only fills the placeholders and replays the cells through a SheetPlan,
+    so batch runs reuse the compiled layout of `load_template` for every
+    client instead of reading the template again.
+
+    A placeholder cell holds "{name arg arg...}", like "{fvc short 0}", and
+    is filled with the value of `fields[name](*args)`. A field may also
+    return a (value, style name) pair to give the cell a style of STYLES,
+    like a red label for a loss.
+
+    Attributes:
+        title: Name of the template sheet, used as the dashboard sheet name
+        cells: The non-empty cells, merged areas by their first cell
+        merges: (first row, first col, last row, last col) of every merged range
+    """
+
+    title: str
+    cells: Tuple[TemplateCell, ...]
+    merges: Tuple[Tuple[int, int, int, int], ...]
+
+    @classmethod
+    def compile(cls, path: str) -> "DashboardTemplate":
+        """
+        Reads the first sheet of the .xlsx template at `path`.
+
+        Only RGB colors are kept, theme colors of a designer's file are
+        dropped; the column widths and row heights are not read.
+        """
+        workbook = openpyxl.load_workbook(path, rich_text=True)
+        sheet = workbook.worksheets[0]
+
+        merges = tuple(
+            (merged.min_row - 1, merged.min_col - 1, merged.max_row - 1, merged.max_col - 1)
+            for merged in sorted(sheet.merged_cells.ranges, key=lambda merged: (merged.min_row, merged.min_col))
+        )
+        merge_starts = {(first_row, first_col) for first_row, first_col, _, _ in merges}
+
+        cells = []
+        for row in sheet.iter_rows():
+            for cell in row:
+                position = (cell.row - 1, cell.column - 1)
+                if cell.value is None and position not in merge_starts:
+                    continue
+
+                properties = _cell_properties(cell)
+                style = _style(properties)
+                if isinstance(cell.value, CellRichText):
+                    # Every run has a font of its own, on the cell's alignment and fill
+                    layout = {key: value for key, value in properties.items() if key not in _FONT_PROPERTIES}
+                    runs = tuple(
+                        (style, part) if isinstance(part, str)
+                        else (_style({**layout, **_font_properties(part.font)}), part.text)
+                        for part in cell.value
+                    )
+                    cells.append(TemplateCell(*position, style, runs=runs))
+                    continue
+
+                placeholder = PLACEHOLDER.fullmatch(cell.value) if isinstance(cell.value, str) else None
+                if placeholder:
+                    field = (placeholder.group(1), tuple(placeholder.group(2).split()))
+                    cells.append(TemplateCell(*position, style, field=field))
+                else:
+                    cells.append(TemplateCell(*position, style, value=cell.value))
+
+        workbook.close()
+        return cls(sheet.title, tuple(cells), merges)
+
+    def render(self, worksheet: Worksheet, formats: FormatRegistry, fields: Mapping[str, Callable[..., Any]]) -> None:
+        """
+        Writes the template to `worksheet` with its placeholders filled.
+
+        Args:
+            worksheet: The dashboard sheet, empty
+            formats: Format registry of the workbook of `worksheet`
+            fields: Function per placeholder name, called with the placeholder's arguments
+
+        Raises:
+            KeyError: If the template has a placeholder with no field
+            ValueError: If the template has a formula `FormulaEvaluator` cannot compute
+        """
+        plan = SheetPlan()
+        styles = {(cell.row, cell.col): cell.style for cell in self.cells}
+        for first_row, first_col, last_row, last_col in self.merges:
+            style = styles.get((first_row, first_col), ())
+            plan.merge_range(first_row, first_col, last_row, last_col, "", formats.get(dict(style)))
+
+        for cell in self.cells:
+            cell_format = formats.get(dict(cell.style))
+            if cell.runs:
+                parts = []
+                for style, text in cell.runs:
+                    parts += [formats.get(dict(style)), text]
+                plan.write_rich_string(cell.row, cell.col, *parts, cell_format)
+                continue
+
+            value = cell.value
+            if cell.field:
+                name, args = cell.field
+                if name not in fields:
+                    raise KeyError(f"No value for the template placeholder {{{name}}} at row {cell.row + 1}, column {cell.col + 1}")
+                value = fields[name](*args)
+                if isinstance(value, tuple):
+                    value, style_name = value
+                    cell_format = formats[style_name]
+            plan.write(cell.row, cell.col, value, cell_format)
+
+        # Store the value of every formula in the file, for readers that do not recalculate
+        plan.cache_formula_results()
+        plan.render(worksheet)
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled(path: str, modified: float) -> DashboardTemplate:
+    return DashboardTemplate.compile(path)
+
+
+def load_template(path: str = DASHBOARD_TEMPLATE) -> DashboardTemplate:
+    """
+    Returns the compiled template at `path`, compiling it on first use.
+
+    Compiled templates are kept for the life of the process, and compiled
+    again when the file changes.
+    """
+    path = os.path.abspath(path)
+    return _compiled(path, os.path.getmtime(path))
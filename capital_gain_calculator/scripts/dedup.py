@@ -0,0 +1,175 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns identifying a trade, two rows equal on all of them are the same trade
+DEDUP_KEY_COLUMNS = [
+    "Security Name (Security Code)",
+    "Date of Sale/Transfer",
+    "Quantity",
+    "Sales Consideration - Reported by Source",
+    "Cost of Acquisition",
+]
+
+
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Returns a uint64 hash per row of the values in `columns`.
+
+    Categorical values hash like their plain values, so frames with
+    different category dictionaries hash the same trades alike.
+    """
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+class DuplicateFilter:
+    """
+    Drops rows of a file that were already read from an earlier file.
+
+    Every row is reduced to a 64 bit hash of the key columns. The finished
+    files are kept in dicts keyed by hash: the number of rows per hash, the
+    file it was first read from and the bit set of the files it was read
+    from. A file is merged into them once it is finished, so each row is
+    checked and merged in O(1) and the whole run is O(n).
+    Identical rows within one file are separate trades and are kept; a later
+    file only loses as many copies of a row as an earlier file already had,
+    so a re-download drops entirely while a file with extra trades keeps
+    the extra ones.
+
+    Files are expected one after another, the chunks of a file in a row.
+    Two different trades sharing a 64 bit hash is negligible at AIS sizes.
+    """
+
+    def __init__(self, key_columns: Optional[List[str]] = None):
+        """
+        Args:
+            key_columns: Columns identifying a trade, DEDUP_KEY_COLUMNS by default
+        """
+        self.key_columns = list(key_columns or DEDUP_KEY_COLUMNS)
+        # Rows per hash, the most any finished file had
+        self.seen: Dict[int, int] = {}
+        # Name of the first file each hash was read from
+        self.owner: Dict[int, str] = {}
+        # Files each hash was read from, bit i is the i-th file of `names`
+        self.files: Dict[int, int] = {}
+        # Names of the finished files, in reading order
+        self.names: List[str] = []
+        # Dropped rows per (file, file holding the kept copy)
+        self.dropped: Dict[Tuple[str, str], int] = {}
+        self._source: Optional[str] = None
+        # Rows per hash of the current file
+        self._counts: Dict[int, int] = {}
+
+    def _finish_file(self) -> None:
+        """
+        Merges the row counts of the current file into the finished files.
+        """
+        if self._source is None or not self._counts:
+            return
+
+        name = os.path.basename(self._source)
+        bit = 1 << len(self.names)
+        self.names.append(name)
+        seen, owner, files = self.seen, self.owner, self.files
+        for key, rows in self._counts.items():
+            if rows > seen.get(key, 0):
+                seen[key] = rows
+            owner.setdefault(key, name)
+            files[key] = files.get(key, 0) | bit
+
+    def filter(self, df: pd.DataFrame, source: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Splits rows read from `source` into new rows and duplicates of earlier files.
+
+        Args:
+            df: Cleaned rows, a whole file or one chunk of it
+            source: Path of the file the rows come from
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: The rows to keep, and the dropped
+            rows with a "Duplicate Of" column naming the file of the kept copy
+        """
+        if source != self._source:
+            self._finish_file()
+            self._source = source
+            self._counts = {}
+
+        hashes = row_hashes(df, self.key_columns)
+        # Each distinct hash of the chunk is looked up once
+        unique, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+        keys = unique.tolist()
+
+        # Occurrence number of each row among the rows of its file with the same hash
+        before = np.fromiter((self._counts.get(key, 0) for key in keys), dtype="int64", count=len(keys))
+        occurrence = before[inverse] + pd.Series(inverse).groupby(inverse).cumcount().to_numpy()
+        seen = np.fromiter((self.seen.get(key, 0) for key in keys), dtype="int64", count=len(keys))
+        duplicate = occurrence < seen[inverse]
+
+        for key, rows in zip(keys, counts.tolist()):
+            self._counts[key] = self._counts.get(key, 0) + rows
+
+        if not duplicate.any():
+            return df, df.iloc[:0].assign(**{"Duplicate Of": pd.Series(dtype=object)})
+
+        owners = np.array([self.owner.get(key) for key in keys], dtype=object)
+        dropped = df[duplicate].assign(**{"Duplicate Of": owners[inverse[duplicate]]})
+        name = os.path.basename(source)
+        for owner, rows in dropped["Duplicate Of"].value_counts(sort=False).items():
+            self.dropped[(name, owner)] = self.dropped.get((name, owner), 0) + int(rows)
+
+        return df[~duplicate], dropped
+
+    def merge_sources(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Returns the 'Data From' column of `df` naming every file each row was read from.
+
+        Rows found in several files get the file names joined by ", ", in
+        reading order, all other rows keep their file name.
+
+        Args:
+            df: The kept rows of all the files, with a categorical 'Data From'
+        """
+        self._finish_file()
+        self._source = None
+
+        data_from = df["Data From"]
+        # Hashes read from more than one file, a bit set with more than one bit
+        shared = {key: files for key, files in self.files.items() if files & (files - 1)}
+        if not shared:
+            return data_from
+
+        # Only a few distinct sets of files, label each set once
+        labels = {
+            files: ", ".join(name for i, name in enumerate(self.names) if files >> i & 1)
+            for files in set(shared.values())
+        }
+
+        unique, inverse = np.unique(row_hashes(df, self.key_columns), return_inverse=True)
+        merged = np.array([labels.get(shared.get(key, 0)) for key in unique.tolist()], dtype=object)[inverse]
+        found = pd.notna(merged)
+
+        data_from = data_from.cat.add_categories(pd.Index(list(labels.values())).unique().difference(data_from.cat.categories))
+        data_from[found] = merged[found]
+        return data_from.cat.remove_unused_categories()
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns the number of dropped rows per file and the file holding their kept copy.
+        """
+        return pd.DataFrame(
+            [(name, owner, rows) for (name, owner), rows in self.dropped.items()],
+            columns=["Data From", "Duplicate Of", "Rows"],
+        )
+
+    def print_report(self) -> None:
+        """
+        Prints the dropped duplicates, one line per pair of files.
+        """
+        if not self.dropped:
+            print("No duplicate rows found")
+            return
+        for (name, owner), rows in self.dropped.items():
+            print(f"Dropped {rows} duplicate rows from {name} already in {owner}")
+        print(f"Total duplicate rows dropped: {sum(self.dropped.values())}")
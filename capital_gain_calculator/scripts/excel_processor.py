@@ -1,21 +1,91 @@
-from scripts.csv_processor import CSVProcessor
-import glob, os
+from scripts.csv_processor import CSVProcessor, MONEY_COLUMNS
+from scripts.money import frame_to_rupees, to_rupees
+from scripts.aggregation import CapitalGainTotals, SHORT_TERM, LONG_TERM
+from scripts.tax import get_tax_table
+from scripts.formats import FormatRegistry
+from scripts.dashboard_template import DASHBOARD_TEMPLATE, load_template
+import glob, io, os
 import pandas as pd
 from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterable, List, Optional, Union
 import xlsxwriter
 from xlsxwriter.utility import xl_col_to_name
 
+# Sheet of the capital gain rows, "Capital Gains Data (2)" and on past Excel's row limit
+DATA_SHEET = "Capital Gains Data"
+
 
 @dataclass
 class ExcelProcessor:
+    """
+    Writes the Capital Gain dashboard and data sheets.
+
+    Either `df` (the output of `CSVProcessor.combine_csvs`) or, for very large
+    downloads, `totals` (the output of `CSVProcessor.aggregate_csvs`) is given.
+    The dashboard figures are read from `totals`, which is computed from `df`
+    in a single pass when not given.
+    The data sheet is written from `df`, or from the chunks returned by
+    `data_chunks` as a second streaming pass; it is left out when neither is
+    given.
+
+    `fixed_point` tells that the amounts are exact paise (CSVProcessor with
+    fixed_point=True); they are converted into rupees only when written.
+
+    `constant_memory` turns on xlsxwriter's streaming mode: each row of the
+    data sheet is flushed to a temporary file once the next row is started,
+    so with `data_chunks` the memory used stays flat however many rows are
+    written. Strings are then stored inline instead of in a shared table,
+    which makes the file somewhat bigger.
+
+    The dashboard layout comes from `dashboard_template`, a .xlsx file with
+    placeholders for the figures, see `scripts.dashboard_template`.
+
+    Every formula is written with its value computed in Python as the cached
+    result, so pandas, openpyxl and other readers that do not recalculate see
+    the figures. `verify` re-reads the written file and checks those values,
+    see `scripts.verify`.
+    """
+
+    df: Optional[pd.DataFrame] = None
+    financial_year: str = "2024-25"
+    totals: Optional[CapitalGainTotals] = None
+    data_chunks: Optional[Callable[[], Iterable[pd.DataFrame]]] = None
+    fixed_point: bool = False
+    constant_memory: bool = False
+    dashboard_template: str = DASHBOARD_TEMPLATE
+    verify: bool = False
+
+    # Rows converted into Python values at a time when writing the data sheet
+    DATA_BATCH_ROWS = 10_000
+    # Excel's row limit, the data sheet is split into several sheets past it
+    MAX_SHEET_ROWS = 1_048_576
+
+    def __post_init__(self):
+        # Totals aggregated in fixed point mode carry the flag themselves
+        if self.totals is not None and self.totals.paise:
+            self.fixed_point = True
+
+    def _rupees(self, amount):
+        """
+        Return an amount in rupees for writing, converting paise in fixed point mode.
+        """
+        return to_rupees(amount) if self.fixed_point else amount
 
-    df: pd.DataFrame
+    def _columns(self) -> List[str]:
+        """
+        Return the columns of the data sheet.
+        """
+        if self.df is not None:
+            return list(self.df.columns)
+        return CSVProcessor().columns
 
-    def _create_workbook(self, file_name: str) -> None:
+    def _create_workbook(self, file_name: Union[str, BinaryIO]) -> None:
         """
-        Create an Excel workbook with the given file name.
+        Create an Excel workbook with the given file name, or on a writable binary stream.
         """
-        self.workbook = xlsxwriter.Workbook(file_name)
+        self.workbook = xlsxwriter.Workbook(file_name, {"constant_memory": self.constant_memory})
+        # Every format of the workbook is created once, here
+        self.formats = FormatRegistry(self.workbook)
 
     def _create_worksheet(self, sheet_name: str) -> None:
         """
@@ -23,365 +93,291 @@ class ExcelProcessor:
         """
         self.worksheet = self.workbook.add_worksheet(sheet_name)
 
-    def _add_formats(self) -> dict:
-        """
-        Add multiple formats to the workbook and return them as a dictionary.
-        The formatting is for dark mode excel sheets.
-        """
-        base_format = {"align": "center", "valign": "vcenter", "text_wrap": True}
-        formats = {
-            "super": self.workbook.add_format(
-                {
-                    **base_format,
-                    "font_script": 1,
-                }
-            ),
-            "blank": self.workbook.add_format(
-                {
-                    **base_format,
-                    "font_size": 14,
-                }
-            ),
-            "orange_h": self.workbook.add_format(
-                {**base_format, "bold": True, "bg_color": "#E97132", "font_size": 18}
-            ),
-            "blue_h": self.workbook.add_format(
-                {**base_format, "bg_color": "#4D93D9", "font_size": 16}
-            ),
-            "dblue_h": self.workbook.add_format(
-                {**base_format, "bg_color": "#83CCEB", "font_size": 16}
-            ),
-            "red_h": self.workbook.add_format(
-                {**base_format, "bg_color": "#FF7979", "font_size": 16}
-            ),
-            "green_h": self.workbook.add_format(
-                {**base_format, "bg_color": "#00B050", "font_size": 16}
-            ),
-            "grey_h": self.workbook.add_format(
-                {**base_format, "bold": True, "bg_color": "#DAE9F8", "font_size": 18}
-            ),
-            "black_h": self.workbook.add_format(
-                {**base_format, "bold": True, "font_size": 26}
-            ),
-        }
-        return formats
-
     def _set_cell_dimensions(self, width: float = 34.5, height: float = 48.3) -> None:
         """
         Set the width and height for all columns and rows in the worksheet.
         """
         # Set default column width and row height for the worksheet
         self.worksheet.set_default_row(height)
-        self.worksheet.set_column(0, self.df.shape[1] - 1, width)
+        self.worksheet.set_column(0, len(self._columns()) - 1, width)
+
+    @staticmethod
+    def _column_writer(values: pd.Series) -> str:
+        """
+        Return the name of the worksheet method writing the values of a column.
+
+        Numbers go straight to write_number and complete text columns to
+        write_string, anything else (dates, missing values) to the generic write.
+        """
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            return "write_number"
+        if values.hasnans:
+            return "write"
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.categories
+        if pd.api.types.infer_dtype(values, skipna=False) == "string":
+            return "write_string"
+        return "write"
+
+    def _start_data_sheet(self, shard: int, columns: List[str]):
+        """
+        Create the data sheet of shard number `shard` (from 1) and write its header row.
+        """
+        # Create a new worksheet for the raw DataFrame
+        self._create_worksheet(DATA_SHEET if shard == 1 else f"{DATA_SHEET} ({shard})")
+
+        # Set cell dimensions for the data worksheet, every data row is 30 high
+        self._set_cell_dimensions(width=26, height=30)
+        data_ws = self.worksheet
+
+        # Set header row height
+        data_ws.set_row(0, 55)
+
+        # Write the header with formatting (font size 16)
+        for col_num, col_name in enumerate(columns):
+            data_ws.write(0, col_num, col_name, self.formats["data_header"])
+
+        return data_ws
+
+    def _dashboard_fields(self, totals: CapitalGainTotals) -> dict:
+        """
+        Return the values of the dashboard template placeholders.
+
+        The placeholders name the term as "short" or "long" and the rate
+        period by its index, like "{fvc short 0}"; see
+        Dashboards/Dashboard_template.xlsx.
+        """
+        terms = {"short": SHORT_TERM, "long": LONG_TERM}
+        labels = totals.periods.labels
+        # Tax formulas of the financial year, see config/tax_rates.json
+        tax_table = get_tax_table(self.financial_year)
+
+        def result(term: str):
+            # Profit/Loss of a term, Full Value of Consideration - Cost of Acquisition
+            name = "Short Term" if term == "short" else "Long Term"
+            if totals.term_gain(terms[term]) >= 0:
+                return f"{name} Profit", "green_h"
+            return f"{name} Loss", "red_h"
+
+        return {
+            "fvc": lambda term, period: float(self._rupees(totals.fvc[(terms[term], labels[int(period)])])),
+            "coa": lambda term, period: float(self._rupees(totals.coa[(terms[term], labels[int(period)])])),
+            "tax": lambda term, period, fvc_cell, coa_cell: tax_table.formula(terms[term], int(period), fvc_cell, coa_cell),
+            "result": result,
+        }
+
+    def _write_totals_row(self, data_ws, row: int, label: str, formulas: List[str], values: List[float]) -> None:
+        """
+        Write a row of total formulas, one per column, with `label` in the first column.
+        `values` are the results of the formulas, stored in the file as their cached values.
+        """
+        for col_num, (formula, value) in enumerate(zip(formulas, values)):
+            data_ws.write_formula(row, col_num, formula, self.formats["green_h"], value)
+        # Write the label in the first column of the totals row
+        data_ws.write(row, 0, label, self.formats["grey_h"])
+
+    @staticmethod
+    def _add_column_sums(batch: pd.DataFrame, values: List[list], writers: List[str], sums: List[float]) -> None:
+        """
+        Add the values of a batch of rows to the running SUM of every column.
+
+        The sums are the results of the totals row, added up row by row like
+        Excel does. Text counts as nothing, like in SUM, and dates as their
+        Excel serial number.
+        """
+        for col_num, (writer, column) in enumerate(zip(writers, values)):
+            if writer == "write_string":
+                continue
+            series = batch.iloc[:, col_num]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                # Day number from 1899-12-31, plus Excel's 29 Feb 1900, like xlsxwriter writes dates
+                delta = (series.dropna() - pd.Timestamp(1899, 12, 31)).dt
+                serial = delta.days + (delta.seconds.astype("float64") + delta.microseconds / 1e6) / 86400
+                column = serial.where(serial <= 59, serial + 1).tolist()
+            elif writer != "write_number" or series.hasnans:
+                column = [value for value in column if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value]
+            sums[col_num] = sum(column, sums[col_num])
+
+    def _write_data_sheet(self, frames: Iterable[pd.DataFrame]) -> None:
+        """
+        Write the raw rows of `frames` one after another to the "Capital Gains Data" sheet,
+        followed by a totals row.
+
+        Rows past Excel's row limit go on to "Capital Gains Data (2)", "(3)"...
+        sheets, each with its own header and totals row, and the last one also
+        gets a grand total of all the sheets. The sheets are filled one after
+        another, in constant_memory mode a full sheet is already on disk.
+        """
+        columns = self._columns()
+        # Header, totals and grand total rows take three rows of every sheet
+        rows_per_sheet = self.MAX_SHEET_ROWS - 3
+
+        shard = 1
+        data_ws = self._start_data_sheet(shard, columns)
+        # Sheet name, totals row and column sums of every full sheet
+        shard_totals = []
+        sums = [0.0] * len(columns)
+
+        # Font size 11 for the first column, the rest like the dashboard cells
+        cell_formats = [self.formats["data_first"]] + [self.formats["blank"]] * (len(columns) - 1)
+
+        # Write the data rows, in row order as constant_memory mode needs
+        row_num = 0
+        for frame in frames:
+            if self.fixed_point:
+                frame = frame_to_rupees(frame, MONEY_COLUMNS)
+
+            # Pick the writer of each column once instead of checking every value
+            writers = [self._column_writer(frame[col]) for col in frame.columns]
+            cells = [(col_num, getattr(data_ws, writer), fmt) for col_num, (writer, fmt) in enumerate(zip(writers, cell_formats))]
+
+            for start in range(0, len(frame), self.DATA_BATCH_ROWS):
+                batch = frame.iloc[start:start + self.DATA_BATCH_ROWS]
+                while len(batch):
+                    if row_num == rows_per_sheet:
+                        # This sheet is full, close it with its totals and go on to the next one
+                        self._write_totals_row(data_ws, row_num + 1, "Total", self._sum_formulas(columns, row_num), sums)
+                        shard_totals.append((self.worksheet.name, row_num + 1, sums))
+
+                        shard += 1
+                        data_ws = self._start_data_sheet(shard, columns)
+                        cells = [(col_num, getattr(data_ws, writer), fmt) for col_num, (writer, fmt) in enumerate(zip(writers, cell_formats))]
+                        row_num = 0
+                        sums = [0.0] * len(columns)
+
+                    # The rows of the batch that fit on this sheet
+                    piece, batch = batch.iloc[:rows_per_sheet - row_num], batch.iloc[rows_per_sheet - row_num:]
+                    values = [piece[col].tolist() for col in piece.columns]
+                    self._add_column_sums(piece, values, writers, sums)
+                    for row in zip(*values):
+                        row_num += 1
+                        for (col_num, write, fmt), value in zip(cells, row):
+                            write(row_num, col_num, value, fmt)
+
+        # Write totals for numeric columns at the end
+        total_row = row_num + 1
+        self._write_totals_row(data_ws, total_row, "Total", self._sum_formulas(columns, row_num), sums)
+
+        if shard_totals:
+            # Grand total over the totals rows of all the sheets
+            shard_totals.append((self.worksheet.name, total_row, sums))
+            formulas = [
+                "=SUM(" + ",".join(f"'{name}'!{xl_col_to_name(col_num)}{row + 1}" for name, row, _ in shard_totals) + ")"
+                for col_num in range(len(columns))
+            ]
+            grand_totals = [sum((shard_sums[col_num] for _, _, shard_sums in shard_totals), 0.0) for col_num in range(len(columns))]
+            self._write_totals_row(data_ws, total_row + 1, "Grand Total", formulas, grand_totals)
+
+    @staticmethod
+    def _sum_formulas(columns: List[str], data_rows: int) -> List[str]:
+        """
+        Return the SUM formula of every column over the data rows of a sheet.
+        """
+        return [
+            f"=SUM({xl_col_to_name(col_num)}2:{xl_col_to_name(col_num)}{data_rows + 1})"
+            for col_num in range(len(columns))
+        ]
 
     def Make_Excel(self, file_path: str) -> bool:
         """
         Create an Excel file with the given file name and write the DataFrame to it.
         """
-        print(f"Creating Excel file at {file_path}...")
+        return self.write_excel(file_path)
+
+    def to_bytes(self) -> Optional[bytes]:
+        """
+        Return the Excel file as bytes, without writing it to disk.
+
+        Returns:
+            Optional[bytes]: The .xlsx file, None if it could not be created
+        """
+        output = io.BytesIO()
+        return output.getvalue() if self.write_excel(output) else None
+
+    def _verify(self, output: Union[str, BinaryIO]) -> bool:
+        """
+        Check the cached formula values of the written file, see `scripts.verify.verify_workbook`.
+        """
+        if not isinstance(output, (str, os.PathLike)) and not (output.readable() and output.seekable()):
+            print("Skipping verification, the output stream cannot be read back")
+            return True
+
+        # Imported here, scripts.verify also runs as `python -m scripts.verify`
+        from scripts.verify import verify_workbook
+
+        print("Verifying formula results...")
+        mismatches = verify_workbook(output)
+        if mismatches:
+            print(f"Error verifying Excel file: {len(mismatches)} formula results differ, first {mismatches[0]}")
+            return False
+        print("Formula results verified")
+        return True
+
+    def write_excel(self, output: Union[str, BinaryIO]) -> bool:
+        """
+        Write the dashboard and data sheets to a file path or a binary stream.
+
+        The stream can be a BytesIO, an open file, an HTTP response body or a
+        member of a zip archive opened for writing; xlsxwriter only writes
+        and seeks it, and it is left open. In constant_memory mode the rows
+        are still buffered in temporary files until the workbook is closed.
+
+        Args:
+            output: File path, or a writable binary file-like object
+
+        Returns:
+            bool: True if the workbook was written
+        """
+        target = output if isinstance(output, (str, os.PathLike)) else f"<{type(output).__name__}>"
+        print(f"Creating Excel file at {target}...")
 
         try:
-            self._create_workbook(file_path)
+            self._create_workbook(output)
 
             """ ##################### Capital Gains Dashboard ##################### """
 
-            self._create_worksheet("Capital Gains")
-            # Set cell dimensions for the data worksheet
-            self._set_cell_dimensions()
-
-            formats = self._add_formats()
+            # Layout of the dashboard, compiled once per process from the template
+            template = load_template(self.dashboard_template)
 
-            # Set cell dimensions
+            self._create_worksheet(template.title)
+            # Set cell dimensions for the dashboard
             self._set_cell_dimensions()
 
-            """ ##################### FORMATING CELLS ##################### """
-            # Creating Dashboard similar to Dashboardv2.xlsx in the Dashboards folder
-
-            print("Formatting cells...")
-
-            ws = self.worksheet
-
-            # Border format for the cells
-            # This is used to create a border around the cells
-            # border_format = self.workbook.add_format({'border': 1})
-            # for row in range(12):
-            #     for col in range(6):
-            #         ws.write_blank(row, col, None, border_format)
-
-            # Row and column starts from 0 insted of 1
-
-            # This is the 1st row
-            ws.merge_range(0, 1, 0, 5, "SHORT TERM", formats["orange_h"])
-            # This is the 2nd row
-            ws.write(1, 1, "Full Value of Consideration", formats["blue_h"])
-            ws.write(1, 2, "Cost of Acquisition", formats["dblue_h"])
-            ws.write(1, 3, "Tax", formats["red_h"])
-            ws.merge_range(1, 4, 1, 5, "Short Term Tax", formats["grey_h"])
-
-            # Short Term Before 23rd July 2024
-            # Create a superscript "rd" only, rest normal
-            ws.write_rich_string(
-                2,
-                0,
-                formats["blue_h"],
-                "Before 23",
-                formats["super"],
-                "rd",
-                formats["blue_h"],
-                " July 2024",
-                formats["blue_h"],
-            )
-
-            # Short Term After 23rd July 2024
-            # Create a superscript "rd" only, rest normal
-            ws.write_rich_string(
-                3,
-                0,
-                formats["dblue_h"],
-                "After 23",
-                formats["super"],
-                "rd",
-                formats["dblue_h"],
-                " July 2024",
-                formats["dblue_h"],
-            )
-
-            # Short Term Grand Total
-            ws.write(4, 0, "Grand Total", formats["green_h"])
-
-            # Long Term Section
-            ws.merge_range(5, 1, 5, 5, "LONG TERM", formats["orange_h"])
-            ws.write(6, 1, "Full Value of Consideration", formats["blue_h"])
-            ws.write(6, 2, "Cost of Acquisition", formats["dblue_h"])
-            ws.write(6, 3, "Tax", formats["red_h"])
-            ws.merge_range(6, 4, 6, 5, "Long Term Tax", formats["grey_h"])
-
-            # Long Term Before 23rd July 2024
-            # Create a superscript "rd" only, rest normal
-            ws.write_rich_string(
-                7,
-                0,
-                formats["blue_h"],
-                "Before 23",
-                formats["super"],
-                "rd",
-                formats["blue_h"],
-                " July 2024",
-                formats["blue_h"],
-            )
-
-            # Long Term After 23rd July 2024
-            # Create a superscript "rd" only, rest normal
-            ws.write_rich_string(
-                8,
-                0,
-                formats["dblue_h"],
-                "After 23",
-                formats["super"],
-                "rd",
-                formats["dblue_h"],
-                " July 2024",
-                formats["dblue_h"],
-            )
-
-            # Long Term Grand Total
-            ws.write(9, 0, "Grand Total", formats["green_h"])
-
             print("Calculating values...")
 
             """ ##################### CALCULATING VALUES ##################### """
-            before_23 = self.df[
-                self.df["Date of Sale/Transfer"] < pd.to_datetime("2024-07-23")
-            ]
-            after_23 = self.df[
-                self.df["Date of Sale/Transfer"] >= pd.to_datetime("2024-07-23")
-            ]
-
-            # Filter for "Short term" asset type before and after 23rd July 2024
-            short_before_23 = before_23[before_23["Asset Type"] == "Short term"]
-            short_after_23 = after_23[after_23["Asset Type"] == "Short term"]
-
-            # Filter for "Long term" asset type before and after 23rd July 2024
-            long_before_23 = before_23.drop(short_before_23.index)
-            long_after_23 = after_23.drop(short_after_23.index)
-
-            fvc_sort_Before_23 = short_before_23[
-                "Sales Consideration - Reported by Source"
-            ].sum()
-            fvc_sort_After_23 = short_after_23[
-                "Sales Consideration - Reported by Source"
-            ].sum()
-            fvc_long_Before_23 = long_before_23[
-                "Sales Consideration - Reported by Source"
-            ].sum()
-            fvc_long_After_23 = long_after_23[
-                "Sales Consideration - Reported by Source"
-            ].sum()
-            fvc_long_After_23 = long_after_23[
-                "Sales Consideration - Reported by Source"
-            ].sum()
-
-            coa_short_Before_23 = short_before_23["Cost of Acquisition"].sum()
-            coa_short_After_23 = short_after_23["Cost of Acquisition"].sum()
-            coa_long_Before_23 = long_before_23["Cost of Acquisition"].sum()
-            coa_long_After_23 = long_after_23["Cost of Acquisition"].sum()
-
-            # Profit/Loss calculations in short and long term
-            # Short term profit/loss is calculated as Full Value of Consideration - Cost of Acquisition
-            pnl_short = (fvc_sort_Before_23 + fvc_sort_After_23) - (
-                coa_short_Before_23 + coa_short_After_23
-            )
-            pnl_long = (fvc_long_Before_23 + fvc_long_After_23) - (
-                coa_long_Before_23 + coa_long_After_23
-            )
+            totals = self.totals
+            if totals is None:
+                # Every (term, period) figure in one pass over the frame
+                totals = CapitalGainTotals.from_frame(
+                    self.df, self.financial_year, paise=self.fixed_point
+                )
 
             print("Inserting data into the worksheet...")
 
             """ ##################### INSERTING DATA INTO THE WORKSHEET ##################### """
-
-            """ ##################### SHORT TERM VALUES ##################### """
-            # Short Term Before 23rd July 2024 Values
-            ws.write_number(2, 1, fvc_sort_Before_23, formats["blank"])
-            ws.write_number(2, 2, coa_short_Before_23, formats["blank"])
-            ws.write_formula(
-                2, 3, "=IF(B3-C3>=0,ROUND((B3-C3)*15%,0),0)", formats["blank"]
-            )
-
-            # Short Term After 23rd July 2024 Values
-            ws.write_number(3, 1, fvc_sort_After_23, formats["blank"])
-            ws.write_number(3, 2, coa_short_After_23, formats["blank"])
-            ws.write_formula(
-                3, 3, "=IF(B4-C4>=0,ROUND((B4-C4)*20%,0),0)", formats["blank"]
-            )
-
-            # Short Term Grand Total Values
-            ws.write_formula(4, 1, "=SUM(B3:B4)", formats["green_h"])
-            ws.write_formula(4, 2, "=SUM(C3:C4)", formats["green_h"])
-            ws.write_formula(4, 3, "=SUM(D3:D4)", formats["green_h"])
-
-            # Short Term Tax
-            ws.merge_range(2, 4, 4, 5, "=D5", formats["black_h"])
-
-            """ ##################### LONG TERM VALUES ##################### """
-
-            # long Term Before 23rd July 2024 Values
-            ws.write_number(7, 1, fvc_long_Before_23, formats["blank"])
-            ws.write_number(7, 2, coa_long_Before_23, formats["blank"])
-            ws.write_formula(
-                7,
-                3,
-                "=IF(B8-C8>100000,ROUND(((B8-C8)-100000)*10%,0),0)",
-                formats["blank"],
-            )
-
-            # long Term After 23rd July 2024 Values
-            ws.write_number(8, 1, fvc_long_After_23, formats["blank"])
-            ws.write_number(8, 2, coa_long_After_23, formats["blank"])
-            ws.write_formula(
-                8,
-                3,
-                "=IF(B9-C9>125000,ROUND(((B9-C9)-125000)*12.5%,0),0)",
-                formats["blank"],
-            )
-
-            # long Term Grand Total Values
-            ws.write_formula(9, 1, "=SUM(B8:B9)", formats["green_h"])
-            ws.write_formula(9, 2, "=SUM(C8:C9)", formats["green_h"])
-            ws.write_formula(9, 3, "=SUM(D8:D9)", formats["green_h"])
-
-            # long Term Tax
-            ws.merge_range(7, 4, 9, 5, "=D10", formats["black_h"])
-
-            """ ##################### GRAND TOTAL OF TAX ##################### """
-
-            # Grand Total Tax at bottom
-            ws.merge_range(10, 0, 10, 1, "Total Tax", formats["grey_h"])
-            ws.merge_range(10, 2, 10, 4, "=SUM(E3,E8)", formats["black_h"])
-
-            """ ##################### Short n Long Term Profit/Loss ##################### """
-
-            # Write the Short Term and Long Term Profit/Loss at the bottom
-            if pnl_short >= 0:
-                ws.write(11, 0, "Short Term Profit", formats["green_h"])
-            elif pnl_short < 0:
-                ws.write(11, 0, "Short Term Loss", formats["red_h"])
-
-            if pnl_long >= 0:
-                ws.write(11, 3, "Long Term Profit", formats["green_h"])
-            elif pnl_long < 0:
-                ws.write(11, 3, "Long Term Loss", formats["red_h"])
-
-            # Write the values of Short Term and Long Term Profit/Loss
-            ws.merge_range(11, 1, 11, 2, "=B5-C5", formats["black_h"])
-            ws.merge_range(11, 4, 11, 5, "=B10-C10", formats["black_h"])
+            template.render(self.worksheet, self.formats, self._dashboard_fields(totals))
 
             """ ##################### Capital Gains Data ##################### """
 
-            # Create a new worksheet for the raw DataFrame
-            self._create_worksheet("Capital Gains Data")
+            if self.data_chunks is not None:
+                # Second streaming pass over the CSVs
+                frames = self.data_chunks()
+            elif self.df is not None:
+                frames = [self.df]
+            else:
+                frames = None
 
-            # Set cell dimensions for the data worksheet
-            self._set_cell_dimensions()
-            data_ws = self.worksheet
-            data_formats = self._add_formats()
-
-            # Set header row height and column widths
-            data_ws.set_row(0, 55)
-            data_ws.set_column(0, self.df.shape[1] - 1, 26)
-            # Set data row heights (from row 1 onwards)
-            for row_num in range(1, len(self.df) + 2):  # +2 to include totals row
-                data_ws.set_row(row_num, 30)
-
-                # Write the header with formatting (font size 16)
-                header_format = self.workbook.add_format(
-                    {
-                        **{
-                            "align": "center",
-                            "valign": "vcenter",
-                            "text_wrap": True,
-                            "bold": True,
-                            "bg_color": "#E97132",
-                            "font_size": 16,
-                        }
-                    }
-                )
-                for col_num, col_name in enumerate(self.df.columns):
-                    data_ws.write(0, col_num, col_name, header_format)
-
-            # Write the data rows
-            for row_num, row in enumerate(self.df.itertuples(index=False), start=1):
-                for col_num, value in enumerate(row):
-                    # Set font size 11 for the first cell (first column, first data row)
-                    if col_num == 0:
-                        fmt = self.workbook.add_format(
-                            {
-                                "align": "center",
-                                "valign": "vcenter",
-                                "text_wrap": True,
-                                "font_size": 11,
-                            }
-                        )
-                    else:
-                        fmt = data_formats["blank"]
-                    if isinstance(value, (int, float)):
-                        data_ws.write_number(row_num, col_num, value, fmt)
-                    else:
-                        data_ws.write(row_num, col_num, value, fmt)
-
-            # Write totals for numeric columns at the end
-            total_row = len(self.df) + 1
-            for col_num, col_name in enumerate(self.df.columns):
-                col_letter = xl_col_to_name(col_num)
-                formula = f"=SUM({col_letter}2:{col_letter}{len(self.df)+1})"
-                data_ws.write_formula(
-                    total_row, col_num, formula, data_formats["green_h"]
-                )
-            # Write "Total" label in the first column of the totals row
-            data_ws.write(total_row, 0, "Total", data_formats["grey_h"])
+            if frames is not None:
+                self._write_data_sheet(frames)
 
             # self.worksheet.activate()
             self.workbook.close()
-            print(f"Excel file created successfully at {file_path}")
+            print(f"Excel file created successfully at {target}")
+
+            if self.verify:
+                return self._verify(output)
 
             return True
         except Exception as e:
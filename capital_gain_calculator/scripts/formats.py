@@ -0,0 +1,53 @@
+from typing import Dict
+
+from xlsxwriter.format import Format
+from xlsxwriter.workbook import Workbook
+
+BASE_STYLE = {"align": "center", "valign": "vcenter", "text_wrap": True}
+
+# Named cell styles of the workbook, the formatting is for dark mode excel sheets
+STYLES: Dict[str, dict] = {
+    "super": {**BASE_STYLE, "font_script": 1},
+    "blank": {**BASE_STYLE, "font_size": 14},
+    "orange_h": {**BASE_STYLE, "bold": True, "bg_color": "#E97132", "font_size": 18},
+    "blue_h": {**BASE_STYLE, "bg_color": "#4D93D9", "font_size": 16},
+    "dblue_h": {**BASE_STYLE, "bg_color": "#83CCEB", "font_size": 16},
+    "red_h": {**BASE_STYLE, "bg_color": "#FF7979", "font_size": 16},
+    "green_h": {**BASE_STYLE, "bg_color": "#00B050", "font_size": 16},
+    "grey_h": {**BASE_STYLE, "bold": True, "bg_color": "#DAE9F8", "font_size": 18},
+    "black_h": {**BASE_STYLE, "bold": True, "font_size": 26},
+    # Data sheet header row and first column
+    "data_header": {**BASE_STYLE, "bold": True, "bg_color": "#E97132", "font_size": 16},
+    "data_first": {**BASE_STYLE, "font_size": 11},
+}
+
+
+class FormatRegistry:
+    """
+    Creates each distinct cell format of a workbook once.
+
+    Formats are looked up by their properties, so asking twice for the same
+    set of properties, by name or not, returns the same Format object.
+    """
+
+    def __init__(self, workbook: Workbook):
+        self.workbook = workbook
+        self._formats: Dict[tuple, Format] = {}
+
+    def get(self, properties: dict) -> Format:
+        """
+        Returns the format with `properties`, adding it to the workbook on first use.
+        """
+        key = tuple(sorted(properties.items()))
+        if key not in self._formats:
+            self._formats[key] = self.workbook.add_format(dict(properties))
+        return self._formats[key]
+
+    def __getitem__(self, name: str) -> Format:
+        """
+        Returns the format of a named style of STYLES.
+        """
+        return self.get(STYLES[name])
+
+    def __len__(self) -> int:
+        return len(self._formats)
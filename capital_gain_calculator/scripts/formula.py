@@ -0,0 +1,351 @@
+import math
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from xlsxwriter.utility import xl_cell_to_rowcol
+
+# Excel error values, results and operands of formulas like any other value
+ERRORS = ("#DIV/0!", "#N/A", "#NAME?", "#NULL!", "#NUM!", "#REF!", "#VALUE!")
+
+TOKEN = re.compile(
+    r"""\s*(?:
+    (?P<string>"(?:[^"]|"")*")
+    |(?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?)
+    |(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<function>[A-Za-z_][\w.]*)\s*\(
+    |(?P<bool>TRUE|FALSE)\b
+    |(?P<error>\#DIV/0!|\#N/A|\#NAME\?|\#NULL!|\#NUM!|\#REF!|\#VALUE!)
+    |(?P<op><>|<=|>=|[-+*/^&%=<>(),])
+    )""",
+    re.VERBOSE,
+)
+
+# Returns the values of a range of cells, row by row: (sheet, first row, first col, last row, last col).
+# The sheet is None for references without a sheet name. Blank cells are None.
+RangeLookup = Callable[[Optional[str], int, int, int, int], Iterable[Any]]
+
+
+def _quantize(value: float, digits: int, rounding: str) -> float:
+    """
+    Rounds `value` to `digits` decimals in decimal arithmetic, so 2.675 is a
+    half like in Excel and not the 2.67499... of its float.
+
+    The value is first cut to the 15 significant digits Excel keeps, which
+    also drops the float error of results like 2.675 * 100.
+    """
+    try:
+        rounded = Decimal(f"{value:.15g}").quantize(Decimal(1).scaleb(-digits), rounding=rounding)
+    except InvalidOperation:
+        # Too many digits to round, far past any decimal
+        return value
+    return math.copysign(float(rounded), value)
+
+
+def _round(value: float, digits: int = 0) -> float:
+    """
+    Rounds like Excel's ROUND, halves away from zero.
+    """
+    return _quantize(value, digits, ROUND_HALF_UP)
+
+
+def is_error(value: Any) -> bool:
+    return isinstance(value, str) and value in ERRORS
+
+
+def _number(value: Any):
+    """
+    Returns a value as an operand of arithmetic, blanks are 0 and text is #VALUE!.
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if is_error(value):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return "#VALUE!"
+
+
+def _numbers(values: Iterable[Any]) -> Tuple[List[float], Optional[str]]:
+    """
+    Returns the numbers of a range or argument list like SUM sees them:
+    text, logical values and blanks are skipped, the first error is returned.
+    """
+    numbers = []
+    for value in values:
+        if is_error(value):
+            return numbers, value
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value):
+            numbers.append(float(value))
+    return numbers, None
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    # Excel compares text case insensitively, and any number is below any text.
+    # A blank cell is "" against text and 0 against a number, so A1="" is TRUE for a blank A1
+    if isinstance(left, str) or isinstance(right, str):
+        left, right = ("" if left is None else left), ("" if right is None else right)
+        key = lambda value: (1, value.lower()) if isinstance(value, str) else (0, _number(value))
+        left, right = key(left), key(right)
+    else:
+        left, right = _number(left), _number(right)
+    return {
+        "=": left == right, "<>": left != right, "<": left < right,
+        ">": left > right, "<=": left <= right, ">=": left >= right,
+    }[op]
+
+
+class FormulaEvaluator:
+    """
+    Computes the value of Excel formulas in Python.
+
+    It covers the formulas the dashboards write: numbers, text, cell and
+    range references (with a sheet name too), the arithmetic, comparison
+    and & operators, percentages, and the SUM, IF, ROUND, MIN, MAX, ABS,
+    AND, OR and NOT functions. All arguments are evaluated, like Excel
+    does for these functions, and errors like #DIV/0! are values.
+
+    Cell values come from `lookup`, which resolves formula cells itself,
+    so the evaluator holds no sheet.
+    """
+
+    FUNCTIONS = ("SUM", "IF", "ROUND", "MIN", "MAX", "ABS", "AND", "OR", "NOT")
+
+    def __init__(self, lookup: RangeLookup):
+        self.lookup = lookup
+
+    def evaluate(self, formula: str) -> Any:
+        """
+        Returns the value of `formula`, like "=SUM(B3:B4)".
+
+        Raises:
+            ValueError: If the formula cannot be parsed or uses a function
+                that is not supported
+        """
+        # `lookup` may evaluate the formulas of referenced cells with this evaluator
+        outer = getattr(self, "_tokens", None), getattr(self, "_position", 0)
+        self._tokens = self._tokenize(formula[1:] if formula.startswith("=") else formula)
+        self._position = 0
+        try:
+            value = self._comparison()
+            if self._position != len(self._tokens):
+                raise ValueError(f"Unexpected {self._tokens[self._position][1]!r} in formula {formula}")
+        finally:
+            self._tokens, self._position = outer
+        if isinstance(value, list):
+            # A bare range, like "=A1:A2", shows its first value
+            value = value[0] if value else None
+        return 0.0 if value is None else value
+
+    @staticmethod
+    def _tokenize(formula: str) -> List[Tuple[str, str]]:
+        tokens = []
+        position = 0
+        formula = formula.rstrip()
+        while position < len(formula):
+            match = TOKEN.match(formula, position)
+            if not match:
+                raise ValueError(f"Cannot parse formula at {formula[position:]!r}")
+            tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        if self._position < len(self._tokens) and self._tokens[self._position][0] == "op":
+            return self._tokens[self._position][1]
+        return None
+
+    def _expect(self, op: str) -> None:
+        if self._peek() != op:
+            raise ValueError(f"Expected {op!r} in formula")
+        self._position += 1
+
+    def _binary(self, operand: Callable[[], Any], ops: Tuple[str, ...], apply: Callable[[str, Any, Any], Any]) -> Any:
+        value = operand()
+        while self._peek() in ops:
+            op = self._tokens[self._position][1]
+            self._position += 1
+            right = operand()
+            value = self._scalar(value)
+            right = self._scalar(right)
+            if is_error(value) or is_error(right):
+                value = value if is_error(value) else right
+            else:
+                value = apply(op, value, right)
+        return value
+
+    def _comparison(self) -> Any:
+        return self._binary(self._concatenation, ("=", "<>", "<", ">", "<=", ">="), _compare)
+
+    def _concatenation(self) -> Any:
+        return self._binary(self._additive, ("&",), lambda op, a, b: self._text(a) + self._text(b))
+
+    def _additive(self) -> Any:
+        return self._binary(self._multiplicative, ("+", "-"), self._arithmetic)
+
+    def _multiplicative(self) -> Any:
+        return self._binary(self._power, ("*", "/"), self._arithmetic)
+
+    def _power(self) -> Any:
+        return self._binary(self._unary, ("^",), self._arithmetic)
+
+    def _unary(self) -> Any:
+        if self._peek() in ("-", "+"):
+            op = self._tokens[self._position][1]
+            self._position += 1
+            value = _number(self._scalar(self._unary()))
+            if is_error(value):
+                return value
+            return -value if op == "-" else value
+        return self._percent()
+
+    def _percent(self) -> Any:
+        value = self._primary()
+        while self._peek() == "%":
+            self._position += 1
+            value = _number(self._scalar(value))
+            if not is_error(value):
+                value = value / 100
+        return value
+
+    def _primary(self) -> Any:
+        if self._position >= len(self._tokens):
+            raise ValueError("Unexpected end of formula")
+        kind, text = self._tokens[self._position]
+        self._position += 1
+
+        if kind == "number":
+            return float(text)
+        if kind == "string":
+            return text[1:-1].replace('""', '"')
+        if kind == "bool":
+            return text == "TRUE"
+        if kind == "error":
+            return text
+        if kind == "ref":
+            return self._reference(text)
+        if kind == "function":
+            return self._function(text.upper())
+        if text == "(":
+            value = self._comparison()
+            self._expect(")")
+            return value
+        raise ValueError(f"Unexpected {text!r} in formula")
+
+    def _reference(self, text: str) -> Any:
+        sheet = None
+        if "!" in text:
+            sheet, text = text.rsplit("!", 1)
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        first, _, last = text.replace("$", "").upper().partition(":")
+        first_row, first_col = xl_cell_to_rowcol(first)
+        # A cell is a range of one, SUM skips its text like in any range
+        last_row, last_col = xl_cell_to_rowcol(last) if last else (first_row, first_col)
+        return list(self.lookup(sheet, min(first_row, last_row), min(first_col, last_col), max(first_row, last_row), max(first_col, last_col)))
+
+    def _arguments(self) -> List[Any]:
+        arguments = []
+        if self._peek() == ")":
+            self._position += 1
+            return arguments
+        while True:
+            arguments.append(self._comparison())
+            if self._peek() == ",":
+                self._position += 1
+                continue
+            self._expect(")")
+            return arguments
+
+    def _function(self, name: str) -> Any:
+        arguments = self._arguments()
+        if name not in self.FUNCTIONS:
+            raise ValueError(f"Unsupported function {name} in formula")
+
+        if name in ("SUM", "MIN", "MAX"):
+            values = []
+            for argument in arguments:
+                if isinstance(argument, list):
+                    values.extend(argument)
+                else:
+                    # Typed-in arguments count even as text or logical values
+                    argument = _number(argument)
+                    values.append(argument)
+            numbers, error = _numbers(values)
+            if error:
+                return error
+            if name == "SUM":
+                return sum(numbers, 0.0)
+            return (min if name == "MIN" else max)(numbers) if numbers else 0.0
+
+        arguments = [self._scalar(argument) for argument in arguments]
+        errors = [argument for argument in arguments if is_error(argument)]
+
+        if name == "IF":
+            if len(arguments) not in (2, 3):
+                raise ValueError("IF takes 2 or 3 arguments")
+            if is_error(arguments[0]):
+                return arguments[0]
+            condition = _number(arguments[0])
+            if is_error(condition):
+                return condition
+            if condition:
+                return arguments[1]
+            return arguments[2] if len(arguments) == 3 else False
+
+        if errors:
+            return errors[0]
+        numbers = [_number(argument) for argument in arguments]
+        if any(is_error(number) for number in numbers):
+            return "#VALUE!"
+        if name == "ROUND":
+            return _round(numbers[0], int(numbers[1]) if len(numbers) > 1 else 0)
+        if name == "ABS":
+            return abs(numbers[0])
+        if name == "AND":
+            return all(numbers)
+        if name == "OR":
+            return any(numbers)
+        return not numbers[0]
+
+    @staticmethod
+    def _scalar(value: Any) -> Any:
+        if isinstance(value, list):
+            # A single cell, a larger range used as one value ("=A1:A2+1") is not supported
+            return value[0] if len(value) == 1 else "#VALUE!"
+        return value
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @staticmethod
+    def _arithmetic(op: str, left: Any, right: Any) -> Any:
+        left, right = _number(left), _number(right)
+        if is_error(left) or is_error(right):
+            return left if is_error(left) else right
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            return "#DIV/0!" if right == 0 else left / right
+        if left < 0 and not right.is_integer():
+            return "#NUM!"
+        try:
+            return left ** right
+        except (OverflowError, ZeroDivisionError):
+            return "#NUM!"
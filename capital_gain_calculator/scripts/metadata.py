@@ -0,0 +1,107 @@
+import codecs
+import csv
+import os
+from typing import List, Optional
+
+from scripts.schema import SCHEMAS
+
+# Byte order marks, longest first so UTF-32 is not taken for UTF-16
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+BLOCK_SIZE = 1024 * 1024
+
+
+def detect_encoding(head: bytes) -> str:
+    """
+    Returns the encoding of a file from its first bytes.
+
+    A byte order mark decides, otherwise UTF-8 if the bytes decode as UTF-8,
+    otherwise cp1252 (what Excel on Windows saves CSVs as).
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi byte character cut at the end of the block is still UTF-8
+        if e.start < len(head) - 3:
+            return "cp1252"
+    return "utf-8"
+
+
+def detect_layout(column_names: List[str]) -> Optional[str]:
+    """
+    Returns the name of the AIS schema whose columns are all in `column_names`.
+    """
+    present = set(column_names)
+    for name, schema in SCHEMAS.items():
+        if present.issuperset(schema.columns):
+            return name
+    return None
+
+
+def count_lines(file_path: str) -> int:
+    """
+    Counts the lines of a file by scanning it for newlines in 1 MB blocks.
+    """
+    lines = 0
+    last = b"\n"
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+
+    # The last line has no newline at the end
+    if last != b"\n":
+        lines += 1
+    return lines
+
+
+def scan_csv(file_path: str, skiprows: int = 1) -> dict:
+    """
+    Reads the metadata of an AIS CSV file without parsing its rows.
+
+    Only the title and header lines are decoded, the rows are counted with a
+    newline scan, so this takes milliseconds even for very large files.
+    Quoted values spanning lines are counted as several rows.
+
+    Args:
+        file_path: Path to the CSV file
+        skiprows: Title rows above the header row
+
+    Returns:
+        dict: "rows" (data rows below the header), "columns", "column_names",
+        "layout" (AIS schema name, None if unknown), "encoding" and "file_size"
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(64 * 1024)
+
+    encoding = detect_encoding(head)
+    with open(file_path, "r", encoding=encoding, errors="replace", newline="") as f:
+        reader = csv.reader(f)
+        for _ in range(skiprows):
+            next(reader, None)
+        column_names = [name.strip() for name in next(reader, [])]
+
+    # UTF-16/32 newlines are several bytes wide, fall back to reading the text
+    if encoding in ("utf-16", "utf-32"):
+        with open(file_path, "r", encoding=encoding, newline="") as f:
+            lines = sum(1 for _ in f)
+    else:
+        lines = count_lines(file_path)
+
+    return {
+        "rows": max(lines - skiprows - 1, 0),
+        "columns": len(column_names),
+        "column_names": column_names,
+        "layout": detect_layout(column_names),
+        "encoding": encoding,
+        "file_size": os.path.getsize(file_path),
+    }
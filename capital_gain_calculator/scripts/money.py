@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable
+
+PAISE_PER_RUPEE = 100
+
+
+def to_paise(rupees: pd.Series) -> pd.Series:
+    """
+    Converts rupee amounts into exact integer paise (nullable Int64).
+
+    The AIS amounts have at most two decimals, so rounding the float64 value
+    times 100 gives the exact paise for any amount below 10^13 rupees.
+    Missing amounts stay missing.
+
+    Args:
+        rupees: Amounts in rupees
+
+    Returns:
+        pd.Series: Amounts in paise with the index of `rupees`
+    """
+    values = np.rint(rupees.to_numpy(dtype="float64") * PAISE_PER_RUPEE)
+    return pd.Series(values, index=rupees.index, name=rupees.name).astype("Int64")
+
+
+def to_rupees(paise):
+    """
+    Converts paise (a number or a Series) back into rupees.
+
+    An exact integer divided by 100 is the closest float to the rupee
+    amount, the same value parsing the amount as float64 would give.
+    """
+    if isinstance(paise, pd.Series):
+        return paise.astype("float64") / PAISE_PER_RUPEE
+    return int(paise) / PAISE_PER_RUPEE
+
+
+def frame_to_rupees(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """
+    Returns a copy of `df` with the paise `columns` converted into rupees.
+    """
+    return df.assign(**{col: to_rupees(df[col]) for col in columns if col in df.columns})
@@ -0,0 +1,108 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+# Rate tables per financial year, with the dates the rates changed on
+TAX_RATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "tax_rates.json")
+
+
+def load_rate_tables(path: str = TAX_RATES_PATH) -> dict:
+    """
+    Reads the per financial year rate tables, see config/tax_rates.json.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Dates on which the capital gain tax rates changed, per financial year.
+# A new budget cutoff is added to config/tax_rates.json, the code does not change.
+FY_CUTOFFS: Dict[str, List[str]] = {
+    financial_year: table["cutoffs"] for financial_year, table in load_rate_tables().items()
+}
+
+# Last date to report the trades in the "31 July 2024" column of the data sheet
+ITR_DUE_DATE = "2024-07-31"
+
+
+def _long_date(date: pd.Timestamp) -> str:
+    """
+    Formats a date as "23 July 2024" (strftime's %-d is not portable to Windows).
+    """
+    return f"{date.day} {date.strftime('%B %Y')}"
+
+
+class PeriodBucketer:
+    """
+    Assigns dates to the periods between a sorted list of cutoff dates.
+
+    A date before the first cutoff gets the first label, a date on or after
+    the last cutoff gets the last label. All rows are bucketed in one
+    vectorized `np.searchsorted` call and the result is a categorical, so
+    later comparisons against a label are integer code comparisons.
+    """
+
+    def __init__(self, cutoffs: Sequence[str], labels: Optional[Sequence[str]] = None):
+        """
+        Args:
+            cutoffs: Cutoff dates, any format understood by pd.to_datetime
+            labels: One label per period (len(cutoffs) + 1). Defaults to
+                "Before 23 July 2024", "23 July 2024 to ...", "After 23 July 2024"
+
+        Raises:
+            ValueError: If the number of labels does not match the cutoffs
+        """
+        self.cutoffs = pd.DatetimeIndex(sorted(pd.to_datetime(list(cutoffs))))
+
+        if labels is None:
+            names = [_long_date(cutoff) for cutoff in self.cutoffs]
+            labels = (
+                [f"Before {names[0]}"]
+                + [f"{start} to {end}" for start, end in zip(names, names[1:])]
+                + [f"After {names[-1]}"]
+            )
+        if len(labels) != len(self.cutoffs) + 1:
+            raise ValueError(
+                f"Expected {len(self.cutoffs) + 1} labels for {len(self.cutoffs)} cutoffs, got {len(labels)}"
+            )
+
+        self.labels = list(labels)
+        self._cutoff_values = self.cutoffs.to_numpy(dtype="datetime64[ns]")
+
+    @classmethod
+    def for_financial_year(cls, financial_year: str) -> "PeriodBucketer":
+        """
+        Builds the bucketer for the tax rate cutoffs of a financial year.
+
+        Args:
+            financial_year: Financial year key of FY_CUTOFFS, like "2024-25"
+
+        Raises:
+            KeyError: If no cutoffs are registered for the financial year
+        """
+        if financial_year not in FY_CUTOFFS:
+            raise KeyError(f"No period cutoffs registered for FY {financial_year}")
+        return cls(FY_CUTOFFS[financial_year])
+
+    def assign(self, dates: pd.Series) -> pd.Series:
+        """
+        Returns the period label of every date as a categorical Series.
+
+        Missing dates (NaT) get a missing label, they belong to no period.
+
+        Args:
+            dates: Series of datetime64 values
+
+        Returns:
+            pd.Series: Categorical Series of labels with the index of `dates`
+        """
+        values = dates.to_numpy(dtype="datetime64[ns]")
+        codes = np.searchsorted(self._cutoff_values, values, side="right")
+        codes[np.isnat(values)] = -1
+
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=self.labels),
+            index=dates.index,
+            name=dates.name,
+        )
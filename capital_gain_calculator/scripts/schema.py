@@ -0,0 +1,252 @@
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class AISSchema:
+    """
+    Declares how one AIS CSV layout is read.
+
+    The schema lists the only columns that are parsed, their dtypes, the
+    amount columns that carry thousands separators and the date formats used
+    by the portal. `read_csv` uses it to parse just those columns straight
+    into typed data.
+
+    Attributes:
+        name: Registry key of the layout ("capital_gain", "crypto")
+        version: Bumped whenever the parsing rules change
+        columns: Columns to read, in the order they are returned
+        dtypes: Dtypes for the non-amount columns, None lets pandas infer.
+            Columns of a few values repeated over many rows are "category"
+        amount_columns: Columns holding rupee amounts like "1,23,456.78"
+        date_formats: Accepted strptime formats per date column, most common first
+        thousands: Thousands separator used in the amount columns
+        skiprows: Title rows above the header row
+    """
+
+    name: str
+    version: int
+    columns: Tuple[str, ...]
+    dtypes: Dict[str, Optional[Union[type, str]]] = field(default_factory=dict)
+    amount_columns: Tuple[str, ...] = ()
+    date_formats: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    thousands: str = ","
+    skiprows: int = 1
+
+    def read_csv(self, file_path: str, engine: str = "c") -> pd.DataFrame:
+        """
+        Reads only the declared columns of an AIS CSV file.
+
+        Amount columns are returned as float64 and the other columns with
+        their declared dtypes. Date columns are left as strings, the
+        processors convert them. The "pyarrow" engine is used when pyarrow
+        is installed, otherwise the C engine is used.
+
+        Args:
+            file_path: Path to the CSV file
+            engine: "c" or "pyarrow"
+
+        Returns:
+            pd.DataFrame: DataFrame with the declared columns in declared order
+
+        Raises:
+            ValueError: If a declared column is missing from the file
+        """
+        if engine == "pyarrow" and not has_pyarrow():
+            engine = "c"
+
+        dtypes = {col: dtype for col, dtype in self.dtypes.items() if dtype is not None}
+
+        if engine == "c":
+            try:
+                df = pd.read_csv(
+                    file_path,
+                    skiprows=self.skiprows,
+                    usecols=list(self.columns),
+                    dtype={**dtypes, **{col: "float64" for col in self.amount_columns}},
+                    thousands=self.thousands,
+                    engine="c",
+                )
+                return df[list(self.columns)]
+            except ValueError:
+                # Some amount cell is not a number, take the tolerant path below
+                pass
+
+        if engine == "pyarrow":
+            df = self._read_pyarrow(file_path)
+        else:
+            df = pd.read_csv(
+                file_path,
+                skiprows=self.skiprows,
+                usecols=list(self.columns),
+                dtype={**dtypes, **{col: str for col in self.amount_columns}},
+                engine="c",
+            )
+
+        # Amounts that could not be read as numbers come in as strings, the
+        # separators are removed with a plain (non regex) replace
+        for col in self.amount_columns:
+            df[col] = pd.to_numeric(
+                df[col].str.replace(self.thousands, "", regex=False), errors="coerce"
+            )
+        return df[list(self.columns)]
+
+    def iter_csv(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Reads the declared columns of an AIS CSV file in chunks of `chunksize` rows.
+
+        The chunks have the same columns and dtypes as `read_csv`, only one
+        chunk is held in memory at a time.
+
+        Args:
+            file_path: Path to the CSV file
+            chunksize: Number of rows per chunk
+
+        Yields:
+            pd.DataFrame: The next chunk of the file
+        """
+        dtypes = {col: dtype for col, dtype in self.dtypes.items() if dtype is not None}
+
+        # The amounts are inferred per chunk, a chunk with a non-numeric
+        # amount comes in as strings and is converted like read_csv does
+        with pd.read_csv(
+            file_path,
+            skiprows=self.skiprows,
+            usecols=list(self.columns),
+            dtype=dtypes,
+            thousands=self.thousands,
+            chunksize=chunksize,
+        ) as reader:
+            for chunk in reader:
+                for col in self.amount_columns:
+                    if not pd.api.types.is_numeric_dtype(chunk[col]):
+                        chunk[col] = pd.to_numeric(
+                            chunk[col].astype(str).str.replace(self.thousands, "", regex=False),
+                            errors="coerce",
+                        )
+                    chunk[col] = chunk[col].astype("float64")
+                yield chunk[list(self.columns)]
+
+    def _read_pyarrow(self, file_path: str) -> pd.DataFrame:
+        """
+        Reads the declared columns with pyarrow's multithreaded CSV reader.
+
+        pyarrow has no thousands option, so the amount and text columns are
+        read as strings and only the inferred columns are typed by pyarrow.
+        """
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        string_columns = [
+            col for col, dtype in self.dtypes.items() if dtype in (str, "category")
+        ] + list(self.amount_columns)
+        table = pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(skip_rows=self.skiprows),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=list(self.columns),
+                column_types={col: pa.string() for col in string_columns},
+            ),
+        )
+        df = table.to_pandas()
+        for col, dtype in self.dtypes.items():
+            if dtype == "category":
+                df[col] = df[col].astype("category")
+        return df
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenates per file frames, keeping their categorical columns categorical.
+
+    pd.concat falls back to object dtype when the frames have different
+    categories, so the categories of every categorical column are first
+    unioned into one dictionary shared by all the frames.
+
+    Args:
+        frames: Frames with the same columns
+
+    Returns:
+        pd.DataFrame: The rows of all frames with a fresh index
+    """
+    frames = list(frames)
+    categorical = [
+        col for col in frames[0].columns
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype)
+    ]
+    for col in categorical:
+        categories = pd.api.types.union_categoricals(
+            [frame[col] for frame in frames], ignore_order=True
+        ).categories
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def has_pyarrow() -> bool:
+    """
+    Returns True if pyarrow is installed and can be used as CSV engine.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+SCHEMAS: Dict[str, AISSchema] = {
+    "capital_gain": AISSchema(
+        name="capital_gain",
+        version=2,
+        columns=(
+            "Security Name (Security Code)",
+            "Date of Sale/Transfer",
+            "Asset Type",
+            "Quantity",
+            "Sales Consideration - Reported by Source",
+            "Cost of Acquisition",
+            "Status",
+        ),
+        dtypes={
+            "Security Name (Security Code)": "category",
+            "Date of Sale/Transfer": str,
+            "Asset Type": "category",
+            "Quantity": None,
+            "Status": "category",
+        },
+        amount_columns=(
+            "Sales Consideration - Reported by Source",
+            "Cost of Acquisition",
+        ),
+        date_formats={"Date of Sale/Transfer": ("%d-%b-%Y",)},
+    ),
+    "crypto": AISSchema(
+        name="crypto",
+        version=2,
+        columns=(
+            "Information Source",
+            "Date of Payment/Credit",
+            "Amount Paid/Credited - Reported by Source",
+        ),
+        dtypes={
+            "Information Source": "category",
+            "Date of Payment/Credit": str,
+        },
+        amount_columns=("Amount Paid/Credited - Reported by Source",),
+        date_formats={"Date of Payment/Credit": ("%d-%b-%Y", "%d-%b-%y")},
+    ),
+}
+
+
+def get_schema(name: str) -> AISSchema:
+    """
+    Returns the registered AIS schema with the given name.
+
+    Raises:
+        KeyError: If no schema is registered under `name`
+    """
+    if name not in SCHEMAS:
+        raise KeyError(f"AIS schema '{name}' not found, known: {', '.join(SCHEMAS)}")
+    return SCHEMAS[name]
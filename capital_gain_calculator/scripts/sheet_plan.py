@@ -0,0 +1,116 @@
+from typing import Dict, List, Tuple
+
+from xlsxwriter.utility import xl_rowcol_to_cell
+from xlsxwriter.worksheet import Worksheet
+
+from scripts.formula import FormulaEvaluator
+
+
+class SheetPlan:
+    """
+    Collects the cells of a worksheet and writes them in row-major order.
+
+    It takes the same write calls as an xlsxwriter worksheet, in any order.
+    xlsxwriter's constant_memory mode drops cells written above the current
+    row, and merge_range pads every row of a merged area, so a sheet with
+    merges spanning rows cannot be written directly in that mode. `render`
+    registers all the merges first, without touching any row, and then
+    writes every cell, merged areas' padding included, row by row. The
+    result is the same in both modes.
+    """
+
+    def __init__(self):
+        # (row, col) -> (worksheet method name, arguments after row and col)
+        self.cells: Dict[Tuple[int, int], Tuple[str, tuple]] = {}
+        self.merges: List[Tuple[int, int, int, int]] = []
+
+    def write(self, row: int, col: int, *args) -> None:
+        self.cells[(row, col)] = ("write", args)
+
+    def write_number(self, row: int, col: int, *args) -> None:
+        self.cells[(row, col)] = ("write_number", args)
+
+    def write_string(self, row: int, col: int, *args) -> None:
+        self.cells[(row, col)] = ("write_string", args)
+
+    def write_formula(self, row: int, col: int, *args) -> None:
+        self.cells[(row, col)] = ("write_formula", args)
+
+    def write_rich_string(self, row: int, col: int, *args) -> None:
+        self.cells[(row, col)] = ("write_rich_string", args)
+
+    def write_blank(self, row: int, col: int, *args) -> None:
+        self.cells[(row, col)] = ("write_blank", args)
+
+    def merge_range(self, first_row: int, first_col: int, last_row: int, last_col: int, data, cell_format=None) -> None:
+        """
+        Merges a range of cells, `data` goes into the first cell and the
+        others are blanks of the same format, like `Worksheet.merge_range`.
+        """
+        self.merges.append((first_row, first_col, last_row, last_col))
+        self.write(first_row, first_col, data, cell_format)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                if (row, col) != (first_row, first_col):
+                    self.write_blank(row, col, None, cell_format)
+
+    def _is_formula(self, position: Tuple[int, int]) -> bool:
+        method, args = self.cells[position]
+        return method in ("write", "write_formula") and isinstance(args[0], str) and args[0].startswith("=")
+
+    def cache_formula_results(self) -> None:
+        """
+        Computes the value of every formula of the plan and stores it as the
+        formula's cached result.
+
+        xlsxwriter writes formulas with a cached result of 0, which readers
+        other than Excel (pandas, openpyxl) report as the value. Formulas may
+        refer to each other but only to cells of this plan, see
+        `scripts.formula.FormulaEvaluator` for the formulas supported.
+
+        Raises:
+            ValueError: For a formula that is not supported, refers to another
+                sheet or refers to itself
+        """
+        results: Dict[Tuple[int, int], object] = {}
+        pending = set()
+
+        def value(position: Tuple[int, int]):
+            if position not in self.cells:
+                return None
+            method, args = self.cells[position]
+            if self._is_formula(position):
+                if position not in results:
+                    if position in pending:
+                        raise ValueError(f"Circular reference in {xl_rowcol_to_cell(*position)}")
+                    pending.add(position)
+                    results[position] = evaluator.evaluate(args[0])
+                    pending.discard(position)
+                return results[position]
+            if method == "write_rich_string":
+                return "".join(arg for arg in args if isinstance(arg, str))
+            if method == "write_blank":
+                return None
+            return args[0]
+
+        def lookup(sheet, first_row, first_col, last_row, last_col):
+            if sheet is not None:
+                raise ValueError(f"Formulas referring to sheet {sheet!r} are not supported")
+            return [value((row, col)) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)]
+
+        evaluator = FormulaEvaluator(lookup)
+        for position in [position for position in self.cells if self._is_formula(position)]:
+            formula, *rest = self.cells[position][1]
+            cell_format = rest[0] if rest else None
+            self.cells[position] = ("write_formula", (formula, cell_format, value(position)))
+
+    def render(self, worksheet: Worksheet) -> None:
+        """
+        Writes the collected cells to `worksheet`, top row first.
+        """
+        # An empty, unformatted merge only records the merged area, no cell is written
+        for first_row, first_col, last_row, last_col in self.merges:
+            worksheet.merge_range(first_row, first_col, last_row, last_col, "", None)
+
+        for (row, col), (method, args) in sorted(self.cells.items()):
+            getattr(worksheet, method)(row, col, *args)
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Tuple
+
+from scripts.aggregation import CapitalGainTotals, SHORT_TERM, LONG_TERM, TERMS
+from scripts.money import to_rupees
+from scripts.periods import PeriodBucketer, load_rate_tables
+
+
+def excel_round(values: np.ndarray) -> np.ndarray:
+    """
+    Rounds to whole rupees like Excel's ROUND(x, 0), halves away from zero.
+
+    np.round rounds halves to even, which would differ from the dashboard.
+    """
+    return np.sign(values) * np.floor(np.abs(values) + 0.5)
+
+
+def _percent(rate: float) -> str:
+    """
+    Formats a rate for an Excel formula, 0.125 as "12.5%".
+    """
+    return f"{rate * 100:g}%"
+
+
+def _number(value: float) -> str:
+    """
+    Formats an amount for an Excel formula, without exponents or a trailing ".0".
+    """
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+@dataclass(frozen=True)
+class PeriodRates:
+    """
+    Capital gain tax rates of the trades sold within one rate period.
+
+    Attributes:
+        stcg_rate: Short term capital gain tax rate, 0.15 for 15%
+        ltcg_rate: Long term capital gain tax rate
+        ltcg_exemption: Long term gain in rupees that is not taxed
+    """
+
+    stcg_rate: float
+    ltcg_rate: float
+    ltcg_exemption: float
+
+
+@dataclass(frozen=True)
+class TaxTable:
+    """
+    Versioned capital gain tax rules of one financial year.
+
+    The tables live in config/tax_rates.json, so a new financial year or a
+    rate change is a config edit. `compute` applies the rules to many
+    client summaries at once with array operations, `formula` gives the
+    same rule as the Excel formula written on the dashboard.
+
+    Attributes:
+        financial_year: Like "2024-25"
+        version: Bumped whenever the rates of the year are revised
+        cutoffs: Dates the rates changed on, splitting the year into periods
+        periods: Rates of each period, len(cutoffs) + 1 of them
+    """
+
+    financial_year: str
+    version: int
+    cutoffs: Tuple[str, ...]
+    periods: Tuple[PeriodRates, ...]
+
+    @classmethod
+    def from_dict(cls, financial_year: str, table: dict) -> "TaxTable":
+        """
+        Builds the table of a financial year from its entry in the rate tables file.
+
+        Raises:
+            ValueError: If the number of periods does not match the cutoffs
+        """
+        periods = tuple(PeriodRates(**period) for period in table["periods"])
+        if len(periods) != len(table["cutoffs"]) + 1:
+            raise ValueError(
+                f"FY {financial_year}: expected {len(table['cutoffs']) + 1} rate periods, got {len(periods)}"
+            )
+        return cls(financial_year, int(table.get("version", 1)), tuple(table["cutoffs"]), periods)
+
+    def bucketer(self) -> PeriodBucketer:
+        """
+        Returns the bucketer splitting trades into the rate periods.
+        """
+        return PeriodBucketer(self.cutoffs)
+
+    def formula(self, term: str, period: int, fvc_cell: str, coa_cell: str) -> str:
+        """
+        Returns the Excel formula of the tax of one dashboard row.
+
+        Args:
+            term: SHORT_TERM or LONG_TERM
+            period: Index of the rate period
+            fvc_cell: Cell holding the FVC, like "B3"
+            coa_cell: Cell holding the COA, like "C3"
+        """
+        rates = self.periods[period]
+        gain = f"{fvc_cell}-{coa_cell}"
+        if term == SHORT_TERM:
+            return f"=IF({gain}>=0,ROUND(({gain})*{_percent(rates.stcg_rate)},0),0)"
+        exemption = _number(rates.ltcg_exemption)
+        return f"=IF({gain}>{exemption},ROUND((({gain})-{exemption})*{_percent(rates.ltcg_rate)},0),0)"
+
+    def compute(self, gains: pd.DataFrame) -> pd.DataFrame:
+        """
+        Computes the tax of many clients at once.
+
+        Args:
+            gains: One row per client, with the gain in rupees of every
+                (term, period index) column, as built by `gains_frame`
+
+        Returns:
+            pd.DataFrame: Per client the tax of every term and period, like
+            "Short term Tax, Before 23 July 2024", plus "Short Term Tax",
+            "Long Term Tax" and "Total Tax"
+        """
+        labels = self.bucketer().labels
+        short_tax = np.zeros(len(gains))
+        long_tax = np.zeros(len(gains))
+        result = pd.DataFrame(index=gains.index)
+        for period, (rates, label) in enumerate(zip(self.periods, labels)):
+            short = gains[(SHORT_TERM, period)].to_numpy(dtype="float64")
+            tax = np.where(short >= 0, excel_round(short * rates.stcg_rate), 0.0)
+            result[f"{SHORT_TERM} Tax, {label}"] = tax
+            short_tax += tax
+
+            taxable = gains[(LONG_TERM, period)].to_numpy(dtype="float64") - rates.ltcg_exemption
+            tax = np.where(taxable > 0, excel_round(taxable * rates.ltcg_rate), 0.0)
+            result[f"{LONG_TERM} Tax, {label}"] = tax
+            long_tax += tax
+
+        result["Short Term Tax"] = short_tax
+        result["Long Term Tax"] = long_tax
+        result["Total Tax"] = short_tax + long_tax
+        return result
+
+
+def _load_tax_tables() -> Dict[str, TaxTable]:
+    return {
+        financial_year: TaxTable.from_dict(financial_year, table)
+        for financial_year, table in load_rate_tables().items()
+    }
+
+
+TAX_TABLES: Dict[str, TaxTable] = _load_tax_tables()
+
+
+def get_tax_table(financial_year: str) -> TaxTable:
+    """
+    Returns the tax table of a financial year.
+
+    Raises:
+        KeyError: If no rates are registered for the financial year
+    """
+    if financial_year not in TAX_TABLES:
+        raise KeyError(f"No tax rates registered for FY {financial_year}")
+    return TAX_TABLES[financial_year]
+
+
+def gains_frame(summaries: Mapping[str, CapitalGainTotals]) -> pd.DataFrame:
+    """
+    Stacks the gains of many clients into one frame, one row per client.
+
+    Args:
+        summaries: Totals per client name, all of the same financial year
+
+    Returns:
+        pd.DataFrame: Gain in rupees per (term, period index) column
+    """
+    rows: List[Dict[Tuple[str, int], float]] = []
+    for totals in summaries.values():
+        rows.append({
+            (term, period): float(to_rupees(totals.gain(term, label)) if totals.paise else totals.gain(term, label))
+            for term in TERMS
+            for period, label in enumerate(totals.periods.labels)
+        })
+    return pd.DataFrame(rows, index=pd.Index(list(summaries.keys()), name="Client"))
+
+
+def rank_by_liability(summaries: Mapping[str, CapitalGainTotals], financial_year: str) -> pd.DataFrame:
+    """
+    Computes the tax of every client and sorts them by total tax, highest first.
+
+    Args:
+        summaries: Totals per client name
+        financial_year: Financial year of the rates to apply
+
+    Returns:
+        pd.DataFrame: The "Short Term Tax", "Long Term Tax" and "Total Tax"
+        of every client
+    """
+    table = get_tax_table(financial_year)
+    taxes = table.compute(gains_frame(summaries))
+    return taxes[["Short Term Tax", "Long Term Tax", "Total Tax"]].sort_values("Total Tax", ascending=False)
@@ -0,0 +1,118 @@
+import argparse
+import math
+import sys
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Union
+
+import openpyxl
+from xlsxwriter.utility import xl_rowcol_to_cell
+
+from scripts.formula import FormulaEvaluator
+
+
+@dataclass
+class Mismatch:
+    """
+    A formula cell whose cached value differs from its value computed in Python.
+    """
+
+    sheet: str
+    cell: str
+    formula: str
+    cached: Any
+    computed: Any
+
+    def __str__(self) -> str:
+        return f"'{self.sheet}'!{self.cell} {self.formula}: cached {self.cached!r}, computed {self.computed!r}"
+
+
+def _matches(cached: Any, computed: Any, tolerance: float) -> bool:
+    if isinstance(computed, bool) or isinstance(cached, bool):
+        return cached == computed
+    if isinstance(computed, (int, float)) and isinstance(cached, (int, float)):
+        return math.isclose(cached, computed, rel_tol=1e-9, abs_tol=tolerance)
+    return cached == computed
+
+
+def verify_workbook(source: Union[str, BinaryIO], tolerance: float = 0.005) -> List[Mismatch]:
+    """
+    Re-reads a workbook and checks the cached value of every formula.
+
+    Each formula is computed in Python from the values stored in the file,
+    the cached values of the cells it refers to included, so every formula
+    is checked on its own. The file is read twice, once for the formulas and
+    once for the values, a sheet at a time in openpyxl's read-only mode.
+
+    Args:
+        source: Path of the .xlsx file, or a readable binary stream of it
+        tolerance: Largest difference in rupees between two equal amounts
+
+    Returns:
+        List[Mismatch]: The formula cells whose cached value is wrong, empty if all match
+
+    Raises:
+        ValueError: If a formula is not supported by `FormulaEvaluator`
+    """
+    formulas_book = openpyxl.load_workbook(source, read_only=True)
+    values_book = openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+    # Values of every sheet, by column and then by row, both from 0
+    sheets: Dict[str, Dict[int, list]] = {}
+    for sheet in values_book.worksheets:
+        columns: Dict[int, list] = {}
+        for row_num, row in enumerate(sheet.iter_rows(values_only=True)):
+            for col_num, value in enumerate(row):
+                if value is not None:
+                    column = columns.setdefault(col_num, [])
+                    column.extend([None] * (row_num - len(column)))
+                    column.append(value)
+        sheets[sheet.title] = columns
+
+    current = {"sheet": None}
+
+    def lookup(sheet_name, first_row, first_col, last_row, last_col):
+        columns = sheets.get(sheet_name or current["sheet"], {})
+        values = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                column = columns.get(col, [])
+                values.append(column[row] if row < len(column) else None)
+        return values
+
+    evaluator = FormulaEvaluator(lookup)
+    mismatches = []
+    for sheet in formulas_book.worksheets:
+        current["sheet"] = sheet.title
+        for row_num, row in enumerate(sheet.iter_rows(values_only=True)):
+            for col_num, formula in enumerate(row):
+                if not (isinstance(formula, str) and formula.startswith("=")):
+                    continue
+                computed = evaluator.evaluate(formula)
+                cached = lookup(None, row_num, col_num, row_num, col_num)[0]
+                if not _matches(cached, computed, tolerance):
+                    mismatches.append(Mismatch(sheet.title, xl_rowcol_to_cell(row_num, col_num), formula, cached, computed))
+
+    formulas_book.close()
+    values_book.close()
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python -m scripts.verify <file.xlsx> [<file.xlsx>...]
+    parser = argparse.ArgumentParser(
+        description="Check that the cached formula values of dashboards match their formulas."
+    )
+    parser.add_argument("files", nargs="+", help="Excel files to check")
+    args = parser.parse_args()
+
+    failed = 0
+    for file in args.files:
+        mismatches = verify_workbook(file)
+        if mismatches:
+            failed += 1
+            print(f"{file}: {len(mismatches)} formula results differ")
+            for mismatch in mismatches[:20]:
+                print(f"  {mismatch}")
+        else:
+            print(f"{file}: OK")
+    sys.exit(1 if failed else 0)
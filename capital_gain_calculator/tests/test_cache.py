@@ -0,0 +1,45 @@
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import write_capital_gain_csv
+from scripts.cache import ParseCache
+from scripts.csv_processor import CSVProcessor
+
+
+@pytest.fixture
+def pickle_cache(tmp_path):
+    # The pickle fallback, used when pyarrow is not installed
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.extension = ".pkl"
+    return cache
+
+
+@pytest.mark.parametrize("content", [b"not a pickle", b"\x80\x05\x95garbage", b""])
+def test_corrupt_entry_is_a_miss_and_removed(pickle_cache, content):
+    pickle_cache.store("entry", pd.DataFrame({"a": [1, 2]}))
+    path = pickle_cache.entries()[0][2]
+    with open(path, "wb") as f:
+        f.write(content)
+
+    assert pickle_cache.load("entry") is None
+    assert not os.path.exists(path)
+
+
+def test_corrupt_entry_is_parsed_again(tmp_path, pickle_cache):
+    csv = write_capital_gain_csv(str(tmp_path / "AIS.csv"), rows=50)
+    processor = CSVProcessor(cache=pickle_cache)
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = len(processor.combine_csvs([csv], output_path=str(tmp_path)))
+    assert rows > 0
+
+    with open(pickle_cache.entries()[0][2], "wb") as f:
+        f.write(b"not a pickle")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert len(processor.combine_csvs([csv], output_path=str(tmp_path))) == rows
+    # Stored again after parsing
+    assert pickle_cache.load(pickle_cache.key(csv, processor.schema)) is not None
@@ -1,13 +1,14 @@
 import flet as ft
 from config import ColorScheme
 from scripts import CSVProcessor, ExcelProcessor  # type: ignore
+from scripts.cache import ParseCache, default_cache_dir  # type: ignore
 import os
 
 
 class MainView:
     def __init__(self, page: ft.Page):
         self.page = page
-        self.csv_processor = CSVProcessor()
+        self.csv_processor = CSVProcessor(cache=ParseCache(default_cache_dir("CGC")), fixed_point=True)
         self.selected_files = []
         self.output_path = ""
 
@@ -30,8 +31,13 @@ class MainView:
         if e.files:
             self.selected_files = [file.path for file in e.files]
             file_names = [os.path.basename(path) for path in self.selected_files]
+            # Header only scan, instant even for very large downloads
+            rows = sum(
+                self.csv_processor.get_csv_info(path).get("rows", 0)
+                for path in self.selected_files
+            )
             self.selected_files_text.value = (
-                f"Selected {len(self.selected_files)} Files: {', '.join(file_names)}"
+                f"Selected {len(self.selected_files)} Files ({rows:,} Rows): {', '.join(file_names)}"
             )
             self.selected_files_text.color = ColorScheme.SUCCESS
         else:
@@ -66,9 +72,9 @@ class MainView:
             self.show_status("Processing Files...", ColorScheme.PRIMARY)
 
             # Combine CSV files into a single DataFrame
-            dataframe = self.csv_processor.combine_csvs(self.selected_files)
+            dataframe = self.csv_processor.combine_csvs(self.selected_files, workers=0)
 
-            create_Excel = ExcelProcessor(df=dataframe).Make_Excel(self.output_path)
+            create_Excel = ExcelProcessor(df=dataframe, fixed_point=True, constant_memory=True).Make_Excel(self.output_path)
 
             if create_Excel:
                 self.show_status(
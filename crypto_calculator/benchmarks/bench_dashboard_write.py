@@ -0,0 +1,128 @@
+"""
+Time of putting the crypto dashboard into a Form-16: replacing its sheet at
+the zip level against the openpyxl load_workbook/save round trip used before.
+
+Building the dashboard sheet costs the same both ways and is timed apart.
+
+Run from the crypto_calculator folder:
+
+    python -m benchmarks.bench_dashboard_write
+"""
+
+import contextlib
+import datetime as dt
+import io
+import os
+import random
+import tempfile
+import time
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Border, PatternFill, Side
+
+from scripts.excel_processor import ExcelProcessor
+from scripts.xlsx_patch import XlsxPatch
+
+
+def write_form_16(file_path: str, padding: int) -> str:
+    """
+    Writes a Form-16 like workbook: a few formula sheets and `padding` rows of
+    styled cells, like the declarations of the real template.
+    """
+    workbook = openpyxl.Workbook()
+    ws = workbook.active
+    ws.title = "FORM-16"
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    fill = PatternFill("solid", fgColor="DDEBF7")
+    for row in range(1, padding + 1):
+        for col in range(1, 9):
+            cell = ws.cell(row=row, column=col, value=f"Declaration {row}" if col == 2 else row * col)
+            cell.border = border
+            if row % 2:
+                cell.fill = fill
+    calculation = workbook.create_sheet("IT Calculation")
+    for row in range(1, 40):
+        calculation.cell(row=row, column=4, value=f"=SUM('FORM-16'!C1:C{row})")
+    calculation["D40"] = "=Crypto!H4"
+    workbook.save(file_path)
+    return file_path
+
+
+def crypto_trades(rows: int) -> pd.DataFrame:
+    rng = random.Random(0)
+    return pd.DataFrame({
+        "Information Source": [f"EXCHANGE {rng.randint(1, 5)} (AAAAA1111A)" for _ in range(rows)],
+        "Date of Payment/Credit": [pd.Timestamp(2024, 4, 1) + dt.timedelta(days=rng.randint(0, 360)) for _ in range(rows)],
+        "Amount Paid/Credited - Reported by Source": [round(rng.uniform(100, 50_000), 2) for _ in range(rows)],
+    })
+
+
+def write_openpyxl(form_16: str, cells: dict, output: str) -> None:
+    """
+    The Form-16 part of the previous write path: load the whole workbook and
+    save every sheet, here with the values of the built dashboard copied in.
+    The formats are left out, so this is a lower bound of the previous time.
+    """
+    workbook = openpyxl.load_workbook(form_16)
+    if "Crypto" in workbook.sheetnames:
+        del workbook["Crypto"]
+    ws = workbook.create_sheet("Crypto", 0)
+    for coordinate, value in cells.items():
+        ws[coordinate] = value
+    workbook.save(output)
+
+
+def write_patch(form_16: str, dashboard: str, output: str) -> None:
+    patch = XlsxPatch(form_16)
+    if "Crypto" in patch.sheetnames:
+        patch.remove_sheet("Crypto")
+    patch.insert_sheets(dashboard, 0)
+    patch.save(output)
+    patch.close()
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """
+    Returns the best wall time of `repeat` runs of `func`, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        trades = crypto_trades(500)
+        output = os.path.join(tmp, "Form-16 filled.xlsx")
+
+        # The dashboard alone, as built by write_dashboard before it goes into the Form-16
+        empty = os.path.join(tmp, "empty.xlsx")
+        workbook = openpyxl.Workbook()
+        workbook.active.title = "Crypto"
+        workbook.save(empty)
+        dashboard = os.path.join(tmp, "dashboard.xlsx")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ExcelProcessor().write_dashboard(empty, trades, dashboard)
+        build = time.perf_counter() - start
+        cells = {
+            cell.coordinate: cell.value
+            for row in openpyxl.load_workbook(dashboard)["Crypto"].iter_rows()
+            for cell in row
+            if cell.value is not None
+        }
+
+        print(f"{len(trades)} crypto rows, dashboard built in {build * 1000:.0f}ms")
+        print(f"{'template rows':>14} {'size':>8} {'openpyxl':>10} {'patch':>10} {'speedup':>8}")
+        for padding in (300, 3_000, 20_000):
+            form_16 = write_form_16(os.path.join(tmp, f"Form-16 {padding}.xlsx"), padding=padding)
+            size = os.path.getsize(form_16) / 1024
+
+            old = best_of(lambda: write_openpyxl(form_16, cells, output))
+            new = best_of(lambda: write_patch(form_16, dashboard, output))
+            print(f"{padding:>14} {size:>6.0f}KB {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms {old / new:>7.1f}x")
@@ -0,0 +1,16 @@
+import sys
+
+from scripts.cache import ParseCache, default_cache_dir
+
+APP_NAME = "CryptoAIS"
+
+
+if __name__ == "__main__":
+    # python -m scripts.clear_cache [--info] [cache_dir]
+    args = [arg for arg in sys.argv[1:] if arg != "--info"]
+    cache = ParseCache(args[0] if args else default_cache_dir(APP_NAME))
+
+    if "--info" in sys.argv[1:]:
+        print(f"{cache.cache_dir}: {len(cache.entries())} files, {cache.size() / 1024 / 1024:.1f} MB")
+    else:
+        print(f"Removed {cache.clear()} cached files from {cache.cache_dir}")
@@ -1,18 +1,106 @@
 import pandas as pd
 import os
-from typing import List
+from typing import List, Optional
 import glob
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from scripts.schema import concat_frames, get_schema
+from scripts.cache import ParseCache
+from scripts.money import to_paise
+from scripts.metadata import scan_csv
+from scripts.dates import DateNormalizer
 
 
 class CSVProcessor:
-    def __init__(self):
-        self.headers = [
-            "Information Source",
-            "Date of Payment/Credit",
-            "Amount Paid/Credited - Reported by Source",
-        ]
-
-    def combine_csvs(self, file_paths: List[str], output_path="./") -> pd.DataFrame:
+    def __init__(
+        self,
+        engine: str = "c",
+        cache: Optional[ParseCache] = None,
+        fixed_point: bool = False,
+    ):
+        """
+        Args:
+            engine: CSV parser used for the AIS files, "c" or "pyarrow".
+                "pyarrow" falls back to "c" when pyarrow is not installed.
+            cache: Cache of cleaned frames, unchanged files are loaded from it
+                instead of being parsed again. None disables caching.
+            fixed_point: Store the amounts as exact Int64 paise instead of
+                float64 rupees, see `scripts.money`
+        """
+        self.schema = get_schema("crypto")
+        self.headers = list(self.schema.columns)
+        self.engine = engine
+        self.cache = cache
+        self.fixed_point = fixed_point
+        self.dates = DateNormalizer(self.schema.date_formats["Date of Payment/Credit"])
+
+    def _read_csv(self, file_path: str) -> pd.DataFrame:
+        """
+        Reads a single AIS crypto CSV file and returns the cleaned DataFrame.
+        Skips the first row and uses the second row as headers.
+
+        This is the per-file unit of work used by `combine_csvs`, both in the
+        serial loop and in the worker processes of the parallel mode.
+
+        Args:
+            file_path: Path to the CSV file to read
+
+        Returns:
+            pd.DataFrame: Cleaned DataFrame of the file
+        """
+        if self.cache is not None:
+            key = self.cache.key(
+                file_path, self.schema, variant="paise" if self.fixed_point else ""
+            )
+            df = self.cache.load(key)
+            if df is not None:
+                return df
+
+        # Read only the schema columns, skip the first row and use the second row as header.
+        # The amounts come back as float64 with the thousands separators already removed
+        df = self.schema.read_csv(file_path, engine=self.engine)
+
+        if self.fixed_point:
+            # Exact paise from here on, converted back to rupees only when written to Excel
+            for col in self.schema.amount_columns:
+                df[col] = to_paise(df[col])
+
+        # Convert the 'Date of Payment/Credit' column to datetime, exchanges mix
+        # "17-Feb-2025" and "17-Feb-25" dates, even within one file
+        df["Date of Payment/Credit"] = self.dates.parse(
+            df["Date of Payment/Credit"], source=os.path.basename(file_path)
+        )
+
+        # Clean up any empty rows
+        df = df.dropna(how="all")
+
+        if self.cache is not None:
+            self.cache.store(key, df)
+
+        return df
+
+    def _read_csvs_parallel(
+        self, file_paths: List[str], workers: int
+    ) -> List[pd.DataFrame]:
+        """
+        Reads the CSV files in a process pool.
+
+        `Executor.map` yields results in the order of `file_paths`, so the
+        frames are merged in the same order as the serial loop.
+
+        Args:
+            file_paths: List of existing CSV file paths
+            workers: Number of worker processes
+
+        Returns:
+            List[pd.DataFrame]: Cleaned DataFrames, one per file, in input order
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._read_csv, file_paths))
+
+    def combine_csvs(
+        self, file_paths: List[str], output_path="./", workers: int = 1
+    ) -> pd.DataFrame:
         """
         Combines multiple CSV files into a single CSV file.
         Skips the first row and uses the second row as headers.
@@ -20,59 +108,49 @@ class CSVProcessor:
         Args:
             file_paths: List of paths to CSV files to combine
             output_path: Path where the combined CSV should be saved
+            workers: Number of processes used to parse the files. 1 parses the
+                files one after another, 0 uses one process per CPU. Falls back
+                to the serial path if the process pool cannot be used.
 
         Returns:
             pd.DataFrame: Combined DataFrame if successful, empty DataFrame otherwise
         """
         try:
-            combined_data = []
+            existing_paths = []
 
             for i, file_path in enumerate(file_paths):
                 if not os.path.exists(file_path):
                     print(f"Warning: File {file_path} does not exist, skipping...")
                     continue
+                existing_paths.append(file_path)
 
-                # Read the CSV file, skip the first row and use the second row as header
-                df = pd.read_csv(file_path, skiprows=1)
-
-                # Set the column names to match the headers from the first file
-                df = df[self.headers]
-
-                # Convert columns to numeric, removing commas and handling errors
+            if workers == 0:
+                workers = os.cpu_count() or 1
+            workers = min(workers, len(existing_paths))
 
-                df["Amount Paid/Credited - Reported by Source"] = pd.to_numeric(
-                    df["Amount Paid/Credited - Reported by Source"].replace(
-                        {r",": ""}, regex=True
-                    ),
-                    errors="coerce",
-                )
-
-                # Convert the 'Date of Payment/Credit' column to datetime if not already
+            combined_data = None
+            if workers > 1:
                 try:
-                    df["Date of Payment/Credit"] = pd.to_datetime(
-                        df["Date of Payment/Credit"],
-                        format="%d-%b-%Y",
-                        dayfirst=True,
-                    )
-                except:
-                    df["Date of Payment/Credit"] = pd.to_datetime(
-                        df["Date of Payment/Credit"],
-                        format="%d-%b-%y",
-                        dayfirst=True,
+                    combined_data = self._read_csvs_parallel(existing_paths, workers)
+                except (OSError, BrokenProcessPool) as e:
+                    print(
+                        f"Parallel ingestion unavailable ({e}), falling back to serial..."
                     )
 
-                # Clean up any empty rows
-                df = df.dropna(how="all")
+            if combined_data is None:
+                combined_data = [
+                    self._read_csv(file_path) for file_path in existing_paths
+                ]
 
-                combined_data.append(df)
+            for file_path, df in zip(existing_paths, combined_data):
                 print(f"Processed {os.path.basename(file_path)}: {len(df)} data rows")
 
             if not combined_data:
                 print("No valid CSV files found to combine")
                 return pd.DataFrame()  # Return an empty DataFrame
 
-            # Combine all dataframes
-            combined_df = pd.concat(combined_data, ignore_index=True)
+            # Combine all dataframes, the categorical columns share one category dictionary
+            combined_df = concat_frames(combined_data)
             # print(combined_df)
 
             # Clean up the combined data
@@ -84,6 +162,9 @@ class CSVProcessor:
             # print(f"Successfully combined {len(file_paths)} files into {output_path}")
             print(f"Total data rows: {len(combined_df)}")
             print(f"Total columns: {len(combined_df.columns)}")
+            print(
+                f"Memory usage: {combined_df.memory_usage(deep=True).sum() / 1024 / 1024:.2f} MB"
+            )
 
             # print(combined_df.head())
 
@@ -96,22 +177,17 @@ class CSVProcessor:
     def get_csv_info(self, file_path: str) -> dict:
         """
         Get basic information about a CSV file, skipping the first row and using the second row as headers.
+        Only the header lines are read, the rows are counted without parsing them.
 
         Args:
             file_path: Path to the CSV file
 
         Returns:
-            dict: Dictionary containing file information
+            dict: Dictionary containing file information, the row count, column names,
+            detected AIS layout ("capital_gain", "crypto" or None), encoding and file size
         """
         try:
-            df = pd.read_csv(file_path, header=None, skiprows=[0], names=self.headers)
-            df = df.dropna(how="all")
-            return {
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": list(df.columns),
-                "file_size": os.path.getsize(file_path),
-            }
+            return scan_csv(file_path, skiprows=self.schema.skiprows)
         except Exception as e:
             return {"error": str(e)}
 
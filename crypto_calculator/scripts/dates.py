@@ -0,0 +1,138 @@
+import re
+import datetime as dt
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+# Regex of the strptime directives used by the AIS portal dates
+DIRECTIVE_PATTERNS = {
+    "%d": r"\d{1,2}",
+    "%m": r"\d{1,2}",
+    "%b": r"[A-Za-z]{3}",
+    "%B": r"[A-Za-z]+",
+    "%Y": r"\d{4}",
+    "%y": r"\d{2}",
+}
+
+
+def format_pattern(date_format: str) -> str:
+    """
+    Converts a strptime format like "%d-%b-%Y" into a regex matching its dates.
+
+    Raises:
+        ValueError: If the format uses a directive without a known pattern
+    """
+    pattern = ""
+    for token in re.split(r"(%.)", date_format):
+        if token.startswith("%"):
+            if token not in DIRECTIVE_PATTERNS:
+                raise ValueError(f"Unsupported date directive {token} in '{date_format}'")
+            pattern += DIRECTIVE_PATTERNS[token]
+        else:
+            pattern += re.escape(token)
+    return pattern
+
+
+class DateNormalizer:
+    """
+    Parses date columns that may use any of a few strptime formats.
+
+    A sample of each file picks its format, so a single format column is
+    parsed once with that format. When a column mixes formats every row is
+    matched against the format regexes and each group of rows is parsed
+    with its own format, so no row is parsed twice. The format detected for
+    a source is remembered and reused the next time the source is read.
+    """
+
+    MIXED = "mixed"
+
+    def __init__(self, formats: Sequence[str], sample_size: int = 200):
+        """
+        Args:
+            formats: Accepted strptime formats, most common first
+            sample_size: Number of values sampled to detect the format
+        """
+        self.formats = list(formats)
+        self.sample_size = sample_size
+        self.patterns = {fmt: format_pattern(fmt) for fmt in self.formats}
+        self.detected: Dict[str, str] = {}
+
+    def _matches(self, value: str, date_format: str) -> bool:
+        try:
+            dt.datetime.strptime(value, date_format)
+        except ValueError:
+            return False
+        return True
+
+    def detect(self, values: pd.Series) -> str:
+        """
+        Returns the format of the sampled values, or MIXED if no single format fits them.
+
+        Args:
+            values: Date strings, missing values are ignored
+        """
+        sample = values.dropna()
+        if len(sample) > self.sample_size:
+            # Spread the sample over the whole file, exports are often sorted by date
+            step = len(sample) // self.sample_size
+            sample = sample.iloc[::step]
+
+        sample = [str(value).strip() for value in sample]
+        for date_format in self.formats:
+            if all(self._matches(value, date_format) for value in sample):
+                return date_format
+        return self.MIXED
+
+    def parse(self, values: pd.Series, source: Optional[str] = None) -> pd.Series:
+        """
+        Parses date strings into datetime64 values.
+
+        Args:
+            values: Date strings, missing values become NaT
+            source: Name of the file the values come from, the detected
+                format is cached under it
+
+        Returns:
+            pd.Series: Parsed dates with the index of `values`
+
+        Raises:
+            ValueError: If a value matches none of the formats
+        """
+        date_format = self.detected.get(source) if source is not None else None
+        if date_format is None:
+            date_format = self.detect(values)
+
+        if date_format != self.MIXED:
+            try:
+                parsed = pd.to_datetime(values, format=date_format)
+            except ValueError:
+                # Rows outside the sample use another format
+                date_format = self.MIXED
+
+        if date_format == self.MIXED:
+            parsed = self._parse_mixed(values)
+
+        if source is not None:
+            self.detected[source] = date_format
+        return parsed
+
+    def _parse_mixed(self, values: pd.Series) -> pd.Series:
+        """
+        Parses every row with the first format whose regex it matches.
+        """
+        text = values.astype("string").str.strip()
+        parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+        remaining = text.notna().to_numpy(dtype=bool, copy=True)
+
+        for date_format in self.formats:
+            mask = remaining & text.str.fullmatch(self.patterns[date_format]).fillna(False).to_numpy(dtype=bool)
+            if mask.any():
+                parsed[mask] = pd.to_datetime(text[mask], format=date_format)
+                remaining &= ~mask
+
+        if remaining.any():
+            unknown: List[str] = text[remaining].head(3).tolist()
+            raise ValueError(
+                f"{remaining.sum()} dates match none of the formats {self.formats}, e.g. {unknown}"
+            )
+        return parsed
@@ -6,62 +6,51 @@ import random as r
 import openpyxl
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 import datetime as dt
+import io
+import re
+from typing import BinaryIO, List, Tuple, Union
+from scripts.money import frame_to_rupees
+from scripts.xlsx_patch import XlsxPatch
 
 
 @dataclass
 class ExcelProcessor:
+    """
+    Writes the crypto dashboard into the Form-16 workbook.
 
-    def _select_workbook(self, file_name: str, sheet_name: str = "Crypto") -> None:
-        """
-        Opens an existing Excel workbook for Form-16 using openpyxl and selects the specified worksheet.
-
-        This method loads the Excel file provided by `file_name` and sets the `self.workbook` attribute
-        to the loaded workbook object. It then selects the worksheet specified by `sheet_name` (defaulting
-        to "FORM-16") and assigns it to the `self.ws` attribute for further processing.
+    `fixed_point` tells that the amounts are exact paise (CSVProcessor with
+    fixed_point=True); they are converted into rupees only when written.
+    """
 
-        Args:
-            file_name (str): The path to the Excel file to open. This should be a valid .xlsx file.
-            sheet_name (str, optional): The name of the worksheet to select from the workbook.
-            Defaults to "FORM-16".
+    fixed_point: bool = False
 
-        Raises:
-            FileNotFoundError: If the specified Excel file does not exist.
-            KeyError: If the specified worksheet name does not exist in the workbook.
-
-        Side Effects:
-            Sets self.workbook to the loaded openpyxl workbook.
-            Sets self.ws to the selected worksheet within the workbook.
-        """
-        self.workbook = openpyxl.load_workbook(file_name)
-        self._select_worksheet(self.workbook, sheet_name)
+    # Excel's row limit, the crypto rows are split into several sheets past it
+    MAX_SHEET_ROWS = 1_048_576
 
-    def _select_worksheet(self, workbook: openpyxl.Workbook, sheet_name: str) -> None:
+    def _select_workbook(self, file_name: Union[str, BinaryIO], sheet_name: str = "Crypto") -> None:
         """
-        Selects a worksheet from an openpyxl workbook by name and assigns it to self.ws.
+        Opens the Form-16 workbook to patch and starts the dashboard sheet in a new workbook.
 
-        This method takes an openpyxl Workbook object and a worksheet name, and sets the
-        self.ws attribute to the corresponding worksheet. It is used internally after loading
-        a workbook to prepare for further processing or data manipulation.
+        Only the dashboard is built with openpyxl; it replaces the sheet of the same
+        name in the Form-16 when saved, see `scripts.xlsx_patch.XlsxPatch`, so the
+        other sheets of the Form-16 are never loaded.
 
         Args:
-            workbook (openpyxl.Workbook): The loaded Excel workbook object.
-            sheet_name (str): The name of the worksheet to select.
+            file_name (str | BinaryIO): The path to the Form-16 workbook, or a readable
+            binary stream of it. This should be a valid .xlsx file.
+            sheet_name (str, optional): The name of the dashboard sheet. Defaults to "Crypto".
 
         Raises:
-            KeyError: If the specified worksheet name does not exist in the workbook.
+            FileNotFoundError: If the specified Excel file does not exist.
 
         Side Effects:
-            Sets self.ws to the selected worksheet within the workbook.
+            Sets self.form_16 to the opened Form-16 workbook.
+            Sets self.workbook to the new openpyxl workbook and self.ws to its dashboard sheet.
         """
-        try:
-            self.ws = workbook[sheet_name]
-            del workbook[sheet_name]
-            self.ws = self.workbook.create_sheet(sheet_name, 0)
-            # raise FileExistsError("The Sheet Was Deleted Successfully !")
-            # Sheet exists, use it
-        except:
-            # Sheet doesn't exist
-            self.ws = self.workbook.create_sheet(sheet_name, 0)
+        self.form_16 = XlsxPatch(file_name)
+        self.workbook = openpyxl.Workbook()
+        self.ws = self.workbook.active
+        self.ws.title = sheet_name
 
     def _apply_style(self, cell, style_key: str) -> None:
         """
@@ -268,18 +257,10 @@ class ExcelProcessor:
             cell.number_format = "General"
         # You can add more types/formats as needed
 
-    def make_dashboard(self, form_16: str, df: pd.DataFrame, sheet_name: str = "Crypto") -> bool:
+    def _write_data_headers(self) -> None:
         """
-        Creates the Dashboard for crypto Calculations
+        Writes the title and column headers of the crypto rows (rows 1 and 2) into self.ws.
         """
-
-        self._select_workbook(form_16, sheet_name)
-
-        self._add_formats()
-
-        self._set_worksheet_dimensions()
-        self._set_default_style()
-
         self.ws.merge_cells("A1:J1")
         crypto_details = self.ws["A1"]
         self.set(crypto_details, "Crypto Details", "black_h")
@@ -303,6 +284,77 @@ class ExcelProcessor:
         cg = self.ws["g2"]
         self.set(cg, "Capital Gain", "blue")
 
+    def _start_shard(self, sheet_name: str, shard: int) -> None:
+        """
+        Creates the extra sheet number `shard` (from 2) for the crypto rows past
+        Excel's row limit, right after the previous one, and selects it as self.ws.
+        """
+        self.ws = self.workbook.create_sheet(f"{sheet_name} ({shard})", shard - 1)
+        self._set_worksheet_dimensions()
+        self._set_default_style()
+        self._write_data_headers()
+
+    @staticmethod
+    def _sum_formula(column: str, sheets: List[Tuple[str, int]]) -> str:
+        """
+        Returns the SUM of a column over the crypto rows of all the sheets.
+
+        Args:
+            column: Column letter, like "G"
+            sheets: Title and last data row of every sheet, the dashboard sheet first
+        """
+        ranges = [f"{column}3:{column}{sheets[0][1]}"]
+        ranges += [f"'{title}'!{column}3:{column}{last_row}" for title, last_row in sheets[1:]]
+        return "=SUM(" + ",".join(ranges) + ")"
+
+    def make_dashboard(self, form_16: str, df: pd.DataFrame, sheet_name: str = "Crypto") -> bool:
+        """
+        Creates the Dashboard for crypto Calculations
+        """
+        return self.write_dashboard(form_16, df, form_16, sheet_name)
+
+    def dashboard_bytes(self, form_16: Union[str, BinaryIO], df: pd.DataFrame, sheet_name: str = "Crypto") -> bytes:
+        """
+        Returns the Form-16 workbook with the crypto dashboard as bytes, `form_16` is left unchanged.
+        """
+        output = io.BytesIO()
+        self.write_dashboard(form_16, df, output, sheet_name)
+        return output.getvalue()
+
+    def write_dashboard(
+        self,
+        form_16: Union[str, BinaryIO],
+        df: pd.DataFrame,
+        output: Union[str, BinaryIO],
+        sheet_name: str = "Crypto",
+    ) -> bool:
+        """
+        Creates the crypto dashboard in a Form-16 workbook read from a path or a stream,
+        and saves the workbook to a path or a stream.
+
+        Streams let the dashboard be served over HTTP or added to an archive
+        without a temporary file. They are left open; when `output` is the
+        same stream as `form_16` it is overwritten from the start.
+
+        Args:
+            form_16: Path of the Form-16 workbook, or a readable, seekable binary stream of it
+            df: Combined crypto trades, the output of `CSVProcessor.combine_csvs`
+            output: Path or writable binary stream the workbook is saved to
+            sheet_name: Name of the dashboard sheet
+
+        Returns:
+            bool: True once the workbook is saved
+        """
+
+        self._select_workbook(form_16, sheet_name)
+
+        self._add_formats()
+
+        self._set_worksheet_dimensions()
+        self._set_default_style()
+
+        self._write_data_headers()
+
         self.ws.merge_cells("H2:J2")
         msg = self.ws["H2"]
         self.set(msg, "Accha Khasa LOSS Hua Hai Bhai Saab", "black")
@@ -336,6 +388,9 @@ class ExcelProcessor:
 
         """################# Evaluationg Crypto Data #################"""
 
+        if self.fixed_point:
+            df = frame_to_rupees(df, ["Amount Paid/Credited - Reported by Source"])
+
         # Rename columns for consistency
         df = df.rename(
             columns={
@@ -349,30 +404,42 @@ class ExcelProcessor:
 
         # Inserting Details
 
+        # Rows 1 and 2 of every sheet are headers
+        rows_per_sheet = self.MAX_SHEET_ROWS - 2
+        main_ws = self.ws
+        # Title and last data row of every sheet
+        sheets: List[Tuple[str, int]] = []
+
         df_values = df.values
         for i, data in enumerate(df_values):
+            shard, offset = divmod(i, rows_per_sheet)
+            row = 3 + offset
+            if offset == 0 and shard > 0:
+                # Sheet full, go on with the next one
+                sheets.append((self.ws.title, 3 + rows_per_sheet - 1))
+                self._start_shard(sheet_name, shard + 1)
 
             print(f"({i}) \t {data[0]} \t {data[1].date()} \t {data[2]}")
             # Inserting Source Detail
-            src_cell_index = "A"+ str(3+i)
-            self.ws.merge_cells(src_cell_index+ ":"+ "B"+ str(3+i))
+            src_cell_index = "A"+ str(row)
+            self.ws.merge_cells(src_cell_index+ ":"+ "B"+ str(row))
             src_cell = self.ws[src_cell_index]
             self.set(src_cell,data[0],"blank")
 
             # Inserting Date of Transfer
-            dot_cell_index = "D" + str(3+i)
+            dot_cell_index = "D" + str(row)
             dot_cell = self.ws[dot_cell_index]
             self.set(dot_cell,data[1],"blank","date")
 
             # Inserting Consideration Received
-            cr_cell_index = "F" + str(3+i)
+            cr_cell_index = "F" + str(row)
             cr_cell = self.ws[cr_cell_index]
             cr_value = data[2]
             self.set(cr_cell,cr_value,"blank")
 
             """################# Generating Crypto Details #################"""
 
-            doa_cell = "C"+ str(3+i)
+            doa_cell = "C"+ str(row)
 
             # Generating Date of Acquisition
             # Generate a random date between 01-04-2024 and data[1]
@@ -399,14 +466,14 @@ class ExcelProcessor:
                 decrement = r.uniform(0, 0.2)
                 coa_value = round(data[2] * (1 - decrement), 2)
 
-            coa_cell_index = "E" + str(3 + i)
+            coa_cell_index = "E" + str(row)
             coa_cell = self.ws[coa_cell_index]
             self.set(coa_cell, int(coa_value), "blank")
 
             # Calculate Capital Gain (cg): consideration_received - cost_of_acquisition
-            cg_cell_index = "G" + str(3 + i)
+            cg_cell_index = "G" + str(row)
             cg_cell = self.ws[cg_cell_index]
-            cg_cell_formula = "=F" + str(3 +i) +"-E"+ str(3+i) + ""
+            cg_cell_formula = "=F" + str(row) +"-E"+ str(row) + ""
 
             if (cr_value- coa_value  <= 0):
                 self.set(cg_cell, cg_cell_formula, "light_red")
@@ -414,23 +481,34 @@ class ExcelProcessor:
                 self.set(cg_cell, cg_cell_formula, "green")
 
         """################# Total Capital Gain #################"""
-        # Calculate the number of data rows
-        num_rows = len(df)
+        # Calculate the number of data rows on the last sheet
+        num_rows = len(df) - len(sheets) * rows_per_sheet
+        sheets.append((self.ws.title, 3 + num_rows - 1))
+        self.ws = main_ws
 
         # Total Capital Gain
-        tcg_formula = "=SUM(G3:G" + str(3 + num_rows -1) + ")"
+        tcg_formula = self._sum_formula("G", sheets)
         self.set(tcg_value, tcg_formula, "dark_red_h")
 
         # Total Cost of Acquisition
-        tcoa_formula = "=SUM(E3:E" + str(3 + num_rows -1) + ")"
+        tcoa_formula = self._sum_formula("E", sheets)
         self.set(tcoa_value, tcoa_formula, "light_red_h")
 
         # Total Consideration Received
-        tcr_formula = "=SUM(F3:F" + str(3 + num_rows -1) + ")"
+        tcr_formula = self._sum_formula("F", sheets)
         self.set(tcr_value, tcr_formula, "green_h")
 
+        dashboard = io.BytesIO()
+        self.workbook.save(dashboard)
         self.workbook.close()
-        self.workbook.save(form_16)
+
+        # Replace the dashboard, and the extra sheets of an earlier run, at the front of the Form-16
+        for name in self.form_16.sheetnames:
+            if name == sheet_name or re.fullmatch(re.escape(sheet_name) + r" \(\d+\)", name):
+                self.form_16.remove_sheet(name)
+        self.form_16.insert_sheets(dashboard, 0)
+        self.form_16.save(output)
+        self.form_16.close()
 
         return True
 
@@ -439,7 +517,7 @@ if __name__ == "__main__":
     # Create an instance of CSVProcessor
     test = ExcelProcessor()
 
-    from csv_processor import CSVProcessor
+    from scripts.csv_processor import CSVProcessor
     import glob
     import os
 
@@ -0,0 +1,488 @@
+import io
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape, unescape
+
+ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+SHEET = re.compile(r"<sheet\b[^>]*>")
+DEFINED_NAME = re.compile(r"<definedName\b[^>]*?(?:/>|>.*?</definedName>)", re.S)
+# Cell of a shared string, its value is the index of the string
+SHARED_STRING_CELL = re.compile(r'(<c\b[^>]*?)\st="s"([^>]*)>\s*<v>(\d+)</v>\s*</c>')
+CELL_STYLE = re.compile(r'(<(?:c|row)\b[^>]*?\ss=")(\d+)"')
+COLUMN_STYLE = re.compile(r'(<col\b[^>]*?\sstyle=")(\d+)"')
+
+# First number format id of the formats defined in a workbook, lower ids are built in
+FIRST_CUSTOM_FORMAT_ID = 164
+
+CALC_CHAIN_TYPE = "/calcChain"
+WORKSHEET_TYPE = "/worksheet"
+WORKSHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+NAME_ENTITIES = {"&quot;": '"', "&apos;": "'"}
+
+
+def _attributes(tag: str) -> Dict[str, str]:
+    return dict(ATTRIBUTE.findall(tag))
+
+
+def _open_tag(element: str) -> str:
+    return element[: element.index(">") + 1]
+
+
+def _set_attribute(tag: str, name: str, value: Optional[str]) -> str:
+    """
+    Returns the start tag `tag` with the attribute set, or removed if `value` is None.
+    """
+    tag = re.sub(rf'\s{name}="[^"]*"', "", tag)
+    if value is None:
+        return tag
+    end = -2 if tag.endswith("/>") else -1
+    return f'{tag[:end]} {name}="{value}"{tag[end:]}'
+
+
+def _elements(xml: str, name: str) -> List[str]:
+    return re.findall(rf"<{name}\b[^>]*?(?:/>|>.*?</{name}>)", xml, re.S)
+
+
+def _find_collection(xml: str, collection: str) -> Optional[Tuple[str, str, int, int]]:
+    """
+    Finds a collection of the styles, like the fonts, and returns its
+    opening tag, its content and its span in `xml`, or None if it is missing.
+
+    An empty collection written as <numFmts count="0"/>, like openpyxl does,
+    gets an opening tag of its own and no content.
+    """
+    match = re.search(rf"<{collection}\b[^>]*?/>|(<{collection}\b[^>]*>)(.*?)</{collection}>", xml, re.S)
+    if not match:
+        return None
+    if match.group(1) is None:
+        return re.sub(r"\s*/>$", ">", match.group(0)), "", match.start(), match.end()
+    return match.group(1), match.group(2), match.start(), match.end()
+
+
+def _resolve(base: str, target: str) -> str:
+    """
+    Returns the zip path of a relationship target, relative to the folder of `base`.
+    """
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), target))
+
+
+def _rels_path(part: str) -> str:
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", f"{name}.rels")
+
+
+class XlsxPatch:
+    """
+    Replaces worksheets of an .xlsx file without loading it as a workbook.
+
+    Sheets are removed, or copied in from another .xlsx file, by editing the
+    workbook parts that list them; every other part of the file (the other
+    sheets, shared strings, drawings, parts openpyxl does not read) is copied
+    as it is. The formats of a copied sheet are added to the ones of the
+    workbook and its text is written as inline strings, so the shared
+    strings are not rewritten. The workbook is marked to be recalculated
+    when Excel opens it, and its calculation chain is dropped for Excel to
+    rebuild.
+    """
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        self.source = source
+        self.zip = zipfile.ZipFile(source)
+        self.names = set(self.zip.namelist())
+        # Parts written instead of the ones of the source, and parts left out
+        self.parts: Dict[str, bytes] = {}
+        self.removed: set = set()
+
+        root_rels = self.read("_rels/.rels")
+        self.workbook_part = next(
+            _resolve("", rel["Target"])
+            for rel in map(_attributes, re.findall(r"<Relationship\b[^>]*>", root_rels))
+            if rel["Type"].endswith("/officeDocument")
+        )
+        self.workbook_rels_part = _rels_path(self.workbook_part)
+        self.rels = {
+            rel["Id"]: rel
+            for rel in map(_attributes, re.findall(r"<Relationship\b[^>]*>", self.read(self.workbook_rels_part)))
+        }
+
+        # Worksheet part of every sheet name, in the order of the workbook
+        self.sheets: Dict[str, str] = {}
+        for tag in SHEET.findall(self.read(self.workbook_part)):
+            name, rel_id = self._sheet_tag(tag)
+            rel = self.rels[rel_id]
+            if rel["Type"].endswith(WORKSHEET_TYPE):
+                self.sheets[name] = _resolve(self.workbook_part, rel["Target"])
+
+        self.changed = False
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self.sheets)
+
+    @property
+    def styles_part(self) -> str:
+        return self._related_part("/styles")
+
+    def _related_part(self, type_: str) -> Optional[str]:
+        return next(
+            (_resolve(self.workbook_part, rel["Target"]) for rel in self.rels.values() if rel["Type"].endswith(type_)),
+            None,
+        )
+
+    @staticmethod
+    def _sheet_tag(tag: str) -> Tuple[str, str]:
+        """
+        Returns the name and relationship id of a <sheet> tag of the workbook.
+        """
+        attributes = _attributes(tag)
+        rel_id = next(value for key, value in attributes.items() if key.endswith(":id"))
+        return unescape(attributes["name"], NAME_ENTITIES), rel_id
+
+    def read(self, part: str) -> str:
+        """
+        Returns the XML of a part, as changed so far.
+        """
+        if part in self.parts:
+            return self.parts[part].decode("utf-8")
+        return self.zip.read(part).decode("utf-8")
+
+    def _write_part(self, part: str, xml: str) -> None:
+        self.parts[part] = xml.encode("utf-8")
+
+    @staticmethod
+    def _shift_sheets(workbook: str, start: int, step: int) -> str:
+        """
+        Moves the sheet positions from `start` on by `step` in the defined
+        names and the workbook view, after sheets are added or removed.
+        The names local to a removed sheet are dropped.
+        """
+        def shift_name(match: "re.Match") -> str:
+            element = match.group(0)
+            tag = _open_tag(element)
+            local = _attributes(tag).get("localSheetId")
+            if local is None or int(local) < start:
+                return element
+            if step < 0 and int(local) < start - step:
+                return ""
+            return _set_attribute(tag, "localSheetId", str(int(local) + step)) + element[len(tag):]
+
+        workbook = DEFINED_NAME.sub(shift_name, workbook)
+
+        view = re.search(r"<workbookView\b[^>]*>", workbook)
+        if view:
+            tag = view.group(0)
+            for attribute in ("activeTab", "firstSheet"):
+                position = _attributes(tag).get(attribute)
+                if position is not None and int(position) >= start:
+                    # A removed sheet that was shown gives way to the next one
+                    tag = _set_attribute(tag, attribute, str(max(start, int(position) + step)))
+            workbook = workbook[: view.start()] + tag + workbook[view.end():]
+        return workbook
+
+    def remove_sheet(self, name: str) -> None:
+        """
+        Removes a worksheet, with the names local to it.
+
+        Raises:
+            KeyError: If the workbook has no worksheet named `name`.
+        """
+        if name not in self.sheets:
+            raise KeyError(f"Worksheet {name} does not exist.")
+
+        workbook = self.read(self.workbook_part)
+        tags = SHEET.findall(workbook)
+        position = next(i for i, tag in enumerate(tags) if self._sheet_tag(tag)[0] == name)
+        rel_id = self._sheet_tag(tags[position])[1]
+        workbook = workbook.replace(tags[position], "", 1)
+        workbook = self._shift_sheets(workbook, position, -1)
+
+        # When the last sheet goes, the view shows the new last one
+        view = re.search(r"<workbookView\b[^>]*>", workbook)
+        if view:
+            tag = view.group(0)
+            for attribute in ("activeTab", "firstSheet"):
+                shown = _attributes(tag).get(attribute)
+                if shown is not None and int(shown) > len(tags) - 2:
+                    tag = _set_attribute(tag, attribute, str(max(len(tags) - 2, 0)))
+            workbook = workbook[: view.start()] + tag + workbook[view.end():]
+        self._write_part(self.workbook_part, workbook)
+
+        rels = re.sub(rf'<Relationship\b[^>]*\bId="{rel_id}"[^>]*/>', "", self.read(self.workbook_rels_part))
+        self._write_part(self.workbook_rels_part, rels)
+        del self.rels[rel_id]
+
+        part = self.sheets.pop(name)
+        content_types = re.sub(rf'<Override\b[^>]*PartName="/{re.escape(part)}"[^>]*/>', "", self.read("[Content_Types].xml"))
+        self._write_part("[Content_Types].xml", content_types)
+        self.removed.update({part, _rels_path(part)})
+        self.parts.pop(part, None)
+        self.changed = True
+
+    def _merge_collection(self, styles: str, collection: str, element: str, items: List[str]) -> Tuple[str, List[int]]:
+        """
+        Adds the `items` missing from a collection of the styles, like the
+        fonts, and returns the styles with the index of every item in it.
+        """
+        found = _find_collection(styles, collection)
+        if not found:
+            raise ValueError(f"The workbook styles have no {collection}")
+        tag, content, start, end = found
+        existing = _elements(content, element)
+        positions = {item: i for i, item in reversed(list(enumerate(existing)))}
+        added = []
+        indexes = []
+        for item in items:
+            if item not in positions:
+                positions[item] = len(existing) + len(added)
+                added.append(item)
+            indexes.append(positions[item])
+        if added:
+            tag = _set_attribute(tag, "count", str(len(existing) + len(added)))
+            styles = styles[:start] + tag + content + "".join(added) + f"</{collection}>" + styles[end:]
+        return styles, indexes
+
+    def _merge_number_formats(self, styles: str, theirs: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Adds the number formats of the styles `theirs` missing from `styles`
+        and returns the styles with the new id of every format of `theirs`.
+        """
+        ours = {
+            attributes["formatCode"]: attributes["numFmtId"]
+            for attributes in map(_attributes, re.findall(r"<numFmt\b[^>]*>", styles))
+        }
+        next_id = max([FIRST_CUSTOM_FORMAT_ID - 1] + [int(id_) for id_ in ours.values()]) + 1
+        ids, added = {}, []
+        for attributes in map(_attributes, re.findall(r"<numFmt\b[^>]*>", theirs)):
+            code = attributes["formatCode"]
+            if code not in ours:
+                ours[code] = str(next_id)
+                added.append(f'<numFmt numFmtId="{next_id}" formatCode="{code}"/>')
+                next_id += 1
+            ids[attributes["numFmtId"]] = ours[code]
+        if not added:
+            return styles, ids
+
+        found = _find_collection(styles, "numFmts")
+        if found:
+            tag, content, start, end = found
+            count = len(re.findall(r"<numFmt\b", content)) + len(added)
+            tag = _set_attribute(tag, "count", str(count))
+            styles = styles[:start] + tag + content + "".join(added) + "</numFmts>" + styles[end:]
+        else:
+            # numFmts is the first element of the styles
+            at = re.search(r"<styleSheet\b[^>]*>", styles).end()
+            styles = styles[:at] + f'<numFmts count="{len(added)}">' + "".join(added) + "</numFmts>" + styles[at:]
+        return styles, ids
+
+    def _merge_styles(self, other: "XlsxPatch") -> List[str]:
+        """
+        Adds the cell formats of the workbook `other` to the ones of this
+        workbook, with their fonts, fills, borders and number formats.
+
+        Returns:
+            List[str]: The index in this workbook of every cell format of `other`
+        """
+        styles = self.read(self.styles_part)
+        theirs = other.read(other.styles_part)
+
+        styles, number_formats = self._merge_number_formats(styles, theirs)
+        ids = {"numFmtId": number_formats}
+        for collection, element, attribute in (("fonts", "font", "fontId"), ("fills", "fill", "fillId"), ("borders", "border", "borderId")):
+            found = _find_collection(theirs, collection)
+            items = _elements(found[1], element) if found else []
+            styles, indexes = self._merge_collection(styles, collection, element, items)
+            ids[attribute] = {str(i): str(index) for i, index in enumerate(indexes)}
+
+        found = _find_collection(theirs, "cellXfs")
+        xfs = []
+        for xf in _elements(found[1], "xf") if found else []:
+            tag = _open_tag(xf)
+            for attribute, new_ids in ids.items():
+                value = _attributes(tag).get(attribute)
+                if value is not None:
+                    tag = _set_attribute(tag, attribute, new_ids.get(value, value))
+            # The named styles of `other` are not copied, its cells get the Normal style
+            xfs.append(_set_attribute(tag, "xfId", "0") + xf[len(_open_tag(xf)):])
+        styles, indexes = self._merge_collection(styles, "cellXfs", "xf", xfs)
+
+        self._write_part(self.styles_part, styles)
+        return [str(index) for index in indexes]
+
+    @staticmethod
+    def _import_sheet(xml: str, styles: List[str], strings: List[str]) -> str:
+        """
+        Returns the XML of a worksheet of another workbook, with its cell
+        formats numbered like this workbook and its text as inline strings.
+        """
+        # Only one sheet of the workbook is selected, the one selected before
+        xml = re.sub(r'\stabSelected="[^"]*"', "", xml)
+        xml = SHARED_STRING_CELL.sub(lambda m: f'{m.group(1)}{m.group(2)} t="inlineStr"><is>{strings[int(m.group(3))]}</is></c>', xml)
+        xml = CELL_STYLE.sub(lambda m: f'{m.group(1)}{styles[int(m.group(2))]}"', xml)
+        return COLUMN_STYLE.sub(lambda m: f'{m.group(1)}{styles[int(m.group(2))]}"', xml)
+
+    def _new_part(self, folder: str) -> str:
+        used = (self.names | set(self.parts)) - self.removed
+        number = 1
+        while posixpath.join(folder, f"sheet{number}.xml") in used:
+            number += 1
+        return posixpath.join(folder, f"sheet{number}.xml")
+
+    def insert_sheets(self, source: Union[str, BinaryIO], index: int = 0) -> None:
+        """
+        Copies all the worksheets of another .xlsx file into this workbook,
+        in their order, the first one at position `index`.
+
+        Args:
+            source: Path or readable, seekable binary stream of the workbook to copy from
+            index: Position of the first copied sheet among the sheets of this workbook
+
+        Raises:
+            ValueError: If a sheet of the same name exists, or a copied sheet
+                has parts of its own (drawings, comments, links).
+        """
+        other = XlsxPatch(source)
+        try:
+            strings_part = other._related_part("/sharedStrings")
+            strings = []
+            if strings_part:
+                strings = [
+                    re.sub(r"^<si\b[^>]*>|</si>$", "", item)
+                    for item in _elements(other.read(strings_part), "si")
+                ]
+            styles = self._merge_styles(other)
+
+            workbook = self.read(self.workbook_part)
+            tags = SHEET.findall(workbook)
+            prefix = re.search(r'xmlns:(\w+)="[^"]*/officeDocument/2006/relationships"', workbook)
+            id_attribute = f"{prefix.group(1) if prefix else 'r'}:id"
+            sheet_ids = [int(_attributes(tag)["sheetId"]) for tag in tags]
+            folder = posixpath.dirname(next(iter(self.sheets.values()), "xl/worksheets/sheet1.xml"))
+            rel_type = next(
+                (rel["Type"] for rel in self.rels.values() if rel["Type"].endswith(WORKSHEET_TYPE)),
+                "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet",
+            )
+
+            rels = self.read(self.workbook_rels_part)
+            content_types = self.read("[Content_Types].xml")
+            for i, (name, part) in enumerate(other.sheets.items()):
+                if name in self.sheets:
+                    raise ValueError(f"Worksheet {name} already exists.")
+                if _rels_path(part) in other.names:
+                    raise ValueError(f"Worksheet {name} has parts of its own, it cannot be copied.")
+
+                new_part = self._new_part(folder)
+                self._write_part(new_part, self._import_sheet(other.read(part), styles, strings))
+
+                number = 1
+                while f"rId{number}" in self.rels:
+                    number += 1
+                rel_id = f"rId{number}"
+                target = posixpath.relpath(new_part, posixpath.dirname(self.workbook_part))
+                self.rels[rel_id] = {"Id": rel_id, "Type": rel_type, "Target": target}
+                rels = rels.replace("</Relationships>", f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{target}"/></Relationships>')
+                content_types = content_types.replace(
+                    "</Types>", f'<Override PartName="/{new_part}" ContentType="{WORKSHEET_CONTENT_TYPE}"/></Types>'
+                )
+
+                sheet_ids.append(max(sheet_ids, default=0) + 1)
+                tag = f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{sheet_ids[-1]}" {id_attribute}="{rel_id}"/>'
+                position = min(index + i, len(tags))
+                at = workbook.index(tags[position]) if position < len(tags) else workbook.index("</sheets>")
+                workbook = self._shift_sheets(workbook[:at] + tag + workbook[at:], position, 1)
+                tags.insert(position, tag)
+
+                order = list(self.sheets.items())
+                order.insert(position, (name, new_part))
+                self.sheets = dict(order)
+                self.removed.discard(new_part)
+
+            self._write_part(self.workbook_part, workbook)
+            self._write_part(self.workbook_rels_part, rels)
+            self._write_part("[Content_Types].xml", content_types)
+            self.changed = True
+        finally:
+            other.close()
+
+    def _recalculate_on_load(self) -> None:
+        """
+        Marks the workbook to be fully recalculated when opened and drops the
+        calculation chain, it may list the cells of removed sheets.
+        """
+        workbook = self.read(self.workbook_part)
+        match = re.search(r"<calcPr\b[^>]*>", workbook)
+        if match:
+            tag = _set_attribute(match.group(0), "fullCalcOnLoad", "1")
+            workbook = workbook[: match.start()] + tag + workbook[match.end():]
+        else:
+            # calcPr follows these elements in the workbook, when present
+            ends = [workbook.rfind(end) + len(end) for end in ("</sheets>", "</functionGroups>", "</externalReferences>", "</definedNames>") if end in workbook]
+            at = max(ends)
+            workbook = workbook[:at] + '<calcPr fullCalcOnLoad="1"/>' + workbook[at:]
+        self._write_part(self.workbook_part, workbook)
+
+        for rel_id, rel in list(self.rels.items()):
+            if rel["Type"].endswith(CALC_CHAIN_TYPE):
+                self.removed.add(_resolve(self.workbook_part, rel["Target"]))
+                rels = re.sub(rf'<Relationship\b[^>]*\bId="{rel_id}"[^>]*/>', "", self.read(self.workbook_rels_part))
+                self._write_part(self.workbook_rels_part, rels)
+                content_types = re.sub(r'<Override\b[^>]*calcChain[^>]*/>', "", self.read("[Content_Types].xml"))
+                self._write_part("[Content_Types].xml", content_types)
+                del self.rels[rel_id]
+
+    def _write(self, output: BinaryIO) -> None:
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as out:
+            for info in self.zip.infolist():
+                if info.filename in self.removed:
+                    continue
+                target = zipfile.ZipInfo(info.filename, info.date_time)
+                target.compress_type = info.compress_type
+                target.external_attr = info.external_attr
+                if info.filename in self.parts:
+                    out.writestr(target, self.parts[info.filename])
+                else:
+                    out.writestr(target, self.zip.read(info))
+            for part, data in self.parts.items():
+                if part not in self.names:
+                    out.writestr(part, data)
+
+    def save(self, output: Union[str, BinaryIO]) -> None:
+        """
+        Writes the changed workbook to a path or a writable binary stream.
+
+        `output` may be the source file or stream: the workbook is then
+        written to a temporary file or buffer first and replaces it.
+        """
+        if self.changed:
+            self._recalculate_on_load()
+            self.changed = False
+        if isinstance(output, str):
+            folder = os.path.dirname(os.path.abspath(output))
+            handle, temp_path = tempfile.mkstemp(suffix=".xlsx", dir=folder)
+            try:
+                with os.fdopen(handle, "wb") as f:
+                    self._write(f)
+                if isinstance(self.source, str) and os.path.abspath(self.source) == os.path.abspath(output):
+                    self.close()
+                os.replace(temp_path, output)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        elif output is self.source:
+            buffer = io.BytesIO()
+            self._write(buffer)
+            output.seek(0)
+            output.truncate()
+            output.write(buffer.getvalue())
+        else:
+            self._write(output)
+
+    def close(self) -> None:
+        self.zip.close()
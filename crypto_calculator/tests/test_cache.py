@@ -0,0 +1,26 @@
+import os
+
+import pandas as pd
+import pytest
+
+from scripts.cache import ParseCache
+
+
+@pytest.fixture
+def pickle_cache(tmp_path):
+    # The pickle fallback, used when pyarrow is not installed
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.extension = ".pkl"
+    return cache
+
+
+@pytest.mark.parametrize("content", [b"not a pickle", b"\x80\x05\x95garbage", b""])
+def test_corrupt_entry_is_a_miss_and_removed(pickle_cache, content):
+    pickle_cache.store("entry", pd.DataFrame({"a": [1, 2]}))
+    path = pickle_cache.entries()[0][2]
+    with open(path, "wb") as f:
+        f.write(content)
+
+    assert pickle_cache.load("entry") is None
+    assert not os.path.exists(path)
+
@@ -0,0 +1,70 @@
+import contextlib
+import datetime as dt
+import io
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+
+from scripts.excel_processor import ExcelProcessor
+from scripts.xlsx_patch import XlsxPatch
+
+
+def _form_16(path) -> str:
+    # Saved by openpyxl, without custom number formats: <numFmts count="0" />
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "FORM-16"
+    workbook["FORM-16"]["A1"] = "Form-16"
+    workbook.save(path)
+    return str(path)
+
+
+def _styles(path) -> str:
+    with zipfile.ZipFile(path) as archive:
+        return archive.read("xl/styles.xml").decode("utf-8")
+
+
+def test_insert_sheets_into_empty_number_formats(tmp_path):
+    form_16 = _form_16(tmp_path / "Form-16.xlsx")
+    assert re.search(r"<numFmts\b[^>]*/>", _styles(form_16))
+
+    source = openpyxl.Workbook()
+    source.active.title = "Crypto"
+    source["Crypto"]["A1"] = 1234.5
+    source["Crypto"]["A1"].number_format = "#,##0.00 ₹"
+    source.save(tmp_path / "source.xlsx")
+
+    output = tmp_path / "output.xlsx"
+    patch = XlsxPatch(form_16)
+    patch.insert_sheets(str(tmp_path / "source.xlsx"), 0)
+    patch.save(str(output))
+    patch.close()
+
+    styles = _styles(output)
+    assert styles.count("<numFmts") == 1
+    assert re.search(r'<numFmts count="1"\s*>', styles)
+    workbook = openpyxl.load_workbook(output)
+    assert workbook.sheetnames == ["Crypto", "FORM-16"]
+    assert workbook["Crypto"]["A1"].number_format == "#,##0.00 ₹"
+
+
+def test_dashboard_in_openpyxl_saved_form_16(tmp_path):
+    form_16 = _form_16(tmp_path / "Form-16.xlsx")
+    trades = pd.DataFrame({
+        "Information Source": ["EXCHANGE 1 (AAAAA1111A)", "EXCHANGE 2 (BBBBB2222B)"],
+        "Date of Payment/Credit": [pd.Timestamp(2024, 5, 1), pd.Timestamp(2024, 5, 1) + dt.timedelta(days=90)],
+        "Amount Paid/Credited - Reported by Source": [1000.5, 2500.25],
+    })
+
+    output = tmp_path / "output.xlsx"
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert ExcelProcessor().write_dashboard(form_16, trades, str(output))
+
+    assert _styles(output).count("<numFmts") == 1
+    workbook = openpyxl.load_workbook(output)
+    assert "Crypto" in workbook.sheetnames
+    # Every cell format of the dashboard resolves to a number format
+    for row in workbook["Crypto"].iter_rows():
+        for cell in row:
+            assert cell.number_format
@@ -1,13 +1,14 @@
 import flet as ft
 from config import ColorScheme
 from scripts import CSVProcessor, ExcelProcessor # type: ignore
+from scripts.cache import ParseCache, default_cache_dir # type: ignore
 import os
 
 class MainView:
     def __init__(self, page: ft.Page):
         self.page = page
-        self.excel_processor = ExcelProcessor()
-        self.csv_processor = CSVProcessor()
+        self.excel_processor = ExcelProcessor(fixed_point=True)
+        self.csv_processor = CSVProcessor(cache=ParseCache(default_cache_dir("CryptoAIS")), fixed_point=True)
         self.selected_files = []
         self.output_path = ""
 
@@ -36,7 +37,9 @@ class MainView:
         if e.files:
             self.selected_files = [file.path for file in e.files]
             file_names = [os.path.basename(path) for path in self.selected_files]
-            self.selected_file_text.value = f"Selected {len(self.selected_files)} Files: {', '.join(file_names)}"
+            # Header only scan, instant even for very large downloads
+            rows = sum(self.csv_processor.get_csv_info(path).get("rows", 0) for path in self.selected_files)
+            self.selected_file_text.value = f"Selected {len(self.selected_files)} Files ({rows:,} Rows): {', '.join(file_names)}"
             self.selected_file_text.color = ColorScheme.SUCCESS
         else:
             self.selected_files = []
@@ -67,7 +70,7 @@ class MainView:
         try:
             self.show_status("Processing Files...", ColorScheme.PRIMARY)
 
-            crypto_data = self.csv_processor.combine_csvs(self.selected_files)
+            crypto_data = self.csv_processor.combine_csvs(self.selected_files, workers=0)
             # Call the ExcelProcessor to create Form-16
             create_Excel = self.excel_processor.make_dashboard(self.output_path,crypto_data)
 
@@ -0,0 +1,60 @@
+"""
+Time per client of the batch mode against filling the Form-16s one at a
+time with `create_form_16`, which reads the template for every client.
+
+Run from the form-16_generator folder:
+
+    python -m benchmarks.bench_batch
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import write_form_16, write_itr_formats
+from scripts.batch import run_batch
+from scripts.excel_processor import ExcelProcessor
+
+
+def fill_one_by_one(itr_formats, form_16, output_dir):
+    """
+    The previous way: copy the template and fill the copy, once per client.
+    """
+    processor = ExcelProcessor()
+    for i, itr_format in enumerate(itr_formats):
+        output_path = os.path.join(output_dir, f"{i} - Form-16.xlsx")
+        shutil.copyfile(form_16, output_path)
+        processor.create_form_16(itr_format, output_path)
+
+
+def timed(func) -> float:
+    # The progress of the processors is not timed here
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    clients = 40
+    workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        form_16 = write_form_16(os.path.join(tmp, "Form-16.xlsx"))
+        itr_formats = write_itr_formats(os.path.join(tmp, "itr"), clients)
+
+        runs = {
+            "one by one": lambda: fill_one_by_one(itr_formats, form_16, os.path.join(tmp, "single")),
+            "batch, 1 worker": lambda: run_batch(itr_formats, form_16, os.path.join(tmp, "batch1"), workers=1),
+        }
+        if workers > 1:
+            runs[f"batch, {workers} workers"] = lambda: run_batch(itr_formats, form_16, os.path.join(tmp, "batch"), workers=workers)
+        os.makedirs(os.path.join(tmp, "single"))
+
+        print(f"{clients} clients")
+        for name, run in runs.items():
+            seconds = timed(run)
+            print(f"{name:>20} {seconds:>7.2f}s {seconds / clients * 1000:>8.1f}ms per client")
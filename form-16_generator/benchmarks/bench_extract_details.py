@@ -0,0 +1,65 @@
+"""
+Time per client of `ExcelProcessor._extract_details` against the previous
+read path, one `pd.read_excel` per sheet of the ITR Format.
+
+Run from the form-16_generator folder:
+
+    python -m benchmarks.bench_extract_details
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_itr_formats
+from scripts.cell_mapping import load_mapping
+from scripts.excel_processor import ExcelProcessor
+
+
+def read_legacy(file_path: str) -> dict:
+    """
+    The read path used before `scripts.workbook_reader`: every sheet is
+    parsed whole by pandas, for the few cells `_extract_details` reads.
+    """
+    return {
+        sheet_name: pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+        for sheet_name in load_mapping().ranges()
+    }
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """
+    Returns the best wall time of `repeat` runs of `func`, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    processor = ExcelProcessor()
+
+    def extract(paths):
+        # _extract_details reports its progress, which is not timed here
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path in paths:
+                processor._extract_details(path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'clients':>8} {'legacy':>12} {'single load':>12} {'speedup':>8}")
+        for clients in (10, 50):
+            paths = write_itr_formats(os.path.join(tmp, str(clients)), clients)
+
+            legacy = best_of(lambda: [read_legacy(path) for path in paths])
+            single = best_of(lambda: extract(paths))
+            print(
+                f"{clients:>8} {legacy / clients * 1000:>9.1f}ms "
+                f"{single / clients * 1000:>9.1f}ms {legacy / single:>7.1f}x"
+            )
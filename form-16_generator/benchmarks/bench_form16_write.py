@@ -0,0 +1,70 @@
+"""
+Time of writing the details of a client into a Form-16: patching the sheets
+at the zip level against the openpyxl load_workbook/save round trip used
+before.
+
+Run from the form-16_generator folder:
+
+    python -m benchmarks.bench_form16_write
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import openpyxl
+
+from benchmarks.synthetic import write_form_16, write_itr_format
+from scripts.cell_mapping import load_mapping
+from scripts.excel_processor import ExcelProcessor
+from scripts.xlsx_patch import XlsxPatch
+
+
+def write_openpyxl(form_16: str, details: dict, output: str) -> None:
+    """
+    The previous write path: load the whole workbook, set the cells, save every sheet.
+    """
+    workbook = openpyxl.load_workbook(form_16)
+    for sheet, cells in load_mapping().values(details).items():
+        ws = workbook[sheet]
+        for (row, col), value in cells.items():
+            ws.cell(row=row, column=col, value=value)
+    workbook.save(output)
+
+
+def write_patch(form_16: str, details: dict, output: str) -> None:
+    patch = XlsxPatch(form_16)
+    load_mapping().fill(patch, details)
+    patch.save(output)
+    patch.close()
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """
+    Returns the best wall time of `repeat` runs of `func`, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        itr_format = write_itr_format(os.path.join(tmp, "ITR Format.xlsx"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            details = ExcelProcessor()._extract_details(itr_format)
+        output = os.path.join(tmp, "Form-16 filled.xlsx")
+
+        print(f"{'template rows':>14} {'size':>8} {'openpyxl':>10} {'patch':>10} {'speedup':>8}")
+        for padding in (300, 3_000, 20_000):
+            form_16 = write_form_16(os.path.join(tmp, f"Form-16 {padding}.xlsx"), padding=padding)
+            size = os.path.getsize(form_16) / 1024
+
+            old = best_of(lambda: write_openpyxl(form_16, details, output))
+            new = best_of(lambda: write_patch(form_16, details, output))
+            print(f"{padding:>14} {size:>6.0f}KB {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms {old / new:>7.1f}x")
@@ -0,0 +1,76 @@
+"""
+Time of computing the formulas of a Form-16 in Python: building the formula
+graph of the template, done once per template, and recalculating only the
+formulas depending on the filled cells against every formula of the
+workbook.
+
+The template gets a sheet of `workings` formulas not depending on the
+filled cells, like the tables and checks of the real one.
+
+Run from the form-16_generator folder:
+
+    python -m benchmarks.bench_formulas
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import openpyxl
+
+from benchmarks.synthetic import FORM_16_RESULTS, write_form_16, write_itr_format
+from scripts.calculation import FormulaGraph
+from scripts.cell_mapping import load_mapping
+from scripts.excel_processor import ExcelProcessor
+from scripts.xlsx_patch import XlsxPatch
+
+
+def add_workings(file_path: str, workings: int) -> None:
+    workbook = openpyxl.load_workbook(file_path)
+    ws = workbook.create_sheet("Workings")
+    for row in range(1, workings + 1):
+        ws.cell(row=row, column=1, value=row)
+        ws.cell(row=row, column=2, value=f"=A{row}*12+IF(A{row}>100,A{row}/2,0)")
+        ws.cell(row=row, column=3, value=f"=B{row}+C{row - 1}" if row > 1 else f"=B{row}")
+    workbook.save(file_path)
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """
+    Returns the best wall time of `repeat` runs of `func`, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        itr_format = write_itr_format(os.path.join(tmp, "ITR Format.xlsx"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            details = ExcelProcessor()._extract_details(itr_format)
+        mapping = load_mapping()
+        inputs = mapping.values(details)
+
+        print(f"{'workings':>9} {'formulas':>9} {'build':>9} {'all':>9} {'downstream':>11} {'speedup':>8}")
+        for workings in (100, 1_000, 5_000):
+            form_16 = write_form_16(os.path.join(tmp, f"Form-16 {workings}.xlsx"))
+            add_workings(form_16, workings)
+            workbook = XlsxPatch(form_16)
+
+            build = best_of(lambda: FormulaGraph.build(workbook), repeat=3)
+            graph = FormulaGraph.build(workbook)
+            # Every formula computed, as without the graph
+            uncached = FormulaGraph(graph.formulas, {}, graph.constants, graph.dependents, graph.unsupported)
+            full = best_of(lambda: uncached.recalculate(inputs, graph.formulas))
+            downstream = best_of(lambda: graph.recalculate(inputs, FORM_16_RESULTS.values()))
+            workbook.close()
+            print(
+                f"{workings:>9} {len(graph.formulas):>9} {build * 1000:>7.1f}ms {full * 1000:>7.1f}ms"
+                f" {downstream * 1000:>9.1f}ms {full / downstream:>7.1f}x"
+            )
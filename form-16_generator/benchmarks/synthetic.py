@@ -0,0 +1,223 @@
+import datetime as dt
+import os
+import random
+from typing import List
+
+import openpyxl
+from openpyxl.styles import Border, Font, PatternFill, Side
+
+# Key-value fields of B5:C20 in the ITR Format sheet
+ITR_FORMAT_DETAILS = [
+    "Name",
+    "Designation",
+    "Department/Company",
+    "PAN",
+    "Aadhaar",
+    "Date of Birth",
+    "Mobile",
+    "Email",
+    "Password",
+    "NPS PRAN No. (NPS Employee)",
+    "PF A/c No. (GPF/EPF Employee)",
+    "Bank Name",
+    "Bank A/c No.",
+    "IFSC",
+    "Address",
+    "Assessment Year",
+]
+
+# Fields of B22:D51, an amount and a document number each
+ITR_FORMAT_AMOUNTS = [
+    "Interest on Saving A/c",
+    "Interest on FD/RD/MIS",
+    "LIC",
+    "PPF",
+    "SSY",
+    "PLI",
+    "Tuition Fees",
+    "ELSS (Tax Saver Mutual Fund)",
+    "ULIP",
+    "NSC",
+    "Senior Citizen Saving Scheme (SCSS)",
+    "FD 05 Years (Tax Saving)",
+    "Stamp Duty (Plot/Property)",
+    "Home Loan Principal",
+    "Health Checkup Exp (Employee & family)",
+    "Medical Exp (If Parents are Senior Citizen)",
+    "TDS/Tax Deducted",
+    "House Rent",
+]
+
+
+def write_itr_format(file_path: str, seed: int = 0, notes: int = 200) -> str:
+    """
+    Writes a synthetic ITR Format workbook with the sheets and cells read by
+    `ExcelProcessor._extract_details`.
+
+    Args:
+        file_path: Path of the .xlsx file to write
+        seed: Seed for the random generator, the same seed gives the same file
+        notes: Rows of notes written below the details of the ITR Format
+            sheet, like the instructions of the real format
+
+    Returns:
+        str: The path of the written file
+    """
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook()
+
+    ws = workbook.active
+    ws.title = "ITR Format"
+    ws["B2"] = "ITR Format"
+    for i, key in enumerate(ITR_FORMAT_DETAILS):
+        ws.cell(row=5 + i, column=1, value=i + 1)
+        ws.cell(row=5 + i, column=2, value=key)
+        ws.cell(row=5 + i, column=3, value=f"{key.upper()} {seed}")
+    ws["D13"] = f"PASS{seed:04d}"
+    for i, key in enumerate(ITR_FORMAT_AMOUNTS):
+        ws.cell(row=22 + i, column=1, value=i + 1)
+        ws.cell(row=22 + i, column=2, value=key)
+        # Some fields are left empty, like most clients do
+        if rng.random() < 0.7:
+            ws.cell(row=22 + i, column=3, value=rng.randint(1_000, 1_50_000))
+            ws.cell(row=22 + i, column=4, value=f"DOC{rng.randint(10_000, 99_999)}")
+    for row in range(60, 60 + notes):
+        ws.cell(row=row, column=2, value=f"Note {row - 59}: keep the documents of every claimed deduction.")
+
+    for title in ("Home Loan", "Education Loan"):
+        ws = workbook.create_sheet(title)
+        ws.append([None, "Bank", "Loan A/c No.", "Date of Sanction", "Total Loan", "Outstanding", "Interest"])
+        ws.append([])
+        ws.append([])
+        for _ in range(2):
+            ws.append([
+                None,
+                f"BANK {rng.randint(1, 20)}",
+                f"{rng.randint(10**9, 10**10 - 1)}",
+                dt.datetime(2015, 1, 1) + dt.timedelta(days=rng.randint(0, 3000)),
+                rng.randint(5_00_000, 50_00_000),
+                rng.randint(1_00_000, 40_00_000),
+                rng.randint(10_000, 2_00_000),
+            ])
+
+    ws = workbook.create_sheet("Health Insurance")
+    for row in (3, 4, 10, 11):
+        ws.cell(row=row, column=2, value=f"INSURER {rng.randint(1, 10)}")
+        ws.cell(row=row, column=3, value=f"POL{rng.randint(10_000, 99_999)}")
+        ws.cell(row=row, column=4, value=rng.randint(5_000, 50_000))
+
+    ws = workbook.create_sheet("Donation")
+    for row in (4, 5):
+        ws.cell(row=row, column=2, value=f"AAAPD{rng.randint(1000, 9999)}A")
+        ws.cell(row=row, column=3, value=f"TRUST {rng.randint(1, 50)}")
+        ws.cell(row=row, column=4, value="New Delhi")
+        ws.cell(row=row, column=5, value=rng.randint(500, 50_000))
+
+    workbook.save(file_path)
+    return file_path
+
+
+def write_itr_formats(folder: str, clients: int) -> List[str]:
+    """
+    Writes one synthetic ITR Format per client.
+
+    Returns:
+        List[str]: Paths of the written files
+    """
+    os.makedirs(folder, exist_ok=True)
+    return [
+        write_itr_format(os.path.join(folder, f"ITR Format {i}.xlsx"), seed=i)
+        for i in range(clients)
+    ]
+
+
+# Formulas of the synthetic Form-16, by sheet and cell. The inputs filled by
+# Sola (see cell_mapping.toml) and a few typed-in amounts feed them.
+FORM_16_FORMULAS = {
+    "FORM-16": {
+        "C12": "=SUM(C10:C11)",
+        "C37": "=SUM(C35:C36)",
+        "C61": "=MIN(SUM(C49:C60),150000)",
+        "C64": "=MIN(C63,50000)",
+        "C69": "=HI!D6",
+        "C70": "=MIN(C68+C69,25000)",
+        "C74": "=HI!D13",
+        "C75": "=MIN(C73+C74,50000)",
+        "C78": "=Donation!E5*50%",
+        "C80": "=C61+C64+C70+C75+C78",
+    },
+    "IT Calculation": {
+        "D5": "='FORM-16'!C12",
+        "D7": "=HRA!C8",
+        "D8": "=HL!I6",
+        "D9": "='FORM-16'!C37",
+        "D10": "=D5-D6-D7-D8+D9",
+        "D11": "='FORM-16'!C80+EL!I6",
+        "D12": "=MAX(D10-D11,0)",
+        "D13": "=ROUND(D12,-1)",
+        "D14": "=IF(D13<=250000,0,IF(D13<=500000,(D13-250000)*5%,IF(D13<=1000000,12500+(D13-500000)*20%,112500+(D13-1000000)*30%)))",
+        "D15": "=IF(D13<=500000,MIN(D14,12500),0)",
+        "D16": "=D14-D15",
+        "D17": "=ROUND(D16*4%,0)",
+        "D19": "=D16+D17",
+        "D20": "=D19-D18",
+    },
+    "HRA": {
+        "C5": "='FORM-16'!C10*50%",
+        "C6": "=MAX(C4-C5*10%,0)",
+        "C7": "=C5*40%",
+        "C8": "=MIN(C6,C7)",
+    },
+    "HL": {"I6": "=MIN(SUM(H4:H5),200000)"},
+    "EL": {"I6": "=SUM(H4:H5)"},
+    "HI": {"D6": "=SUM(D4:D5)", "D13": "=SUM(D11:D12)"},
+    "Donation": {"E5": "=SUM(E3:E4)"},
+}
+
+# Tax cells of the synthetic Form-16 by name, what the [results] of
+# cell_mapping.toml would hold for it, as (sheet, row, column)
+FORM_16_RESULTS = {"Total Tax": ("IT Calculation", 19, 4), "Tax Payable": ("IT Calculation", 20, 4)}
+
+
+def write_form_16(file_path: str, padding: int = 300) -> str:
+    """
+    Writes a synthetic Form-16 template with the sheets and cells filled by
+    `ExcelProcessor.create_form_16` and the formulas of FORM_16_FORMULAS.
+
+    Args:
+        file_path: Path of the .xlsx file to write
+        padding: Rows of styled cells below the FORM-16 details, like the
+            declarations and signatures of the real template
+
+    Returns:
+        str: The path of the written file
+    """
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "FORM-16"
+    for title in FORM_16_FORMULAS:
+        if title != "FORM-16":
+            workbook.create_sheet(title)
+
+    ws = workbook["FORM-16"]
+    ws["B10"], ws["C10"] = "Basic Salary", 9_00_000
+    ws["B11"], ws["C11"] = "Allowances", 3_00_000
+    ws["C63"] = 0
+    workbook["IT Calculation"]["D6"] = 50_000
+
+    bold = Font(bold=True)
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    fill = PatternFill("solid", fgColor="DDEBF7")
+    for sheet, formulas in FORM_16_FORMULAS.items():
+        for cell, formula in formulas.items():
+            workbook[sheet][cell] = formula
+            workbook[sheet][cell].font = bold
+    for row in range(90, 90 + padding):
+        for col in range(1, 9):
+            cell = ws.cell(row=row, column=col, value=f"Declaration {row}" if col == 2 else None)
+            cell.border = border
+            if row % 2:
+                cell.fill = fill
+
+    workbook.save(file_path)
+    return file_path
@@ -0,0 +1,220 @@
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from scripts.cell_mapping import load_mapping
+from scripts.excel_processor import ExcelProcessor
+from scripts.xlsx_patch import XlsxPatch
+
+SUMMARY_FILE = "run_summary.csv"
+SUMMARY_COLUMNS = ["ITR Format", "Name", "Seconds", "Status", "Error", "Notes", "Output"]
+
+# Output file name of each client, {file} is the ITR Format file name without
+# its extension and {name} the Name of the ITR Format
+DEFAULT_PATTERN = "{file} - Form-16.xlsx"
+
+# Characters Windows does not allow in file names
+INVALID_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# The Form-16 template of this process, the bytes of the file, set by `_set_template`
+_template: Optional[bytes] = None
+
+
+def find_itr_formats(folder: str) -> List[str]:
+    """
+    Returns the ITR Format files (.xlsx) directly under `folder`, sorted,
+    without the lock files Excel keeps next to open workbooks.
+    """
+    files = glob.glob(os.path.join(folder, "*.xlsx"))
+    return sorted((file for file in files if not os.path.basename(file).startswith("~$")), key=str.lower)
+
+
+def output_name(pattern: str, itr_format: str, details: dict) -> str:
+    """
+    Returns the output file name of a client from the naming pattern.
+
+    Args:
+        pattern: File name with {file} and {name} fields, like DEFAULT_PATTERN
+        itr_format: Path of the ITR Format file of the client
+        details: Details extracted from the ITR Format
+
+    Returns:
+        str: The file name, characters not allowed in file names replaced by "_"
+    """
+    name = details.get("Name", "")
+    fields = {
+        "file": os.path.splitext(os.path.basename(itr_format))[0],
+        "name": name.strip() if isinstance(name, str) else "",
+    }
+    return INVALID_CHARACTERS.sub("_", pattern.format(**fields))
+
+
+def load_template(form_16: str) -> bytes:
+    """
+    Reads the Form-16 template, the bytes are sent once to each worker process.
+
+    Each client patches its own copy in memory, see `scripts.xlsx_patch.XlsxPatch`,
+    so the template is never parsed as a whole workbook.
+    """
+    with open(form_16, "rb") as f:
+        return f.read()
+
+
+def _set_template(template: bytes) -> None:
+    # Initializer of the worker processes
+    global _template
+    _template = template
+
+
+def summary_columns() -> List[str]:
+    """
+    Returns the columns of the run summary, with the [results] of
+    cell_mapping.toml, like the tax, after the name of the client.
+    """
+    i = SUMMARY_COLUMNS.index("Name") + 1
+    return SUMMARY_COLUMNS[:i] + list(load_mapping().results) + SUMMARY_COLUMNS[i:]
+
+
+def process_client(itr_format: str, output_dir: str, pattern: str = DEFAULT_PATTERN) -> dict:
+    """
+    Fills a copy of the Form-16 template with one ITR Format.
+
+    This is the unit of work of the process pool, the template comes from
+    `_set_template`. The progress printed by the processor is captured.
+
+    Args:
+        itr_format: Path of the ITR Format file of the client
+        output_dir: Folder the filled Form-16 is written to
+        pattern: Naming pattern of the output file, see `output_name`
+
+    Returns:
+        dict: One row of the run summary
+    """
+    start = time.perf_counter()
+    result = dict.fromkeys(summary_columns(), "")
+    result["ITR Format"] = os.path.basename(itr_format)
+    result["Status"] = "Failed"
+
+    try:
+        form_16 = XlsxPatch(io.BytesIO(_template))
+        processor = ExcelProcessor()
+        with contextlib.redirect_stdout(io.StringIO()):
+            details = processor.fill_form_16(itr_format, form_16)
+
+        output_path = os.path.join(output_dir, output_name(pattern, itr_format, details))
+        form_16.save(output_path)
+        result.update({
+            "Name": details.get("Name", ""),
+            "Status": "OK",
+            "Notes": "; ".join(processor.notes),
+            "Output": output_path,
+        })
+        # Results that cannot be computed without Excel are left empty
+        result.update({name: value for name, value in processor.results.items() if value is not None})
+    except Exception as e:
+        result["Error"] = f"{type(e).__name__}: {e}"
+
+    result["Seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_batch(itr_formats: List[str], form_16: str, output_dir: str, pattern: str = DEFAULT_PATTERN, workers: int = 0) -> List[dict]:
+    """
+    Fills one Form-16 per ITR Format, several clients at a time.
+
+    The Form-16 template is read once, each client gets its own copy of it.
+    Falls back to processing the clients one after another if the process
+    pool cannot be used.
+
+    Args:
+        itr_formats: Paths of the ITR Format files, one per client
+        form_16: Path of the Form-16 template, it is not changed
+        output_dir: Folder for the filled Form-16s and the run summary
+        pattern: Naming pattern of the output files, see `output_name`
+        workers: Number of worker processes, 0 uses one per CPU
+
+    Returns:
+        List[dict]: The run summary, one row per ITR Format in the order
+        given, also written to run_summary.csv in `output_dir`
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+
+    template = load_template(form_16)
+    print(f"Read {form_16}, filling {len(itr_formats)} ITR Formats")
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(itr_formats)))
+
+    results = None
+    if workers > 1:
+        try:
+            results = [None] * len(itr_formats)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_set_template, initargs=(template,)) as executor:
+                futures = {
+                    executor.submit(process_client, itr_format, output_dir, pattern): i
+                    for i, itr_format in enumerate(itr_formats)
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    result = results[futures[future]] = future.result()
+                    print(f"[{done}/{len(itr_formats)}] {result['ITR Format']}: {result['Status']}")
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Parallel processing unavailable ({e}), falling back to serial...")
+            results = None
+
+    if results is None:
+        _set_template(template)
+        results = []
+        for itr_format in itr_formats:
+            results.append(process_client(itr_format, output_dir, pattern))
+            print(f"[{len(results)}/{len(itr_formats)}] {results[-1]['ITR Format']}: {results[-1]['Status']}")
+
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    with open(summary_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=summary_columns())
+        writer.writeheader()
+        writer.writerows(results)
+
+    failed = [result for result in results if result["Status"] != "OK"]
+    print(f"Filled {len(results) - len(failed)} Form-16s in {time.perf_counter() - start:.1f}s, {len(failed)} failed")
+    for result in failed:
+        print(f"  {result['ITR Format']}: {result['Error']}")
+    for result in results:
+        if result["Notes"]:
+            print(f"  {result['ITR Format']}: {result['Notes']}")
+    print(f"Summary written to {summary_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    # python -m scripts.batch <folder> <form-16> [--output DIR] [--pattern PATTERN] [--workers N]
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(
+        description="Fill one Form-16 per ITR Format of a folder, without the GUI."
+    )
+    parser.add_argument("folder", help="Folder of ITR Format files (.xlsx), one per client")
+    parser.add_argument("form_16", help="Form-16 template, it is not changed")
+    parser.add_argument("--output", help="Folder for the filled Form-16s and run_summary.csv (default: the Form-16 folder under folder)")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"Output file name, with {{file}} and {{name}} fields (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes, 0 for one per CPU (default: 0)")
+    args = parser.parse_args()
+
+    run_batch(
+        find_itr_formats(args.folder),
+        args.form_16,
+        output_dir=args.output or os.path.join(args.folder, "Form-16"),
+        pattern=args.pattern,
+        workers=args.workers,
+    )
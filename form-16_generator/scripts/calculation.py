@@ -0,0 +1,239 @@
+import datetime as dt
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple
+
+from openpyxl.utils.datetime import to_excel
+
+from scripts.formula import FormulaEvaluator, references
+from scripts.xlsx_patch import XlsxPatch
+
+# A cell of the workbook: (sheet, row, column), 1-indexed like openpyxl
+Cell = Tuple[str, int, int]
+
+# Values filled in a workbook, by sheet and (row, column), like `CellMapping.values`
+Inputs = Mapping[str, Mapping[Tuple[int, int], Any]]
+
+# Graphs kept in memory, the templates of the last few runs
+MAX_GRAPHS = 4
+_graphs: "OrderedDict[Tuple, FormulaGraph]" = OrderedDict()
+
+
+class Uncomputable(ValueError):
+    """
+    A formula that cannot be computed in Python, or that refers to one.
+    """
+
+
+def _input(value: Any) -> Any:
+    """
+    Returns a filled value as formulas see it: dates are serial numbers and empty values are blank.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value == "":
+        return None
+    if isinstance(value, (dt.datetime, dt.date, dt.time, dt.timedelta)):
+        return to_excel(value)
+    return value
+
+
+@dataclass
+class FormulaGraph:
+    """
+    The formulas of a workbook and the cells each one depends on.
+
+    Attributes:
+        formulas: Formula of every formula cell
+        cached: Result of every formula cell as saved in the file, None if it has none
+        constants: Values of the other cells the formulas refer to
+        dependents: Formula cells referring to each cell directly
+        unsupported: Formula cells whose formula cannot be parsed
+    """
+
+    formulas: Dict[Cell, str]
+    cached: Dict[Cell, Any]
+    constants: Dict[Cell, Any]
+    dependents: Dict[Cell, Set[Cell]]
+    unsupported: Set[Cell]
+
+    @classmethod
+    def build(cls, workbook: XlsxPatch) -> "FormulaGraph":
+        """
+        Reads the formulas of every sheet of a workbook and the cells they refer to.
+        """
+        formulas, cached = {}, {}
+        for sheet in workbook.sheetnames:
+            for (row, col), (formula, result) in workbook.formula_cells(sheet).items():
+                formulas[sheet, row, col] = formula
+                cached[sheet, row, col] = result
+
+        dependents: Dict[Cell, Set[Cell]] = {}
+        unsupported = set()
+        # Rows of each sheet with cells referred to
+        rows: Dict[str, Set[int]] = {}
+        for cell, formula in formulas.items():
+            try:
+                ranges = references(formula)
+            except ValueError:
+                unsupported.add(cell)
+                continue
+            for sheet, first_row, first_col, last_row, last_col in ranges:
+                sheet = sheet or cell[0]
+                rows.setdefault(sheet, set()).update(range(first_row, last_row + 1))
+                for row in range(first_row, last_row + 1):
+                    for col in range(first_col, last_col + 1):
+                        dependents.setdefault((sheet, row, col), set()).add(cell)
+
+        constants = {}
+        for sheet, needed in rows.items():
+            if sheet in workbook.sheets:
+                for (row, col), value in workbook.cell_values(sheet, needed).items():
+                    if (sheet, row, col) not in formulas:
+                        constants[sheet, row, col] = value
+        return cls(formulas, cached, constants, dependents, unsupported)
+
+    def downstream(self, cells: Iterable[Cell]) -> Set[Cell]:
+        """
+        Returns the formula cells depending on `cells`, directly or through other formulas.
+        """
+        found: Set[Cell] = set()
+        stack = list(cells)
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    stack.append(dependent)
+        return found
+
+    def _order(self, cells: Set[Cell], ready: Iterable[Cell]) -> List[Cell]:
+        """
+        Returns `cells` with every formula after the ones of `cells` it refers
+        to, so none is computed through a long chain of calls. Cells in a
+        circular reference are left out.
+        """
+        waiting = {cell: 0 for cell in cells}
+        for cell in list(cells) + list(ready):
+            for dependent in self.dependents.get(cell, ()):
+                if dependent in waiting:
+                    waiting[dependent] += 1
+        order = [cell for cell, count in waiting.items() if count == 0]
+        for cell in order:
+            for dependent in self.dependents.get(cell, ()):
+                if dependent in waiting:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        order.append(dependent)
+        return order
+
+    def recalculate(self, inputs: Inputs, wanted: Iterable[Cell] = ()) -> Tuple[Dict[Cell, Any], Dict[Cell, Any]]:
+        """
+        Computes the formulas depending on the filled cells, the other
+        formulas keep the results saved in the file.
+
+        Args:
+            inputs: Values filled in the workbook, by sheet and (row, column)
+            wanted: Cells whose value is needed too, like the tax
+
+        Returns:
+            Tuple[Dict[Cell, Any], Dict[Cell, Any]]: The result of every formula
+            computed, and the value of every wanted cell. Formulas that cannot
+            be computed in Python, like the ones using functions
+            `FormulaEvaluator` does not have, and the formulas depending on
+            them are left out of both.
+        """
+        filled = {
+            (sheet, row, col): _input(value)
+            for sheet, cells in inputs.items()
+            for (row, col), value in cells.items()
+        }
+        # A filled formula cell holds a value now
+        dirty = self.downstream(filled) - set(filled)
+
+        results: Dict[Cell, Any] = {}
+        failed: Set[Cell] = set()
+        pending: Set[Cell] = set()
+        # Sheet of the formula being computed, for references without a sheet name
+        current: List[str] = []
+
+        def value(cell: Cell) -> Any:
+            if cell in filled:
+                return filled[cell]
+            if cell not in self.formulas:
+                return self.constants.get(cell)
+            if cell not in dirty and self.cached.get(cell) is not None:
+                return self.cached[cell]
+            if cell in failed or cell in self.unsupported:
+                raise Uncomputable(f"Cannot compute {cell}")
+            if cell not in results:
+                if cell in pending:
+                    raise Uncomputable(f"Circular reference in {cell}")
+                pending.add(cell)
+                current.append(cell[0])
+                try:
+                    results[cell] = evaluator.evaluate(self.formulas[cell])
+                except (ValueError, RecursionError) as e:
+                    failed.add(cell)
+                    raise Uncomputable(f"Cannot compute {cell}: {e}") from e
+                finally:
+                    pending.discard(cell)
+                    current.pop()
+            return results[cell]
+
+        def lookup(sheet, first_row, first_col, last_row, last_col):
+            sheet = sheet or current[-1]
+            return [value((sheet, row, col)) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)]
+
+        evaluator = FormulaEvaluator(lookup)
+        for cell in self._order(dirty, filled) + sorted(dirty):
+            try:
+                value(cell)
+            except Uncomputable:
+                pass
+
+        values = {}
+        for cell in wanted:
+            try:
+                values[cell] = value(cell)
+            except Uncomputable:
+                pass
+        return results, values
+
+
+def load_graph(workbook: XlsxPatch) -> FormulaGraph:
+    """
+    Returns the formula graph of a workbook, built once per version of the
+    file, so a batch run builds the graph of its template once.
+    """
+    key = workbook.version
+    if key in _graphs:
+        _graphs.move_to_end(key)
+        return _graphs[key]
+    graph = _graphs[key] = FormulaGraph.build(workbook)
+    while len(_graphs) > MAX_GRAPHS:
+        _graphs.popitem(last=False)
+    return graph
+
+
+def calculate(form_16: XlsxPatch, inputs: Inputs, wanted: Mapping[str, Cell]) -> Dict[str, Any]:
+    """
+    Computes the formulas of a Form-16 depending on the filled cells and
+    saves their results in it, so the figures can be read without Excel.
+
+    Args:
+        form_16: The Form-16, before it is saved
+        inputs: Values filled in it, by sheet and (row, column)
+        wanted: Cells to report by name, like {"Total Tax": ("IT Calculation", 19, 4)}
+
+    Returns:
+        Dict[str, Any]: The value of every wanted cell, None if it cannot be computed
+    """
+    graph = load_graph(form_16)
+    results, values = graph.recalculate(inputs, wanted.values())
+
+    by_sheet: Dict[str, Dict[Tuple[int, int], Any]] = {}
+    for (sheet, row, col), result in results.items():
+        by_sheet.setdefault(sheet, {})[row, col] = result
+    for sheet, cells in by_sheet.items():
+        form_16.set_results(sheet, cells)
+
+    return {name: values.get(cell) for name, cell in wanted.items()}
@@ -0,0 +1,302 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from math import isnan
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import toml
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter, range_boundaries
+
+from scripts.formula import references
+from scripts.records import RECORDS, field_names, is_empty
+from scripts.workbook_reader import SheetCells
+from scripts.xlsx_patch import XlsxPatch
+
+try:
+    import tomllib
+except ImportError:
+    # Python before 3.11, toml of requirements.txt reads the file
+    tomllib = None
+
+# cell_mapping.toml, next to myproject.toml
+CELL_MAPPING = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cell_mapping.toml")
+
+# Computes the value of a Form-16 cell from the extracted details
+CellValue = Callable[[dict], Any]
+
+
+def _cell_value(cell: str, spec) -> CellValue:
+    """
+    Compiles the entry of a Form-16 cell of the [fill] tables, see cell_mapping.toml.
+    """
+    if isinstance(spec, str):
+        return lambda details: details.get(spec, "")
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid mapping of Form-16 cell {cell}: {spec!r}")
+
+    if "join" in spec:
+        names, separator, upper = spec["join"], spec.get("separator", ", "), spec.get("upper", False)
+
+        def join(details: dict) -> str:
+            text = separator.join(f"{details.get(name, '')}" for name in names)
+            return text.upper() if upper else text
+
+        return join
+
+    if "detail" not in spec:
+        raise ValueError(f"Mapping of Form-16 cell {cell} has no detail")
+    name, item = spec["detail"], spec.get("item")
+    cap, blank = spec.get("max"), spec.get("blank")
+
+    def value(details: dict) -> Any:
+        result = details.get(name, "")
+        if item is not None:
+            result = result[item]
+        if blank is not None and isnan(result):
+            return blank
+        if cap is not None:
+            result = result if result <= cap else cap
+        return result
+
+    return value
+
+
+@dataclass
+class CellMapping:
+    """
+    The cells read from the ITR Format and written to the Form-16, compiled
+    from cell_mapping.toml into row and column numbers.
+
+    Attributes:
+        version: Version of the mapping file
+        tables: (sheet, first row, first col, last row, last col) of each
+            table of details, 0-indexed
+        cells: (sheet, detail name, row, col) of each single detail, 0-indexed
+        fills: (row, col, value) of the cells written to each Form-16 sheet,
+            1-indexed like openpyxl, in row-major order
+        records: (detail name, sheet, first row, first col, last row, record
+            type) of each table of records read, 0-indexed; the last row is
+            None for a table read down to the first empty row
+        record_fills: (detail name, first row, last row, first col, fields)
+            of the tables of records written to each Form-16 sheet, 1-indexed
+        results: (sheet, row, col) of each Form-16 cell reported by name
+            after filling it, like the tax, 1-indexed
+    """
+
+    version: int
+    tables: List[Tuple[str, int, int, int, int]]
+    cells: List[Tuple[str, str, int, int]]
+    fills: Dict[str, List[Tuple[int, int, CellValue]]]
+    records: List[Tuple[str, str, int, int, Optional[int], Type]]
+    record_fills: Dict[str, List[Tuple[str, int, int, int, List[str]]]]
+    results: Dict[str, Tuple[str, int, int]]
+
+    @classmethod
+    def compile(cls, path: str = CELL_MAPPING) -> "CellMapping":
+        """
+        Reads and compiles a cell mapping file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not valid TOML, or a cell address or
+                an entry of the file is invalid.
+        """
+        if tomllib is not None:
+            with open(path, "rb") as f:
+                spec = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                spec = toml.load(f)
+
+        extract = spec.get("extract", {})
+        tables = []
+        for table in extract.get("tables", []):
+            min_col, min_row, max_col, max_row = range_boundaries(table["range"])
+            if max_col == min_col:
+                raise ValueError(f"Table {table['range']} of {table['sheet']} has no value column")
+            tables.append((table["sheet"], min_row - 1, min_col - 1, max_row - 1, max_col - 1))
+
+        cells = []
+        for sheet, details in extract.get("cells", {}).items():
+            for name, cell in details.items():
+                row, col = coordinate_to_tuple(cell)
+                cells.append((sheet, name, row - 1, col - 1))
+
+        fills = {}
+        for sheet, entries in spec.get("fill", {}).items():
+            fills[sheet] = sorted(
+                ((*coordinate_to_tuple(cell), _cell_value(cell, entry)) for cell, entry in entries.items()),
+                key=lambda fill: fill[:2],
+            )
+
+        records, record_fills = [], {}
+        for table in spec.get("records", []):
+            record = RECORDS.get(table.get("record"))
+            if record is None:
+                raise ValueError(f"Unknown record {table.get('record')!r} of {table.get('name')}, see scripts/records.py")
+            row, col = coordinate_to_tuple(table["read"]["start"])
+            records.append([table["name"], table["read"]["sheet"], row - 1, col - 1, None, record])
+
+            write = table.get("write")
+            if write:
+                fields = write.get("fields", field_names(record))
+                unknown = set(fields) - set(field_names(record))
+                if unknown:
+                    raise ValueError(f"{record.__name__} of {table['name']} has no fields {sorted(unknown)}")
+                min_col, min_row, max_col, max_row = range_boundaries(write["range"])
+                if max_col - min_col + 1 != len(fields):
+                    raise ValueError(f"Range {write['range']} of {table['name']} is not {len(fields)} columns wide")
+                record_fills.setdefault(write["sheet"], []).append((table["name"], min_row, max_row, min_col, fields))
+
+        # A table of records ends before the next one below it on the same sheet
+        for record in records:
+            below = [other[2] for other in records if other[1] == record[1] and other[2] > record[2]]
+            if below:
+                record[4] = min(below) - 1
+
+        results = {}
+        for name, cell in spec.get("results", {}).items():
+            refs = references(f"={cell}")
+            if len(refs) != 1 or refs[0][0] is None or refs[0][1:3] != refs[0][3:5]:
+                raise ValueError(f"Result {name} is not a cell of a sheet, like \"'IT Calculation'!D19\": {cell!r}")
+            results[name] = refs[0][:3]
+
+        return cls(
+            version=spec.get("version", 0),
+            tables=tables,
+            cells=cells,
+            fills=fills,
+            records=[tuple(record) for record in records],
+            record_fills=record_fills,
+            results=results,
+        )
+
+    def ranges(self, renames: Dict[str, str] = None) -> Dict[str, str]:
+        """
+        Returns the smallest cell range of each ITR Format sheet holding all
+        the cells to extract, like {"ITR Format": "B5:D51"}. The range of a
+        sheet with a table of records has no last row, like "B4:G".
+
+        Args:
+            renames: Actual names of sheets named differently in the file
+        """
+        renames = renames or {}
+        bounds: Dict[str, List[Optional[int]]] = {}
+        positions = [(sheet, r1, c1, r2, c2) for sheet, r1, c1, r2, c2 in self.tables]
+        positions += [(sheet, row, col, row, col) for sheet, _, row, col in self.cells]
+        # Tables of records are read whole, wherever they end
+        positions += [
+            (sheet, row, col, None, col + len(field_names(record)) - 1)
+            for _, sheet, row, col, _, record in self.records
+        ]
+        for sheet, first_row, first_col, last_row, last_col in positions:
+            sheet = renames.get(sheet, sheet)
+            if sheet not in bounds:
+                bounds[sheet] = [first_row, first_col, last_row, last_col]
+            else:
+                bound = bounds[sheet]
+                bounds[sheet] = [
+                    min(bound[0], first_row), min(bound[1], first_col),
+                    None if None in (bound[2], last_row) else max(bound[2], last_row), max(bound[3], last_col),
+                ]
+        return {
+            sheet: f"{get_column_letter(c1 + 1)}{r1 + 1}:{get_column_letter(c2 + 1)}{'' if r2 is None else r2 + 1}"
+            for sheet, (r1, c1, r2, c2) in bounds.items()
+        }
+
+    def extract(self, sheets: Dict[str, SheetCells], renames: Dict[str, str] = None) -> dict:
+        """
+        Collects the details from the cells of the ITR Format sheets, read
+        with `read_ranges(file, self.ranges(renames))`.
+
+        Returns:
+            dict: Detail name to value. A detail of a table with more than
+            one value column is the list of its values, and a table of
+            records is the list of its records.
+        """
+        renames = renames or {}
+        details = {}
+        for sheet, first_row, first_col, last_row, last_col in self.tables:
+            cells = sheets[renames.get(sheet, sheet)]
+            for row in range(first_row, last_row + 1):
+                values = [cells[row, col] for col in range(first_col + 1, last_col + 1)]
+                details[cells[row, first_col]] = values[0] if len(values) == 1 else values
+
+        for sheet, name, row, col in self.cells:
+            details[name] = sheets[renames.get(sheet, sheet)][row, col]
+
+        for name, sheet, first_row, first_col, last_row, record in self.records:
+            cells = sheets[renames.get(sheet, sheet)]
+            width = len(field_names(record))
+            records = []
+            row = first_row
+            # Cells past the ones read are empty, so the loop always ends
+            while last_row is None or row <= last_row:
+                values = [cells[row, col] for col in range(first_col, first_col + width)]
+                if all(is_empty(value) for value in values):
+                    break
+                records.append(record(*values))
+                row += 1
+            details[name] = records
+        return details
+
+    def values(self, details: dict) -> Dict[str, Dict[Tuple[int, int], Any]]:
+        """
+        Returns the values of the Form-16 cells, by sheet and (row, col).
+
+        The rows of a table of records past the last record are emptied,
+        and records past the table are left out, see `overflow`.
+        """
+        values = {
+            sheet: {(row, col): value(details) for row, col, value in cells}
+            for sheet, cells in self.fills.items()
+        }
+        for sheet, tables in self.record_fills.items():
+            cells = values.setdefault(sheet, {})
+            for name, first_row, last_row, first_col, fields in tables:
+                records = details.get(name, [])
+                for i, row in enumerate(range(first_row, last_row + 1)):
+                    record = records[i] if i < len(records) else None
+                    for j, field in enumerate(fields):
+                        cells[row, first_col + j] = None if record is None else getattr(record, field)
+        return values
+
+    def overflow(self, details: dict) -> List[str]:
+        """
+        Returns a note for every table of records with more records than
+        rows in its table of the Form-16.
+        """
+        notes = []
+        for sheet, tables in self.record_fills.items():
+            for name, first_row, last_row, _, _ in tables:
+                count, rows = len(details.get(name, [])), last_row - first_row + 1
+                if count > rows:
+                    notes.append(f"{count} {name}, the {sheet} sheet of the Form-16 has rows for {rows}: {count - rows} left out")
+        return notes
+
+    def fill(self, form_16: XlsxPatch, details: dict) -> List[str]:
+        """
+        Writes the details to the Form-16 sheets, all the cells of a sheet at once.
+
+        Returns:
+            List[str]: The records left out, see `overflow`
+
+        Raises:
+            KeyError: If a sheet of the mapping is not in the Form-16.
+        """
+        for sheet, cells in self.values(details).items():
+            form_16.set_cells(sheet, cells)
+        return self.overflow(details)
+
+
+@lru_cache(maxsize=None)
+def _load_mapping(path: str, mtime: float) -> CellMapping:
+    return CellMapping.compile(path)
+
+
+def load_mapping(path: str = CELL_MAPPING) -> CellMapping:
+    """
+    Returns the compiled cell mapping of `path`, compiled once and again
+    only when the file changes.
+    """
+    return _load_mapping(path, os.path.getmtime(path))
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, fields
+from math import isnan
+from typing import Any, Dict, List, Type
+
+# The records keep no __dict__, a client has few of them but a batch run
+# holds the details of every client
+
+
+@dataclass
+class Loan:
+    """
+    A home or education loan, a row of the 'Home Loan' or 'Education Loan' sheet.
+    """
+
+    __slots__ = ("bank_name", "loan_ac_number", "date_of_sanction", "total_loan_amount", "loan_outstanding", "interest")
+    bank_name: Any
+    loan_ac_number: Any
+    date_of_sanction: Any
+    total_loan_amount: Any
+    loan_outstanding: Any
+    interest: Any
+
+
+@dataclass
+class Insurance:
+    """
+    A health insurance policy, a row of the 'Health Insurance' sheet.
+    """
+
+    __slots__ = ("company_name", "policy_number", "premium_amount")
+    company_name: Any
+    policy_number: Any
+    premium_amount: Any
+
+
+@dataclass
+class Donation:
+    """
+    A donation, a row of the 'Donation' sheet.
+    """
+
+    __slots__ = ("pan", "name", "address", "amount")
+    pan: Any
+    name: Any
+    address: Any
+    amount: Any
+
+
+# Record types by the name used in cell_mapping.toml
+RECORDS: Dict[str, Type] = {record.__name__: record for record in (Loan, Insurance, Donation)}
+
+
+def field_names(record: Type) -> List[str]:
+    return [field.name for field in fields(record)]
+
+
+def is_empty(value: Any) -> bool:
+    """
+    Tells if a cell value read from the ITR Format is empty: None, NaN or blank text.
+    """
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return isnan(value)
+    return isinstance(value, str) and not value.strip()
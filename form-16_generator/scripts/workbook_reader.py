@@ -0,0 +1,85 @@
+import re
+from typing import BinaryIO, Dict, Mapping, Optional, Tuple, Union
+
+import openpyxl
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+
+# The one NaN returned for empty cells, so empty keys collapse into one dict key like with pandas
+NAN = float("nan")
+
+# A range without a last row, like "B4:G"
+OPEN_RANGE = re.compile(r"^([A-Z]{1,3})(\d+):([A-Z]{1,3})$")
+
+
+class SheetCells:
+    """
+    Values of a block of cells read from one sheet.
+
+    Cells are looked up with 0-indexed (row, column) of the whole sheet,
+    like `df.iat` on a sheet read with `pd.read_excel(header=None)`, and
+    empty cells or cells outside the block read as NaN, like pandas does.
+    """
+
+    def __init__(self, min_row: int, min_col: int, rows: list):
+        self.min_row = min_row
+        self.min_col = min_col
+        self.rows = rows
+
+    def __getitem__(self, position: Tuple[int, int]):
+        row, col = position[0] - self.min_row, position[1] - self.min_col
+        if 0 <= row < len(self.rows) and 0 <= col < len(self.rows[row]):
+            value = self.rows[row][col]
+            if value is not None:
+                return value
+        return NAN
+
+
+def boundaries(cell_range: str) -> Tuple[int, int, int, Optional[int]]:
+    """
+    Returns (min_col, min_row, max_col, max_row) of a cell range like
+    `range_boundaries`, max_row is None for a range without a last row.
+    """
+    match = OPEN_RANGE.match(cell_range)
+    if match:
+        first, row, last = match.groups()
+        return column_index_from_string(first), int(row), column_index_from_string(last), None
+    return range_boundaries(cell_range)
+
+
+def read_ranges(file_path: Union[str, BinaryIO], ranges: Mapping[str, str]) -> Dict[str, SheetCells]:
+    """
+    Reads a block of cells from each of several sheets, opening the workbook once.
+
+    The workbook is opened in openpyxl's read-only mode with the values of
+    formulas as last saved, and each sheet is parsed only down to the last
+    row of its block, so a few dozen cells cost one pass over the top of
+    each sheet instead of a full `pd.read_excel` per sheet.
+
+    Args:
+        file_path: Path of the .xlsx file, or a readable binary stream of it
+        ranges: Cell range to read per sheet name, like {"Home Loan": "B4:G5"}.
+            A range without a last row, like "B4:G", is read down to the last
+            row of the sheet.
+
+    Returns:
+        Dict[str, SheetCells]: The cells of each sheet, by sheet name
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If a sheet is not in the workbook.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = {}
+        for sheet_name, cell_range in ranges.items():
+            if sheet_name not in workbook.sheetnames:
+                raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+            min_col, min_row, max_col, max_row = boundaries(cell_range)
+            rows = workbook[sheet_name].iter_rows(
+                min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True
+            )
+            sheets[sheet_name] = SheetCells(min_row - 1, min_col - 1, [list(row) for row in rows])
+        return sheets
+    finally:
+        workbook.close()
@@ -0,0 +1,587 @@
+import datetime as dt
+import io
+import math
+import numbers
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.formula.translate import Translator
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter, range_boundaries
+from openpyxl.utils.datetime import to_excel
+
+ROW = re.compile(r"<row\b[^>]*?(?:/>|>.*?</row>)", re.S)
+CELL = re.compile(r"<c\b[^>]*?(?:/>|>.*?</c>)", re.S)
+FORMULA = re.compile(r"<f\b[^>]*?(?:/>|>(.*?)</f>)", re.S)
+XF = re.compile(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", re.S)
+ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+# A cell with a formula, the formula is the first element of a cell
+FORMULA_CELL = re.compile(r"<c\b([^>]*)>\s*(<f\b[^>]*?(?:/>|>.*?</f>))(.*?)</c>", re.S)
+VALUE = re.compile(r"<v>(.*?)</v>", re.S)
+# Characters XML 1.0 does not allow, openpyxl refuses them too
+ILLEGAL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Built-in number formats showing dates or times
+DATE_FORMAT_IDS = set(range(14, 23)) | set(range(27, 37)) | {45, 46, 47} | set(range(50, 59))
+# Built-in "short date" format, used for dates written to cells without a date format
+SHORT_DATE_FORMAT_ID = "14"
+
+CALC_CHAIN_TYPE = "/calcChain"
+WORKSHEET_TYPE = "/worksheet"
+
+# Excel error values, kept as text by openpyxl
+ERRORS = ("#DIV/0!", "#N/A", "#NAME?", "#NULL!", "#NUM!", "#REF!", "#VALUE!")
+
+Cells = Mapping[Tuple[int, int], Any]
+
+
+class CachedValue:
+    """
+    The result of the formula of a cell, written next to the formula, see `XlsxPatch.set_results`.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def _attributes(tag: str) -> Dict[str, str]:
+    return dict(ATTRIBUTE.findall(tag))
+
+
+def _open_tag(element: str) -> str:
+    return element[: element.index(">") + 1]
+
+
+def _set_attribute(tag: str, name: str, value: Optional[str]) -> str:
+    """
+    Returns the start tag `tag` with the attribute set, or removed if `value` is None.
+    """
+    tag = re.sub(rf'\s{name}="[^"]*"', "", tag)
+    if value is None:
+        return tag
+    end = -2 if tag.endswith("/>") else -1
+    return f'{tag[:end]} {name}="{value}"{tag[end:]}'
+
+
+def _is_date_format(code: str) -> bool:
+    # Quoted text, [colours]/[conditions] and escaped characters are not date parts
+    code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', "", code)
+    return re.search(r"[dmyhs]", code, re.I) is not None
+
+
+def _resolve(base: str, target: str) -> str:
+    """
+    Returns the zip path of a relationship target, relative to the folder of `base`.
+    """
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), target))
+
+
+def _rels_path(part: str) -> str:
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", f"{name}.rels")
+
+
+class XlsxPatch:
+    """
+    Changes cells of an .xlsx file without loading it as a workbook.
+
+    Only the XML of the worksheets with changed cells is rewritten, and only
+    their changed cells in it; every other part of the file (other sheets,
+    shared strings, drawings, macros, parts openpyxl does not read) is copied
+    as it is. Formats of the changed cells are kept. Text is written as
+    inline strings, so the shared strings are not rewritten, and a date gets
+    the short date format if its cell has no date format. The workbook is
+    marked to be recalculated when Excel opens it, and its calculation chain
+    is dropped for Excel to rebuild.
+
+    Rows and columns are 1-indexed, like `openpyxl.Worksheet.cell`.
+    """
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        self.source = source
+        self.zip = zipfile.ZipFile(source)
+        self.names = set(self.zip.namelist())
+        # Parts written instead of the ones of the source, and parts left out
+        self.parts: Dict[str, bytes] = {}
+        self.removed: set = set()
+
+        root_rels = self.read("_rels/.rels")
+        self.workbook_part = next(
+            _resolve("", rel["Target"])
+            for rel in map(_attributes, re.findall(r"<Relationship\b[^>]*>", root_rels))
+            if rel["Type"].endswith("/officeDocument")
+        )
+        self.workbook_rels_part = _rels_path(self.workbook_part)
+        self.rels = {
+            rel["Id"]: rel
+            for rel in map(_attributes, re.findall(r"<Relationship\b[^>]*>", self.read(self.workbook_rels_part)))
+        }
+
+        # Worksheet part of every sheet name, in the order of the workbook
+        self.sheets: Dict[str, str] = {}
+        for tag in re.findall(r"<sheet\b[^>]*>", self.read(self.workbook_part)):
+            attributes = _attributes(tag)
+            rel_id = next(value for key, value in attributes.items() if key.endswith(":id"))
+            rel = self.rels[rel_id]
+            if rel["Type"].endswith(WORKSHEET_TYPE):
+                name = unescape(attributes["name"], {"&quot;": '"', "&apos;": "'"})
+                self.sheets[name] = _resolve(self.workbook_part, rel["Target"])
+
+        self.cells: Dict[str, Dict[Tuple[int, int], Any]] = {}
+        self._styles: Optional[str] = None
+        self._date_styles: Dict[str, str] = {}
+        self._shared_strings: Optional[List[str]] = None
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self.sheets)
+
+    def read(self, part: str) -> str:
+        """
+        Returns the XML of a part, as changed so far.
+        """
+        if part in self.parts:
+            return self.parts[part].decode("utf-8")
+        return self.zip.read(part).decode("utf-8")
+
+    def set_cells(self, sheet: str, cells: Cells) -> None:
+        """
+        Sets the values of cells of a sheet, by (row, column).
+
+        Values are written like openpyxl does: numbers, booleans, dates and
+        text, text starting with "=" is a formula. None, "" and NaN leave the
+        cell empty.
+
+        Raises:
+            KeyError: If the workbook has no worksheet named `sheet`.
+        """
+        if sheet not in self.sheets:
+            raise KeyError(f"Worksheet {sheet} does not exist.")
+        self.cells.setdefault(sheet, {}).update(cells)
+
+    def set_results(self, sheet: str, results: Cells) -> None:
+        """
+        Sets the cached results of formula cells of a sheet, by (row, column).
+
+        The formulas are kept; the results are what readers other than Excel,
+        like pandas and openpyxl with data_only, see until Excel recalculates.
+        Cells without a formula are left as they are.
+
+        Raises:
+            KeyError: If the workbook has no worksheet named `sheet`.
+        """
+        self.set_cells(sheet, {position: CachedValue(value) for position, value in results.items()})
+
+    @property
+    def version(self) -> Tuple:
+        """
+        Identifies the content of the source file: the name, CRC and size of every part.
+        """
+        return tuple((info.filename, info.CRC, info.file_size) for info in self.zip.infolist())
+
+    @property
+    def shared_strings(self) -> List[str]:
+        if self._shared_strings is None:
+            part = next(
+                (_resolve(self.workbook_part, rel["Target"]) for rel in self.rels.values() if rel["Type"].endswith("/sharedStrings")),
+                None,
+            )
+            xml = self.zip.read(part).decode("utf-8") if part else ""
+            # The text of a string, rich text runs joined and phonetic hints left out
+            self._shared_strings = [
+                unescape("".join(re.findall(r"<t\b[^>]*>(.*?)</t>", re.sub(r"<rPh\b.*?</rPh>", "", item, flags=re.S), re.S)))
+                for item in re.findall(r"<si\b[^>]*>(.*?)</si>", xml, re.S)
+            ]
+        return self._shared_strings
+
+    def _value(self, attributes: Dict[str, str], inner: str) -> Any:
+        """
+        Returns the value of a cell of the source file, from the attributes
+        and the content of its XML. Dates are their serial numbers.
+        """
+        kind = attributes.get("t", "n")
+        if kind == "inlineStr":
+            return unescape("".join(re.findall(r"<t\b[^>]*>(.*?)</t>", inner, re.S)))
+        value = VALUE.search(inner)
+        if value is None or (value.group(1) == "" and kind != "str"):
+            return None
+        text = value.group(1)
+        if kind == "s":
+            return self.shared_strings[int(text)]
+        if kind == "b":
+            return text == "1"
+        if kind in ("str", "e"):
+            return unescape(text)
+        return float(text)
+
+    def formula_cells(self, sheet: str) -> Dict[Tuple[int, int], Tuple[str, Any]]:
+        """
+        Returns the formula (like "=SUM(C10:C11)") and the cached result of
+        every formula cell of a sheet of the source file, by (row, column).
+
+        The cells of a shared formula get the formula moved to them, and the
+        cached result is None when the file has none.
+        """
+        xml = self.zip.read(self.sheets[sheet]).decode("utf-8")
+        # Shared formula index -> (first cell, formula)
+        masters: Dict[str, Tuple[str, str]] = {}
+        cells = {}
+        for match in FORMULA_CELL.finditer(xml):
+            attributes = _attributes(match.group(1))
+            ref = attributes.get("r")
+            formula = match.group(2)
+            formula_attributes = _attributes(_open_tag(formula))
+            text = None if formula.endswith("/>") else unescape(formula[len(_open_tag(formula)):-len("</f>")])
+            if formula_attributes.get("t") == "shared":
+                if text is not None:
+                    masters[formula_attributes["si"]] = (ref, text)
+                elif formula_attributes.get("si") in masters:
+                    origin, master = masters[formula_attributes["si"]]
+                    text = Translator(f"={master}", origin=origin).translate_formula(ref)[1:]
+            if ref is None or not text or formula_attributes.get("t") == "dataTable":
+                continue
+            cells[coordinate_to_tuple(ref)] = (f"={text}", self._value(attributes, match.group(3)))
+        return cells
+
+    def cell_values(self, sheet: str, rows: Iterable[int]) -> Dict[Tuple[int, int], Any]:
+        """
+        Returns the values of the cells of some rows of a sheet of the source
+        file, by (row, column). Formula cells have their cached result.
+        """
+        rows = set(rows)
+        values = {}
+        row = 0
+        for row_match in ROW.finditer(self.zip.read(self.sheets[sheet]).decode("utf-8")):
+            element = row_match.group(0)
+            ref = _attributes(_open_tag(element)).get("r")
+            row = int(ref) if ref else row + 1
+            if row not in rows:
+                continue
+            col = 0
+            for match in CELL.finditer(element):
+                tag = _open_tag(match.group(0))
+                attributes = _attributes(tag)
+                col = coordinate_to_tuple(attributes["r"])[1] if "r" in attributes else col + 1
+                if not tag.endswith("/>"):
+                    value = self._value(attributes, match.group(0)[len(tag):])
+                    if value is not None:
+                        values[row, col] = value
+        return values
+
+    def _date_style(self, style: Optional[str]) -> str:
+        """
+        Returns the index of a cell format like `style` that shows dates.
+        """
+        style = style or "0"
+        if style in self._date_styles:
+            return self._date_styles[style]
+
+        if self._styles is None:
+            self._styles = self.read(self.styles_part)
+        match = re.search(r"(<cellXfs\b[^>]*>)(.*?)</cellXfs>", self._styles, re.S)
+        if not match:
+            raise ValueError("The workbook has no cell formats")
+        xfs = XF.findall(match.group(2))
+        xf = xfs[int(style)]
+        number_format = _attributes(_open_tag(xf)).get("numFmtId", "0")
+
+        custom_formats = {
+            attributes["numFmtId"]: unescape(attributes["formatCode"], {"&quot;": '"'})
+            for attributes in map(_attributes, re.findall(r"<numFmt\b[^>]*>", self._styles))
+        }
+        if int(number_format) in DATE_FORMAT_IDS or _is_date_format(custom_formats.get(number_format, "General")):
+            date_style = style
+        else:
+            tag = _set_attribute(_set_attribute(_open_tag(xf), "numFmtId", SHORT_DATE_FORMAT_ID), "applyNumberFormat", "1")
+            date_style = str(len(xfs))
+            cell_xfs = _set_attribute(match.group(1), "count", str(len(xfs) + 1))
+            self._styles = (
+                self._styles[: match.start()] + cell_xfs + match.group(2)
+                + tag + xf[len(_open_tag(xf)):] + "</cellXfs>" + self._styles[match.end():]
+            )
+
+        self._date_styles[style] = date_style
+        return date_style
+
+    @property
+    def styles_part(self) -> str:
+        return next(
+            _resolve(self.workbook_part, rel["Target"])
+            for rel in self.rels.values()
+            if rel["Type"].endswith("/styles")
+        )
+
+    @staticmethod
+    def _cached_cell(old: Optional[str], value: Any) -> str:
+        """
+        Returns the XML of the formula cell `old` with the cached result `value`.
+        """
+        formula = FORMULA.search(old) if old is not None else None
+        if formula is None:
+            return old or ""
+        tag = _set_attribute(_open_tag(old), "t", None)
+        if isinstance(value, bool):
+            tag, text = _set_attribute(tag, "t", "b"), str(int(value))
+        elif isinstance(value, numbers.Real):
+            if math.isnan(value) or math.isinf(value):
+                return old
+            text = repr(float(value))
+        elif isinstance(value, str):
+            tag, text = _set_attribute(tag, "t", "e" if value in ERRORS else "str"), escape(value)
+        else:
+            return old
+        return f"{tag}{formula.group(0)}<v>{text}</v></c>"
+
+    def _cell(self, sheet: str, ref: str, value: Any, old: Optional[str]) -> str:
+        """
+        Returns the XML of a cell holding `value`, with the format of the cell
+        XML `old` it replaces.
+        """
+        if isinstance(value, CachedValue):
+            return self._cached_cell(old, value.value)
+
+        style = None
+        if old is not None:
+            style = _attributes(_open_tag(old)).get("s")
+            formula = FORMULA.search(old)
+            if formula and _attributes(_open_tag(formula.group(0))).get("t") == "array":
+                raise ValueError(f"Cell {ref} of {sheet} is part of an array formula, it cannot be overwritten")
+
+        if isinstance(value, (dt.datetime, dt.date, dt.time, dt.timedelta)):
+            style = self._date_style(style)
+        tag = f'<c r="{ref}"' + (f' s="{style}"' if style is not None else "")
+
+        if value is None or (isinstance(value, str) and value == "") or (isinstance(value, numbers.Real) and math.isnan(value)):
+            return tag + "/>"
+        if isinstance(value, bool):
+            return f'{tag} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, numbers.Integral):
+            return f"{tag}><v>{int(value)}</v></c>"
+        if isinstance(value, numbers.Real):
+            if math.isinf(value):
+                raise ValueError(f"Cannot write {value} to cell {ref} of {sheet}")
+            return f"{tag}><v>{float(value)!r}</v></c>"
+        if isinstance(value, (dt.datetime, dt.date, dt.time, dt.timedelta)):
+            return f"{tag}><v>{to_excel(value)!r}</v></c>"
+        if isinstance(value, str):
+            if ILLEGAL_CHARACTERS.search(value):
+                raise ValueError(f"Cell {ref} of {sheet} cannot hold the characters of {value!r}")
+            if value.startswith("=") and len(value) > 1:
+                return f"{tag}><f>{escape(value[1:])}</f></c>"
+            return f'{tag} t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'
+        raise ValueError(f"Cannot convert {value!r} to Excel in cell {ref} of {sheet}")
+
+    def _patch_row(self, sheet: str, row: int, element: Optional[str], cells: Dict[int, Any]) -> str:
+        """
+        Returns the XML of a row with `cells` (column to value) written into
+        the row XML `element`, a new row if it is None.
+        """
+        if element is None:
+            tag, inner, close = f'<row r="{row}">', "", "</row>"
+        elif element.endswith("/>"):
+            tag, inner, close = element[:-2] + ">", "", "</row>"
+        else:
+            tag = _open_tag(element)
+            inner, close = element[len(tag):-len("</row>")], "</row>"
+        # The column span is only a hint, it is dropped rather than kept up to date
+        tag = _set_attribute(tag, "spans", None)
+
+        pending = sorted(cells.items())
+        parts, position, col = [], 0, 0
+        for match in CELL.finditer(inner):
+            parts.append(inner[position:match.start()])
+            position = match.end()
+            ref = _attributes(_open_tag(match.group(0))).get("r")
+            col = coordinate_to_tuple(ref)[1] if ref else col + 1
+            while pending and pending[0][0] < col:
+                new_col, value = pending.pop(0)
+                parts.append(self._cell(sheet, f"{get_column_letter(new_col)}{row}", value, None))
+            if pending and pending[0][0] == col:
+                _, value = pending.pop(0)
+                parts.append(self._cell(sheet, f"{get_column_letter(col)}{row}", value, match.group(0)))
+            else:
+                parts.append(match.group(0))
+        # New cells go after the last cell, before anything else of the row
+        rest = inner[position:]
+        for new_col, value in pending:
+            parts.append(self._cell(sheet, f"{get_column_letter(new_col)}{row}", value, None))
+        return tag + "".join(parts) + rest + close
+
+    @staticmethod
+    def _expand_shared_formulas(data: str, cells: Dict[Tuple[int, int], Any]) -> str:
+        """
+        Writes out the shared formulas whose first cell is overwritten as a
+        formula per cell, the other cells would lose their formula otherwise.
+        """
+        if 't="shared"' not in data:
+            return data
+
+        # Shared formula index -> (first cell, formula) of the overwritten first cells
+        masters: Dict[str, Tuple[str, str]] = {}
+        for match in CELL.finditer(data):
+            formula = FORMULA.search(match.group(0))
+            if not formula:
+                continue
+            attributes = _attributes(_open_tag(formula.group(0)))
+            ref = _attributes(_open_tag(match.group(0))).get("r")
+            if attributes.get("t") == "shared" and "ref" in attributes and ref and coordinate_to_tuple(ref) in cells:
+                masters[attributes["si"]] = (ref, unescape(formula.group(1) or ""))
+        if not masters:
+            return data
+
+        def expand(match: "re.Match") -> str:
+            element = match.group(0)
+            formula = FORMULA.search(element)
+            if not formula:
+                return element
+            attributes = _attributes(_open_tag(formula.group(0)))
+            if attributes.get("t") != "shared" or attributes.get("si") not in masters:
+                return element
+            origin, text = masters[attributes["si"]]
+            ref = _attributes(_open_tag(element)).get("r", origin)
+            translated = Translator(f"={text}", origin=origin).translate_formula(ref)[1:]
+            return element[: formula.start()] + f"<f>{escape(translated)}</f>" + element[formula.end():]
+
+        return CELL.sub(expand, data)
+
+    def _patch_sheet(self, sheet: str, xml: str, cells: Dict[Tuple[int, int], Any]) -> str:
+        rows: Dict[int, Dict[int, Any]] = {}
+        for (row, col), value in cells.items():
+            rows.setdefault(row, {})[col] = value
+
+        match = re.search(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", xml, re.S)
+        if not match:
+            raise ValueError(f"Worksheet {sheet} has no sheetData")
+        # Cached results keep the formula of their cell
+        overwritten = {position: value for position, value in cells.items() if not isinstance(value, CachedValue)}
+        data = self._expand_shared_formulas(match.group(1) or "", overwritten)
+
+        pending = sorted(rows)
+        parts, position, row = [], 0, 0
+        for row_match in ROW.finditer(data):
+            parts.append(data[position:row_match.start()])
+            position = row_match.end()
+            element = row_match.group(0)
+            ref = _attributes(_open_tag(element)).get("r")
+            row = int(ref) if ref else row + 1
+            while pending and pending[0] < row:
+                new_row = pending.pop(0)
+                parts.append(self._patch_row(sheet, new_row, None, rows[new_row]))
+            if pending and pending[0] == row:
+                pending.pop(0)
+                parts.append(self._patch_row(sheet, row, element, rows[row]))
+            else:
+                parts.append(element)
+        parts.append(data[position:])
+        for new_row in pending:
+            parts.append(self._patch_row(sheet, new_row, None, rows[new_row]))
+
+        xml = xml[: match.start()] + "<sheetData>" + "".join(parts) + "</sheetData>" + xml[match.end():]
+        return self._extend_dimension(xml, cells)
+
+    @staticmethod
+    def _extend_dimension(xml: str, cells: Dict[Tuple[int, int], Any]) -> str:
+        match = re.search(r'<dimension\b[^>]*\bref="([^"]*)"[^>]*/>', xml)
+        if not match or not cells:
+            return xml
+        min_col, min_row, max_col, max_row = range_boundaries(match.group(1))
+        min_row = min([min_row or 1] + [row for row, _ in cells])
+        max_row = max([max_row or 1] + [row for row, _ in cells])
+        min_col = min([min_col or 1] + [col for _, col in cells])
+        max_col = max([max_col or 1] + [col for _, col in cells])
+        ref = f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}"
+        return xml[: match.start(1)] + ref + xml[match.end(1):]
+
+    def _recalculate_on_load(self) -> None:
+        """
+        Marks the workbook to be fully recalculated when opened and drops the
+        calculation chain, the cached results of formulas may be outdated.
+        """
+        workbook = self.read(self.workbook_part)
+        match = re.search(r"<calcPr\b[^>]*>", workbook)
+        if match:
+            tag = _set_attribute(match.group(0), "fullCalcOnLoad", "1")
+            workbook = workbook[: match.start()] + tag + workbook[match.end():]
+        else:
+            # calcPr follows these elements in the workbook, when present
+            ends = [workbook.rfind(end) + len(end) for end in ("</sheets>", "</functionGroups>", "</externalReferences>", "</definedNames>") if end in workbook]
+            at = max(ends)
+            workbook = workbook[:at] + '<calcPr fullCalcOnLoad="1"/>' + workbook[at:]
+        self.parts[self.workbook_part] = workbook.encode("utf-8")
+
+        for rel_id, rel in list(self.rels.items()):
+            if rel["Type"].endswith(CALC_CHAIN_TYPE):
+                self.removed.add(_resolve(self.workbook_part, rel["Target"]))
+                rels = re.sub(rf'<Relationship\b[^>]*\bId="{rel_id}"[^>]*/>', "", self.read(self.workbook_rels_part))
+                self.parts[self.workbook_rels_part] = rels.encode("utf-8")
+                content_types = self.read("[Content_Types].xml")
+                content_types = re.sub(r'<Override\b[^>]*calcChain[^>]*/>', "", content_types)
+                self.parts["[Content_Types].xml"] = content_types.encode("utf-8")
+                del self.rels[rel_id]
+
+    def _apply(self) -> None:
+        for sheet, cells in self.cells.items():
+            part = self.sheets[sheet]
+            self.parts[part] = self._patch_sheet(sheet, self.read(part), cells).encode("utf-8")
+        if self._styles is not None:
+            self.parts[self.styles_part] = self._styles.encode("utf-8")
+        if self.cells:
+            self._recalculate_on_load()
+        self.cells = {}
+
+    def _write(self, output: BinaryIO) -> None:
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as out:
+            for info in self.zip.infolist():
+                if info.filename in self.removed:
+                    continue
+                target = zipfile.ZipInfo(info.filename, info.date_time)
+                target.compress_type = info.compress_type
+                target.external_attr = info.external_attr
+                if info.filename in self.parts:
+                    out.writestr(target, self.parts[info.filename])
+                else:
+                    out.writestr(target, self.zip.read(info))
+            for part, data in self.parts.items():
+                if part not in self.names:
+                    out.writestr(part, data)
+
+    def save(self, output: Union[str, BinaryIO]) -> None:
+        """
+        Writes the changed workbook to a path or a writable binary stream.
+
+        `output` may be the source file or stream: the workbook is then
+        written to a temporary file or buffer first and replaces it.
+        """
+        self._apply()
+        if isinstance(output, str):
+            folder = os.path.dirname(os.path.abspath(output))
+            handle, temp_path = tempfile.mkstemp(suffix=".xlsx", dir=folder)
+            try:
+                with os.fdopen(handle, "wb") as f:
+                    self._write(f)
+                if isinstance(self.source, str) and os.path.abspath(self.source) == os.path.abspath(output):
+                    self.close()
+                os.replace(temp_path, output)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        elif output is self.source:
+            buffer = io.BytesIO()
+            self._write(buffer)
+            output.seek(0)
+            output.truncate()
+            output.write(buffer.getvalue())
+        else:
+            self._write(output)
+
+    def close(self) -> None:
+        self.zip.close()
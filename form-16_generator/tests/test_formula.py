@@ -0,0 +1,39 @@
+import pytest
+
+from scripts.formula import FormulaEvaluator
+
+# Cell values by (row, column), cells not listed are blank: A1 blank, B1 0, C1 "x"
+CELLS = {(1, 2): 0, (1, 3): "x"}
+
+
+def evaluate(formula: str):
+    def lookup(sheet, first_row, first_col, last_row, last_col):
+        return [
+            CELLS.get((row, col))
+            for row in range(first_row, last_row + 1)
+            for col in range(first_col, last_col + 1)
+        ]
+
+    return FormulaEvaluator(lookup).evaluate(formula)
+
+
+@pytest.mark.parametrize("formula, expected", [
+    # A blank cell is "" against text
+    ('=A1=""', True),
+    ('=""=A1', True),
+    ('=A1<>""', False),
+    ('=IF(A1="",1,2)', 1),
+    ('=A1<"a"', True),
+    # and 0 against a number
+    ("=A1=0", True),
+    ("=A1<1", True),
+    ("=IF(A1=0,1,2)", 1),
+    ("=A1=B1", True),
+    ("=A1=D1", True),
+    # A zero or some text is not ""
+    ('=B1=""', False),
+    ('=IF(C1="",1,2)', 2),
+    ('=C1="X"', True),
+])
+def test_blank_comparisons(formula, expected):
+    assert evaluate(formula) == expected
@@ -1,6 +1,7 @@
 import flet as ft
 from config import ColorScheme
 from scripts import ExcelProcessor # type: ignore
+from scripts.batch import run_batch # type: ignore
 import os
 
 class MainView:
@@ -65,6 +66,10 @@ class MainView:
             self.show_status("Please Select Form-16 !", ColorScheme.ERROR)
             return
 
+        if len(self.selected_files) > 1:
+            self.run_batch()
+            return
+
         try:
             self.show_status("Processing File...", ColorScheme.PRIMARY)
 
@@ -75,12 +80,37 @@ class MainView:
             )
 
             if create_Excel:
-                self.show_status("Form-16 Filled Successfully !", ColorScheme.SUCCESS)
+                # The tax computed without Excel, if set in [results] of cell_mapping.toml.
+                # A formula can also give text or an error like "#VALUE!", shown as it is
+                tax = self.excel_processor.results.get("Total Tax")
+                message = "Form-16 Filled Successfully !"
+                if isinstance(tax, (int, float)) and not isinstance(tax, bool):
+                    message = f"Form-16 Filled Successfully, Total Tax: {tax:,.0f} !"
+                elif tax is not None:
+                    message = f"Form-16 Filled Successfully, Total Tax: {tax} !"
+                self.show_status(message, ColorScheme.SUCCESS)
             else:
                 self.show_status("Error Processing File !", ColorScheme.ERROR)
         except Exception as ex:
             self.show_status(f"Error: {str(ex)}", ColorScheme.ERROR)
 
+    def run_batch(self):
+        # Several ITR Formats: the selected Form-16 is the template, each client
+        # gets its own copy in the "Form-16" folder next to it
+        output_dir = os.path.join(os.path.dirname(self.output_path), "Form-16")
+        try:
+            self.show_status(f"Processing {len(self.selected_files)} Files...", ColorScheme.PRIMARY)
+            results = run_batch(self.selected_files, self.output_path, output_dir)
+
+            failed = [result for result in results if result["Status"] != "OK"]
+            if failed:
+                names = ", ".join(result["ITR Format"] for result in failed)
+                self.show_status(f"{len(results) - len(failed)} Form-16 Filled, {len(failed)} Failed: {names}", ColorScheme.ERROR)
+            else:
+                self.show_status(f"{len(results)} Form-16 Filled Successfully in {output_dir} !", ColorScheme.SUCCESS)
+        except Exception as ex:
+            self.show_status(f"Error: {str(ex)}", ColorScheme.ERROR)
+
     def show_status(self, message: str, color: str):
         self.status_text.value = message
         self.status_text.color = color
@@ -127,7 +157,7 @@ class MainView:
                                     "ITR Format (PIC)",
                                     icon=ft.Icons.FOLDER_OPEN,
                                     on_click=lambda _: self.file_picker.pick_files(
-                                        allow_multiple=False,
+                                        allow_multiple=True,
                                         allowed_extensions=["xlsx"]
                                     ),
                                     bgcolor=ColorScheme.PRIMARY,